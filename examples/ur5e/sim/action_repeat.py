@@ -0,0 +1,49 @@
+import time
+
+from airobot import Robot
+from airobot import log_info
+
+
+def main():
+    """
+    This function compares two ways of running the action repeat
+    of a gym-style environment: calling `set_jpos` and
+    `stepSimulation` in a Python loop, and `hold_jpos_for`,
+    which sends the joint targets once and steps n times.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    robot.arm.go_home(ignore_physics=True)
+    jpos = robot.arm.get_jpos()
+    action_repeat = 10
+    actions = 500
+
+    start = time.time()
+    for i in range(actions):
+        for step in range(action_repeat):
+            robot.arm.set_jpos(jpos)
+            robot.arm.eetool.set_pos(0.0)
+            robot.pb_client.stepSimulation()
+    loop_t = (time.time() - start) / actions
+
+    start = time.time()
+    for i in range(actions):
+        robot.arm.eetool.set_pos(0.0, wait=False)
+        robot.arm.hold_jpos_for(jpos, action_repeat)
+    hold_t = (time.time() - start) / actions
+
+    start = time.time()
+    for i in range(actions):
+        states = robot.arm.hold_jpos_for(jpos, action_repeat,
+                                         return_states=True)
+    states_t = (time.time() - start) / actions
+
+    log_info('Python loop: %.3f ms per action' % (loop_t * 1000))
+    log_info('hold_jpos_for: %.3f ms per action' % (hold_t * 1000))
+    log_info('hold_jpos_for (return_states=True): %.3f ms per action, '
+             'states shape: %s' % (states_t * 1000, str(states.shape)))
+
+
+if __name__ == '__main__':
+    main()
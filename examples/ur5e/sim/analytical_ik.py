@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+
+
+def set_jpos_now(robot, jpos):
+    for jnt_id, pos in zip(robot.arm.arm_jnt_ids, jpos):
+        robot.pb_client.resetJointState(robot.arm.robot_id, jnt_id, pos)
+
+
+def main():
+    """
+    This function compares the closed-form inverse kinematics of the
+    UR5e with the numerical inverse kinematics of pybullet (accuracy
+    and time per call), and enumerates the 8 solution branches of a
+    batch of end effector poses.
+    """
+    robot = Robot('ur5e',
+                  pb_cfg={'gui': False,
+                          'realtime': False},
+                  arm_cfg={'use_analytical_ik': True})
+    home = np.array(robot.arm.cfgs.ARM.HOME_POSITION)
+    rng = np.random.RandomState(0)
+    targets = []
+    for i in range(100):
+        set_jpos_now(robot, home + rng.uniform(-0.3, 0.3, 6))
+        targets.append(robot.arm.get_ee_pose())
+
+    for name, kwargs in [('Analytical IK', {}),
+                         ('Pybullet numerical IK', {'ns': True})]:
+        set_jpos_now(robot, home)
+        start = time.time()
+        solutions = [robot.arm.compute_ik(tgt.pos, tgt.quat, **kwargs)
+                     for tgt in targets]
+        ik_t = (time.time() - start) / len(targets)
+        errors = []
+        for tgt, jpos in zip(targets, solutions):
+            set_jpos_now(robot, jpos)
+            errors.append(np.abs(robot.arm.get_ee_pose().pos -
+                                 tgt.pos).max())
+        log_info('%s: %.1f us per call, max position '
+                 'error: %.2e m' % (name, ik_t * 1e6, np.max(errors)))
+
+    pos = np.array([tgt.pos for tgt in targets])
+    quat = np.array([tgt.quat for tgt in targets])
+    start = time.time()
+    jpos, valid = robot.arm.compute_ik_all(pos, quat)
+    batch_t = time.time() - start
+    log_info('All the branches of %d poses: %.2f ms, %.1f valid '
+             'branches per pose' % (len(targets), batch_t * 1000,
+                                    valid.sum(axis=1).mean()))
+
+
+if __name__ == '__main__':
+    main()
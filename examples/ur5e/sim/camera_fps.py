@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.common import euler2quat
+
+
+def time_frames(func, frames):
+    start = time.time()
+    for i in range(frames):
+        func()
+    return frames / (time.time() - start)
+
+
+def main():
+    """
+    This function measures the camera frame rate (rgb + depth)
+    in pybullet, compared with the cost of the render alone
+    and with the frames served from the frame cache.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False,
+                          'opengl_render': False})
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [1, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    cam = robot.cam
+    cam.setup_camera(focus_pt=[0.7, 0, 1.0], dist=1.5,
+                     yaw=90, pitch=-45, roll=0,
+                     height=480, width=640)
+    frames = 50
+
+    def render_only():
+        robot.pb_client.getCameraImage(
+            width=cam.img_width,
+            height=cam.img_height,
+            viewMatrix=cam.view_matrix.flatten(),
+            projectionMatrix=cam.proj_matrix.flatten(),
+            flags=robot.pb_client.ER_NO_SEGMENTATION_MASK,
+            renderer=robot.pb_client.ER_TINY_RENDERER)
+
+    rgb_out = np.empty((cam.img_height, cam.img_width, 3), dtype=np.uint8)
+    depth_out = np.empty((cam.img_height, cam.img_width), dtype=np.float32)
+
+    def get_images():
+        cam.get_images(get_rgb=True, get_depth=True, use_cache=False)
+
+    def get_images_out():
+        cam.get_images(get_rgb=True, get_depth=True, use_cache=False,
+                       rgb_out=rgb_out, depth_out=depth_out)
+
+    def get_images_cached():
+        # nothing moves, so only the first call renders
+        cam.get_images(get_rgb=True, get_depth=True,
+                       rgb_out=rgb_out, depth_out=depth_out)
+
+    log_info('Render only: %.1f fps' % time_frames(render_only, frames))
+    log_info('get_images: %.1f fps' % time_frames(get_images, frames))
+    log_info('get_images with out=: '
+             '%.1f fps' % time_frames(get_images_out, frames))
+    log_info('get_images from the frame cache: '
+             '%.1f fps' % time_frames(get_images_cached, frames))
+    log_info('Frame cache: %s' % cam.get_cache_stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.sensor.camera.camera_rig import CameraRig
+from airobot.utils.common import euler2quat
+
+
+def time_frames(robot, func, frames):
+    start = time.time()
+    for i in range(frames):
+        # move the scene so that every frame is rendered
+        robot.pb_client.stepSimulation()
+        func()
+    return frames / (time.time() - start)
+
+
+def main():
+    """
+    This function compares rendering 4 views one camera after
+    another with rendering them with a camera rig, in this
+    process and in render worker processes.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False,
+                          'scene_log': True})
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [1, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    robot.pb_client.load_geom('box', size=0.05, mass=1,
+                              base_pos=[1, 0.12, 1.0],
+                              rgba=[1, 0, 0, 1])
+    yaws = [0, 90, 180, 270]
+    num_workers = len(yaws)
+    frames = 20
+    rigs = [CameraRig(robot.cam.cfgs, robot.pb_client),
+            CameraRig(robot.cam.cfgs, robot.pb_client,
+                      num_workers=num_workers)]
+    for rig in rigs:
+        for yaw in yaws:
+            rig.add_camera(focus_pt=[0.7, 0, 1.0], dist=1.5,
+                           yaw=yaw, pitch=-45)
+
+    def one_by_one():
+        rgbs = []
+        depths = []
+        for yaw in yaws:
+            robot.cam.setup_camera(focus_pt=[0.7, 0, 1.0], dist=1.5,
+                                   yaw=yaw, pitch=-45)
+            rgb, depth = robot.cam.get_images(get_rgb=True, get_depth=True)
+            rgbs.append(rgb)
+            depths.append(depth)
+        return np.stack(rgbs), np.stack(depths)
+
+    log_info('One camera after another: '
+             '%.1f fps' % time_frames(robot, one_by_one, frames))
+    log_info('Camera rig: %.1f fps' % time_frames(robot,
+                                                  rigs[0].get_images,
+                                                  frames))
+    log_info('Camera rig with %d render workers: '
+             '%.1f fps' % (num_workers,
+                           time_frames(robot, rigs[1].get_images, frames)))
+    for rig in rigs:
+        rig.close()
+
+
+if __name__ == '__main__':
+    main()
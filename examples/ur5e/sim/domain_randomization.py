@@ -0,0 +1,81 @@
+import os
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.common import euler2quat
+from airobot.utils.domain_randomizer import DomainRandomizer
+
+
+def main():
+    """
+    This function shows how to randomize the colors, textures,
+    dynamics, camera pose and light of the scene at each reset
+    with a DomainRandomizer, and how to apply recorded values
+    again to reproduce a randomized scene.
+    """
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    texture_path = os.path.join(dir_path, 'textures')
+    texture_files = [os.path.join(texture_path, '%d.jpg' % i)
+                     for i in range(1, 6)]
+    robot = Robot('ur5e',
+                  pb_cfg={'gui': False,
+                          'realtime': False,
+                          'opengl_render': False})
+    robot.arm.go_home()
+    ori = euler2quat([0, 0, np.pi / 2])
+    table_id = robot.pb_client.load_urdf('table/table.urdf',
+                                         [1, 0, 0.4],
+                                         ori,
+                                         scaling=0.9)
+    box_id = robot.pb_client.load_geom('box', size=0.05, mass=1,
+                                       base_pos=[1, 0.12, 1.0],
+                                       rgba=[1, 0, 0, 1])
+    sphere_id = robot.pb_client.load_geom('sphere', size=0.05, mass=1,
+                                          base_pos=[1, -0.12, 1.0],
+                                          rgba=[0, 1, 0, 1])
+    spec = {
+        'rgba': [{'body': robot.arm.robot_id},
+                 {'body': box_id},
+                 {'body': sphere_id}],
+        'texture': [{'body': table_id, 'files': texture_files}],
+        'dynamics': [{'body': box_id,
+                      'mass': (0.5, 2.0),
+                      'lateralFriction': (0.5, 1.0)},
+                     {'body': sphere_id,
+                      'mass': (0.5, 2.0),
+                      'lateralFriction': (0.5, 1.0)}],
+        'camera': {'focus_pt': ([0.65, -0.05, 0.95], [0.75, 0.05, 1.05]),
+                   'dist': (1.4, 1.6),
+                   'yaw': (85, 95),
+                   'pitch': (-50, -40)},
+        'light': {'direction': ([-1, -1, 2], [1, 1, 3])},
+    }
+    randomizer = DomainRandomizer(robot.pb_client, spec,
+                                  camera=robot.cam, seed=0)
+    log_info('Number of randomized parameters: '
+             '%d' % len(randomizer.param_names))
+
+    episodes = 20
+    start = time.time()
+    for i in range(episodes):
+        randomizer.reset()
+    log_info('Randomization: %.2f ms per reset' % ((time.time() - start) /
+                                                    episodes * 1000))
+
+    # the images of the last reset
+    render_kwargs = randomizer.get_render_kwargs()
+    rgb, depth = robot.cam.get_images(**render_kwargs)
+    # another scene, then the last one again from its recorded values
+    randomizer.reset()
+    randomizer.reset(randomizer.records[-2])
+    rgb_again, depth_again = robot.cam.get_images(**render_kwargs)
+    log_info('Reproduced the recorded scene: '
+             '%s' % (np.array_equal(rgb, rgb_again) and
+                     np.array_equal(depth, depth_again)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.common import euler2quat
+
+
+def load_scene(robot):
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [.5, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    robot.pb_client.load_geom('box', size=0.05, mass=1,
+                              base_pos=[0.5, 0.12, 1.0],
+                              rgba=[1, 0, 0, 1])
+
+
+def time_resets(robot, fast, episodes):
+    start = time.time()
+    for i in range(episodes):
+        robot.arm.reset(fast=fast)
+        robot.arm.go_home(ignore_physics=True)
+        load_scene(robot)
+    return (time.time() - start) / episodes
+
+
+def main():
+    """
+    This function compares the latency of a full reset
+    (resetSimulation + reloading the URDFs) with the latency
+    of a fast reset (restoring an in-memory snapshot).
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    episodes = 50
+    full_t = time_resets(robot, fast=False, episodes=episodes)
+    fast_t = time_resets(robot, fast=True, episodes=episodes)
+    log_info('Full reset: %.2f ms per episode' % (full_t * 1000))
+    log_info('Fast reset: %.2f ms per episode' % (fast_t * 1000))
+    log_info('Speedup: %.1fx' % (full_t / fast_t))
+
+
+if __name__ == '__main__':
+    main()
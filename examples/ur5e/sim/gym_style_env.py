@@ -82,10 +82,8 @@ class URRobotGym:
         jnt_pos = self.robot.arm.compute_ik(pos, ori=ee_ori)
         gripper_ang = self._scale_gripper_angle(action[4])
 
-        for step in range(self._action_repeat):
-            self.robot.arm.set_jpos(jnt_pos)
-            self.robot.arm.eetool.set_pos(gripper_ang)
-            self.robot.pb_client.stepSimulation()
+        self.robot.arm.eetool.set_pos(gripper_ang, wait=False)
+        self.robot.arm.hold_jpos_for(jnt_pos, self._action_repeat)
 
     def _scale_gripper_angle(self, command):
         """
@@ -0,0 +1,56 @@
+import time
+
+import pybullet as p
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.pb_util import BulletClient
+
+
+def time_calls(func, calls, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        for i in range(calls):
+            func()
+        best = min(best, (time.time() - start) / calls)
+    return best
+
+
+def main():
+    """
+    This function measures the per-call overhead of the pybullet
+    functions called through BulletClient. It compares the
+    cached dispatch table with resolving the function through
+    `__getattr__` on every call (the previous behavior),
+    and with calling pybullet directly.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    pb = robot.pb_client
+    client_id = pb.get_client_id()
+    calls = 100000
+
+    def raw_pybullet():
+        p.getNumBodies(physicsClientId=client_id)
+
+    def getattr_each_call():
+        BulletClient.__getattr__(pb, 'getNumBodies')()
+
+    def dispatch_table():
+        pb.getNumBodies()
+
+    raw_t = time_calls(raw_pybullet, calls)
+    getattr_t = time_calls(getattr_each_call, calls)
+    cached_t = time_calls(dispatch_table, calls)
+    log_info('getNumBodies, raw pybullet: %.3f us' % (raw_t * 1e6))
+    log_info('getNumBodies, __getattr__ per call: '
+             '%.3f us' % (getattr_t * 1e6))
+    log_info('getNumBodies, dispatch table: %.3f us' % (cached_t * 1e6))
+    log_info('Overhead removed per call: '
+             '%.3f us' % ((getattr_t - cached_t) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.common import euler2quat
+
+
+def time_frames(func, frames):
+    start = time.time()
+    for i in range(frames):
+        func()
+    return (time.time() - start) / frames
+
+
+def main():
+    """
+    This function measures the cost of converting the camera
+    images into a point cloud (float64, float32 and organized
+    float32 with a preallocated output), on top of the cost
+    of getting the images. Nothing moves in the scene, so after
+    the first frame the images come from the frame cache of the
+    camera and the timings only show the point cloud conversion.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [1, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    cam = robot.cam
+    cam.setup_camera(focus_pt=[0.7, 0, 1.0], dist=1.5,
+                     yaw=90, pitch=-45, roll=0,
+                     height=480, width=640)
+    frames = 30
+    out = np.empty((cam.img_height, cam.img_width, 3), dtype=np.float32)
+
+    def get_images():
+        cam.get_images(get_rgb=True, get_depth=True)
+
+    def get_pcd_64():
+        cam.get_pcd(in_world=True, filter_depth=True)
+
+    def get_pcd_32():
+        cam.get_pcd(in_world=True, filter_depth=True, dtype=np.float32)
+
+    def get_pcd_organized():
+        cam.get_pcd(in_world=True, filter_depth=True, dtype=np.float32,
+                    organized=True, out=out)
+
+    img_t = time_frames(get_images, frames)
+    log_info('get_images: %.2f ms per frame' % (img_t * 1000))
+    for name, func in [('float64', get_pcd_64),
+                       ('float32', get_pcd_32),
+                       ('organized float32', get_pcd_organized)]:
+        pcd_t = time_frames(func, frames)
+        log_info('get_pcd (%s): %.2f ms per frame, '
+                 '%.2f ms on top of get_images' % (name, pcd_t * 1000,
+                                                    (pcd_t - img_t) * 1000))
+
+
+if __name__ == '__main__':
+    main()
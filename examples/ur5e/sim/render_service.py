@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.sensor.camera.camera_rig import CameraRig
+from airobot.utils.common import euler2quat
+
+
+def run(robot, rig, steps, image_period, async_render):
+    robot.arm.go_home(ignore_physics=True)
+    robot.arm.set_jpos([0.5, -1.2, 1.2, -1.5, -1.5, 0], wait=False)
+    frames = 0
+    latest_frame_id = None
+    start = time.time()
+    for step in range(steps):
+        robot.pb_client.stepSimulation()
+        if step % image_period != 0:
+            continue
+        if async_render:
+            rig.submit_render()
+            res = rig.get_rendered()
+            if res is not None:
+                frames += 1
+                latest_frame_id = res[0]
+        else:
+            rig.get_images()
+            frames += 1
+            latest_frame_id = robot.pb_client.get_step_count()
+    duration = time.time() - start
+    return steps / duration, frames, latest_frame_id
+
+
+def main():
+    """
+    This function compares rendering the cameras in the physics loop
+    with the render-service mode of a camera rig, where the scene is
+    sent to render workers every 10 Hz and the images come back
+    asynchronously, tagged with the simulation step that produced them.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False,
+                          'scene_log': True})
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [1, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    rig = CameraRig(robot.cam.cfgs, robot.pb_client, num_workers=2)
+    for yaw in [-90, 90]:
+        rig.add_camera(focus_pt=[0.7, 0, 1.0], dist=1.5,
+                       yaw=yaw, pitch=-45)
+    # 10 Hz images with the default 240 Hz simulation
+    image_period = 24
+    steps = 2400
+    # the render workers load the scene on their first frame
+    rig.submit_render()
+    rig.get_rendered(timeout=None)
+    for async_render in [False, True]:
+        rate, frames, frame_id = run(robot, rig, steps,
+                                     image_period, async_render)
+        mode = 'Render service' if async_render else 'Render in the loop'
+        log_info('%s: %.1f steps/s, %d frames, last frame from '
+                 'step %s' % (mode, rate, frames, frame_id))
+    rig.close()
+
+
+if __name__ == '__main__':
+    main()
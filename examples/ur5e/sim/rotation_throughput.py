@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+import airobot.utils.common as arutil
+from airobot import Robot
+from airobot import log_info
+
+
+def time_calls(func, calls):
+    start = time.time()
+    for i in range(calls):
+        func()
+    return (time.time() - start) / calls
+
+
+def scipy_quat2rot(quat):
+    rot = R.from_quat(quat)
+    if hasattr(rot, 'as_matrix'):
+        return rot.as_matrix()
+    return rot.as_dcm()
+
+
+def main():
+    """
+    This function compares the closed-form rotation conversions in
+    `airobot.utils.common` with the scipy Rotation path they replace,
+    on a single quaternion and on a batch of quaternions, and
+    measures the cost of `get_ee_pose`.
+    """
+    quat = R.random(random_state=0).as_quat()
+    quats = R.random(1000, random_state=0).as_quat()
+    calls = 2000
+    for name, func, scipy_func in [
+            ('quat2rot', arutil.quat2rot, scipy_quat2rot),
+            ('quat2euler', arutil.quat2euler,
+             lambda q: R.from_quat(q).as_euler('xyz')),
+            ('quat_multiply', lambda q: arutil.quat_multiply(q, q),
+             lambda q: (R.from_quat(q) * R.from_quat(q)).as_quat()),
+            ('euler2quat', lambda q: arutil.euler2quat(q[..., :3]),
+             lambda q: R.from_euler('xyz', q[..., :3]).as_quat())]:
+        single_t = time_calls(lambda: func(quat), calls)
+        scipy_single_t = time_calls(lambda: scipy_func(quat), calls)
+        batch_t = time_calls(lambda: func(quats), calls // 10)
+        scipy_batch_t = time_calls(lambda: scipy_func(quats), calls // 10)
+        log_info('%s: %.1f us (scipy: %.1f us) for one rotation, '
+                 '%.1f us (scipy: %.1f us) for 1000 '
+                 'rotations' % (name, single_t * 1e6,
+                                scipy_single_t * 1e6,
+                                batch_t * 1e6, scipy_batch_t * 1e6))
+    np.testing.assert_allclose(arutil.quat2rot(quats), scipy_quat2rot(quats),
+                               atol=1e-12)
+
+    robot = Robot('ur5e',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    ee_t = time_calls(robot.arm.get_ee_pose, calls)
+    log_info('get_ee_pose: %.1f us per call' % (ee_t * 1e6))
+
+
+if __name__ == '__main__':
+    main()
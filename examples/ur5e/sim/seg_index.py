@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.common import euler2quat
+from airobot.utils.seg_util import SegIndex
+from airobot.utils.seg_util import decode_seg
+
+
+def main():
+    """
+    This function gets the pixels, bounding box and point cloud of
+    every object in the segmentation mask, by comparing the mask with
+    each object id and with one `SegIndex`.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [1, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    for i in range(10):
+        robot.pb_client.load_geom('box', size=0.03, mass=1,
+                                  base_pos=[0.8 + 0.04 * i,
+                                            -0.2 + 0.04 * i,
+                                            1.0],
+                                  rgba=[1, 0, 0, 1])
+    robot.cam.setup_camera(focus_pt=[0.7, 0, 1.0], dist=1.5,
+                           yaw=90, pitch=-45, roll=0)
+    rgb, depth, seg = robot.cam.get_images(get_rgb=True,
+                                           get_depth=True,
+                                           get_seg=True)
+    pts, _ = robot.cam.get_pcd(organized=True, filter_depth=False)
+    repeat = 20
+
+    start = time.time()
+    for _ in range(repeat):
+        body_ids, link_ids = decode_seg(seg)
+        for obj_id in np.unique(body_ids):
+            if obj_id < 0:
+                continue
+            mask = body_ids == obj_id
+            rows, cols = np.nonzero(mask)
+            bbox = [rows.min(), cols.min(), rows.max(), cols.max()]
+            obj_pts = pts[mask]
+    naive_t = (time.time() - start) / repeat
+
+    start = time.time()
+    for _ in range(repeat):
+        seg_index = SegIndex(seg)
+        for obj_id in seg_index.ids:
+            bbox = seg_index.bbox(obj_id)
+            obj_pts = seg_index.select(pts, obj_id)
+    index_t = (time.time() - start) / repeat
+
+    log_info('Objects in the image: %s' % str(seg_index.ids))
+    log_info('Pixel counts: %s' % str(seg_index.counts))
+    log_info('One mask per object: %.2f ms' % (naive_t * 1000))
+    log_info('SegIndex: %.2f ms' % (index_t * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import time
+
+from airobot import Robot
+from airobot import log_info
+
+
+def main():
+    """
+    This function measures how many simulation steps per second
+    the realtime stepping thread achieves (with time dilation
+    disabled) while the gripper is active, and how fast
+    the simulation can be stepped in step simulation mode.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': True,
+                          'time_dilation': None})
+    robot.arm.go_home()
+    robot.arm.eetool.close()
+
+    duration = 3.0
+    robot.pb_client.set_time_dilation(None)
+    time.sleep(duration)
+    stats = robot.pb_client.get_step_stats()
+    log_info('Realtime mode: %.0f steps/s' % stats['achieved_rate'])
+
+    robot.pb_client.set_step_sim(True)
+    steps = 5000
+    start = time.time()
+    for i in range(steps):
+        robot.pb_client.stepSimulation()
+    log_info('Step mode: %.0f steps/s' % (steps / (time.time() - start)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+import time
+
+import numpy as np
+
+from airobot import Robot
+from airobot import log_info
+from airobot.utils.common import euler2quat
+from airobot.utils.pb_util import TextureModder
+
+
+def time_episodes(modder, episodes):
+    start = time.time()
+    for i in range(episodes):
+        modder.randomize('texture')
+    return (time.time() - start) / episodes
+
+
+def main():
+    """
+    This function measures the cost of `randomize(mode='texture')`
+    per episode, when the texture files are loaded as they are
+    chosen (first episode) and with all the texture files
+    preloaded into the pool.
+    """
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    texture_path = os.path.join(dir_path, 'textures')
+    robot = Robot('ur5e',
+                  pb_cfg={'gui': False,
+                          'realtime': False})
+    ori = euler2quat([0, 0, np.pi / 2])
+    robot.pb_client.load_urdf('table/table.urdf',
+                              [1, 0, 0.4],
+                              ori,
+                              scaling=0.9)
+    robot.pb_client.load_geom('box', size=0.05, mass=1,
+                              base_pos=[1, 0.12, 1.0],
+                              rgba=[1, 0, 0, 1])
+    episodes = 5
+    client_id = robot.pb_client.get_client_id()
+
+    modder = TextureModder(pb_client_id=client_id)
+    modder.set_texture_path(texture_path)
+    cold_t = time_episodes(modder, 1)
+    stats = modder.get_texture_pool_stats()
+    log_info('Loading the textures as they are chosen: %.1f ms for the '
+             'first episode, %d texture files loaded' % (cold_t * 1000,
+                                                         stats['loads']))
+
+    modder = TextureModder(pb_client_id=client_id)
+    modder.set_texture_path(texture_path)
+    start = time.time()
+    modder.preload_textures()
+    preload_t = time.time() - start
+    log_info('Preloading the textures: %.1f ms' % (preload_t * 1000))
+    pool_t = time_episodes(modder, episodes)
+    stats = modder.get_texture_pool_stats()
+    log_info('With the texture pool: %.1f ms per episode, %d texture '
+             'files loaded, %d textures reused' % (pool_t * 1000,
+                                                   stats['loads'],
+                                                   stats['hits']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import time
+
+from airobot import Robot
+from airobot import log_info
+
+
+def run_motions(robot):
+    start = time.time()
+    for i in range(3):
+        robot.arm.set_jpos([-0.8, -1.2, -2.2, -1.5, 2.0, 0], wait=True)
+        robot.arm.go_home()
+    return time.time() - start
+
+
+def main():
+    """
+    This function shows how to run a realtime-mode script
+    (blocking `set_jpos` calls) headless and faster than
+    realtime by changing the time dilation factor.
+    """
+    robot = Robot('ur5e_2f140',
+                  pb_cfg={'gui': False,
+                          'realtime': True,
+                          'time_dilation': 1.0})
+    robot.arm.go_home()
+    for dilation in [1.0, 10.0, None]:
+        robot.pb_client.set_time_dilation(dilation)
+        duration = run_motions(robot)
+        stats = robot.pb_client.get_step_stats()
+        log_info('Time dilation %s: %.2f s, %.0f steps/s '
+                 '(target %.0f), %.1fx realtime, '
+                 '%d missed deadlines' % (str(dilation), duration,
+                                          stats['achieved_rate'],
+                                          stats['target_rate'],
+                                          stats['real_time_factor'],
+                                          stats['missed_deadlines']))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,6 @@
 An example of UR robot with dual cameras in pybullet.
 """
 
-from copy import deepcopy
-
 import matplotlib.pyplot as plt
 import numpy as np
 from gym import spaces
@@ -11,7 +9,7 @@ from yacs.config import CfgNode as CN
 
 from airobot import Robot
 from airobot import log_info
-from airobot.sensor.camera.rgbdcam_pybullet import RGBDCameraPybullet
+from airobot.sensor.camera.camera_rig import CameraRig
 from airobot.utils.common import ang_in_mpi_ppi
 from airobot.utils.common import clamp
 from airobot.utils.common import euler2quat
@@ -29,11 +27,8 @@ class URRobotGym:
         self._ee_pos_scale = 0.02
         self._ee_ori_scale = np.pi / 36.0
 
-        self.cams = []
-        pb_client = self.robot.pb_client
-        for i in range(2):
-            self.cams.append(RGBDCameraPybullet(cfgs=self._camera_cfgs(),
-                                                pb_client=pb_client))
+        self.cam_rig = CameraRig(cfgs=self._camera_cfgs(),
+                                 pb_client=self.robot.pb_client)
         self._setup_cameras()
         self.reset()
 
@@ -79,10 +74,7 @@ class URRobotGym:
             The two images are concatenated together.
             The returned observation shape is [2H, W, 3].
         """
-        rgbs = []
-        for cam in self.cams:
-            rgb, _ = cam.get_images(get_rgb=True, get_depth=False)
-            rgbs.append(deepcopy(rgb))
+        rgbs, _ = self.cam_rig.get_images(get_rgb=True, get_depth=False)
         return np.concatenate(rgbs, axis=0)
 
     def get_robot_state(self):
@@ -126,16 +118,16 @@ class URRobotGym:
         return _ROOT_C.clone()
 
     def _setup_cameras(self):
-        self.cams[0].setup_camera(focus_pt=[0.5, 0., 1.0],
-                                  dist=2,
-                                  yaw=-90,
-                                  pitch=-45,
-                                  roll=0)
-        self.cams[1].setup_camera(focus_pt=[0.5, 0., 1.0],
-                                  dist=2,
-                                  yaw=90,
-                                  pitch=-45,
-                                  roll=0)
+        self.cam_rig.add_camera(focus_pt=[0.5, 0., 1.0],
+                                dist=2,
+                                yaw=-90,
+                                pitch=-45,
+                                roll=0)
+        self.cam_rig.add_camera(focus_pt=[0.5, 0., 1.0],
+                                dist=2,
+                                yaw=90,
+                                pitch=-45,
+                                roll=0)
 
     def _scale_gripper_angle(self, command):
         """
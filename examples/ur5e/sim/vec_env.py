@@ -0,0 +1,34 @@
+import time
+
+import numpy as np
+
+from airobot import log_info
+from airobot.utils.vec_env import VecRobotEnv
+
+
+def main():
+    """
+    This function shows how to step several headless UR5e
+    simulations in parallel worker processes with batched actions,
+    and reports the throughput in environment steps per second.
+    """
+    num_envs = 4
+    steps = 200
+    vec_env = VecRobotEnv(num_envs,
+                          env_kwargs={'robot_name': 'ur5e_2f140',
+                                      'action_repeat': 10})
+    obs = vec_env.reset()
+    log_info('Observation batch shape: %s' % str(obs.shape))
+    home = obs[:, :vec_env.action_shape[0]].copy()
+    start = time.time()
+    for i in range(steps):
+        noise = np.random.uniform(-0.2, 0.2, size=home.shape)
+        obs, rewards, dones, infos = vec_env.step(home + noise)
+    duration = time.time() - start
+    log_info('%d envs x %d steps: %.1f env steps per second' %
+             (num_envs, steps, num_envs * steps / duration))
+    vec_env.close()
+
+
+if __name__ == '__main__':
+    main()
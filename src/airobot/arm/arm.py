@@ -191,7 +191,7 @@ class ARM(object):
         Return the end effector pose.
 
         Returns:
-            4-element tuple containing
+            Pose: EE pose, which unpacks like a 4-element tuple containing
 
             - np.ndarray: x, y, z position of the EE (shape: :math:`[3]`)
             - np.ndarray: quaternion representation ([x, y, z, w]) of the EE
@@ -54,6 +54,8 @@ class DualArmPybullet(ARM):
         self._np_random, _ = self._seed(seed)
 
         self.robot_id = None
+        # snapshot of the scene right after a full reset
+        self._reset_state_id = None
         self.arms = {}
 
         self._init_consts()
@@ -150,7 +152,8 @@ class DualArmPybullet(ARM):
                     joint_name=joint_name,
                     get_func_derv=self.get_jvel,
                     timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                    max_error=self.cfgs.ARM.MAX_JOINT_ERROR
+                    max_error=self.cfgs.ARM.MAX_JOINT_ERROR,
+                    clock=self._pb.get_clock()
                 )
         else:
             if arm not in self.arms:
@@ -207,7 +210,8 @@ class DualArmPybullet(ARM):
                     get_func=self.get_jvel,
                     joint_name=joint_name,
                     timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                    max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR
+                    max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR,
+                    clock=self._pb.get_clock()
                 )
         else:
             if arm not in self.arms:
@@ -232,6 +236,8 @@ class DualArmPybullet(ARM):
             in step_simulation mode instead of realtime_simulation mode.
             If you are using realtime_simulation mode, the time interval
             between two set_jtorq() calls must be small enough (like 0.0002s)
+            A pre-step hook (`pb_client.add_step_hook`) can send the
+            torques right before every simulation step.
 
         Args:
             torque (float or list): torque value(s) for the joint(s).
@@ -484,7 +490,7 @@ class DualArmPybullet(ARM):
                 match arm names in cfg file.
 
         Returns:
-            4-element tuple containing
+            Pose: EE pose, which unpacks like a 4-element tuple containing
 
             - np.ndarray: x, y, z position of the EE (shape: :math:`[3,]`).
             - np.ndarray: quaternion representation of the
@@ -591,6 +597,25 @@ class DualArmPybullet(ARM):
                                  targetValue=jpos,
                                  targetVelocity=jvel)
 
+    def _fast_reset(self):
+        """
+        Restore the snapshot taken at the end of the last full reset,
+        and bring the motors and the end effector tools
+        back to their reset state.
+        """
+        for arm in self.arms.values():
+            if hasattr(arm, 'eetool'):
+                arm.eetool.deactivate()
+        self._pb.restore_state(self._reset_state_id)
+        # motor commands are not part of the snapshot
+        self._in_torque_mode = [False] * self.dual_arm_dof
+        self.set_jvel([0.] * self.dual_arm_dof)
+        for arm in self.arms.values():
+            arm._in_torque_mode = [False] * arm.arm_dof
+            if hasattr(arm, 'eetool'):
+                arm.eetool.activate()
+                arm.eetool.set_pos(arm.eetool.gripper_open_angle, wait=False)
+
     def _is_in_torque_mode(self, joint_name=None):
         if joint_name is None:
             return all(self._in_torque_mode)
@@ -52,10 +52,18 @@ class SingleArmPybullet(ARM):
         super(SingleArmPybullet, self).__init__(cfgs=cfgs,
                                                 eetool_cfg=eetool_cfg)
         self.robot_id = None
+        # snapshot of the scene right after a full reset
+        self._reset_state_id = None
         self._np_random, _ = self._seed(seed)
 
         self._init_consts()
         self._in_torque_mode = [False] * self.arm_dof
+        # joint positions, velocities and applied torques of the arm
+        # joints, refreshed once per state version of the pybullet client
+        self._jstates = np.zeros((3, self.arm_dof))
+        self._jstates_view = self._jstates.view()
+        self._jstates_view.flags.writeable = False
+        self._jstates_key = None
 
     def go_home(self, ignore_physics=False):
         """
@@ -145,7 +153,8 @@ class SingleArmPybullet(ARM):
                 joint_name=joint_name,
                 get_func_derv=self.get_jvel,
                 timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                max_error=self.cfgs.ARM.MAX_JOINT_ERROR
+                max_error=self.cfgs.ARM.MAX_JOINT_ERROR,
+                clock=self._pb.get_clock()
             )
         return success
 
@@ -201,7 +210,8 @@ class SingleArmPybullet(ARM):
                     get_func=self.get_jvel,
                     joint_name=joint_name,
                     timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                    max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR
+                    max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR,
+                    clock=self._pb.get_clock()
                 )
             else:
                 success = True
@@ -219,6 +229,8 @@ class SingleArmPybullet(ARM):
             in step_simulation mode instead of realtime_simulation mode.
             If you are using realtime_simulation mode, the time interval
             between two set_jtorq() calls must be small enough (like 0.0002s)
+            A pre-step hook (`pb_client.add_step_hook`) can send the
+            torques right before every simulation step.
 
         Args:
             torque (float or list): torque value(s) for the joint(s).
@@ -257,6 +269,50 @@ class SingleArmPybullet(ARM):
                                            force=torque)
         return True
 
+    def hold_jpos_for(self, position, n_steps, hooks=True,
+                      return_states=False):
+        """
+        Send the joint position targets once and step the
+        simulation `n_steps` times. This is the action repeat
+        of a gym-style environment done in one call. It only works
+        in step simulation mode.
+
+        Args:
+            position (list or np.ndarray): desired joint positions
+                (shape: :math:`[DOF,]`).
+            n_steps (int): number of simulation steps.
+            hooks (bool): run the step hooks of the pybullet client
+                (see `BulletClient.add_step_hook`) or not.
+            return_states (bool): return the joint states
+                after every step or not.
+
+        Returns:
+            np.ndarray: if return_states is True, the joint
+            positions, velocities and applied torques after every
+            step (shape: :math:`[N, 3, DOF]`, N is `n_steps`).
+            Otherwise, None.
+        """
+        if self._pb.in_realtime_mode():
+            raise RuntimeError('hold_jpos_for only works in step '
+                               'simulation mode.')
+        tgt_pos = np.asarray(position, dtype=np.float64).flatten()
+        if tgt_pos.size != self.arm_dof:
+            raise ValueError('Position should contain %d '
+                             'elements' % self.arm_dof)
+        self._pb.setJointMotorControlArray(self.robot_id,
+                                           self.arm_jnt_ids,
+                                           self._pb.POSITION_CONTROL,
+                                           targetPositions=tgt_pos.tolist(),
+                                           forces=self._max_torques)
+        if not return_states:
+            self._pb.step(n_steps, hooks=hooks)
+            return None
+        states = np.empty((n_steps, 3, self.arm_dof))
+        for i in range(n_steps):
+            self._pb.step(1, hooks=hooks)
+            states[i] = self._get_cached_jstates()
+        return states
+
     def set_ee_pose(self, pos=None, ori=None, wait=True, *args, **kwargs):
         """
         Move the end effector to the specifed pose.
@@ -276,8 +332,7 @@ class SingleArmPybullet(ARM):
             at the moment when the function exits.
         """
         if pos is None:
-            pose = self.get_ee_pose()
-            pos = pose[0]
+            pos = self.get_ee_pose().pos
         jnt_pos = self.compute_ik(pos, ori)
         success = self.set_jpos(jnt_pos, wait=wait)
         return success
@@ -302,17 +357,16 @@ class SingleArmPybullet(ARM):
             raise AssertionError('move_ee_xyz() can '
                                  'only be called in realtime'
                                  ' simulation mode')
-        pos, quat, rot_mat, euler = self.get_ee_pose()
-        cur_pos = np.array(pos)
+        ee_pose = self.get_ee_pose()
         delta_xyz = np.array(delta_xyz)
 
-        waypoints = arutil.linear_interpolate_path(cur_pos,
+        waypoints = arutil.linear_interpolate_path(ee_pose.pos,
                                                    delta_xyz,
                                                    eef_step)
         way_jnt_positions = []
         for i in range(waypoints.shape[0]):
             tgt_jnt_poss = self.compute_ik(waypoints[i, :].flatten().tolist(),
-                                           quat)
+                                           ee_pose.quat)
             way_jnt_positions.append(copy.deepcopy(tgt_jnt_poss))
         success = False
         for jnt_poss in way_jnt_positions:
@@ -387,9 +441,10 @@ class SingleArmPybullet(ARM):
               (shape: :math:`[DOF]`).
         """
         if joint_name is None:
-            states = self._pb.getJointStates(self.robot_id,
-                                             self.arm_jnt_ids)
-            pos = [state[0] for state in states]
+            pos = self._get_cached_jstates()[0].tolist()
+        elif joint_name in self._arm_jnt_idx:
+            pos = float(self._get_cached_jstates()[
+                0, self._arm_jnt_idx[joint_name]])
         else:
             jnt_id = self.jnt_to_id[joint_name]
             pos = self._pb.getJointState(self.robot_id,
@@ -413,9 +468,10 @@ class SingleArmPybullet(ARM):
               (shape: :math:`[DOF]`).
         """
         if joint_name is None:
-            states = self._pb.getJointStates(self.robot_id,
-                                             self.arm_jnt_ids)
-            vel = [state[1] for state in states]
+            vel = self._get_cached_jstates()[1].tolist()
+        elif joint_name in self._arm_jnt_idx:
+            vel = float(self._get_cached_jstates()[
+                1, self._arm_jnt_idx[joint_name]])
         else:
             jnt_id = self.jnt_to_id[joint_name]
             vel = self._pb.getJointState(self.robot_id,
@@ -445,22 +501,41 @@ class SingleArmPybullet(ARM):
               (shape: :math:`[DOF]`).
         """
         if joint_name is None:
-            states = self._pb.getJointStates(self.robot_id,
-                                             self.arm_jnt_ids)
-            # state[3] is appliedJointMotorTorque
-            torque = [state[3] for state in states]
+            torque = self._get_cached_jstates()[2].tolist()
+        elif joint_name in self._arm_jnt_idx:
+            torque = float(self._get_cached_jstates()[
+                2, self._arm_jnt_idx[joint_name]])
         else:
             jnt_id = self.jnt_to_id[joint_name]
             torque = self._pb.getJointState(self.robot_id,
                                             jnt_id)[3]
         return torque
 
+    def get_jstates(self):
+        """
+        Return the joint positions, velocities and applied torques
+        of the arm joints with one pybullet query. The states are
+        cached until the simulation is stepped or reset, so calling
+        this function (or get_jpos, get_jvel, get_jtorq) several
+        times between two steps only queries pybullet once.
+
+        Note:
+            The returned array is read-only and is updated in place
+            when the states are refreshed. Copy it if you need
+            to keep the values.
+
+        Returns:
+            np.ndarray: joint positions (row 0), velocities (row 1)
+            and applied torques (row 2) (shape: :math:`[3, DOF]`).
+        """
+        return self._get_cached_jstates()
+
     def get_ee_pose(self):
         """
         Return the end effector pose.
 
         Returns:
-            4-element tuple containing
+            Pose: EE pose, which unpacks like a 4-element tuple containing
 
             - np.ndarray: x, y, z position of the EE (shape: :math:`[3,]`).
             - np.ndarray: quaternion representation of the
@@ -470,14 +545,12 @@ class SingleArmPybullet(ARM):
             - np.ndarray: euler angle representation of the
               EE orientation (roll, pitch, yaw with
               static reference frame) (shape: :math:`[3,]`).
+
+            The rotation matrix and the euler angles are only
+            computed when they are accessed.
         """
         info = self._pb.getLinkState(self.robot_id, self.ee_link_id)
-        pos = info[4]
-        quat = info[5]
-
-        rot_mat = arutil.quat2rot(quat)
-        euler = arutil.quat2euler(quat, axes='xyz')  # [roll, pitch, yaw]
-        return np.array(pos), np.array(quat), rot_mat, euler
+        return arutil.Pose(info[4], info[5])
 
     def get_ee_vel(self):
         """
@@ -589,6 +662,38 @@ class SingleArmPybullet(ARM):
                                  targetValue=jpos,
                                  targetVelocity=jvel)
 
+    def _fast_reset(self):
+        """
+        Restore the snapshot taken at the end of the last full reset,
+        and bring the motors and the end effector tool
+        back to their reset state.
+        """
+        if hasattr(self, 'eetool'):
+            self.eetool.deactivate()
+        self._pb.restore_state(self._reset_state_id)
+        # motor commands are not part of the snapshot
+        self._in_torque_mode = [False] * self.arm_dof
+        self.set_jvel([0.] * self.arm_dof)
+        if hasattr(self, 'eetool'):
+            self.eetool.activate()
+            self.eetool.set_pos(self.eetool.gripper_open_angle, wait=False)
+
+    def _get_cached_jstates(self):
+        """
+        Refresh the joint state cache if the state version of the
+        pybullet client (or the robot) has changed.
+        """
+        version = self._pb.get_state_version()
+        key = (version, self.robot_id)
+        if version is None or key != self._jstates_key:
+            states = self._pb.getJointStates(self.robot_id,
+                                             self.arm_jnt_ids)
+            # state[3] is appliedJointMotorTorque
+            self._jstates[:] = list(zip(*[(state[0], state[1], state[3])
+                                          for state in states]))
+            self._jstates_key = key
+        return self._jstates_view
+
     def _is_in_torque_mode(self, joint_name=None):
         if joint_name is None:
             return all(self._in_torque_mode)
@@ -611,6 +716,8 @@ class SingleArmPybullet(ARM):
         self.arm_jnt_names = self.cfgs.ARM.JOINT_NAMES
 
         self.arm_dof = len(self.arm_jnt_names)
+        self._arm_jnt_idx = dict((jnt, i) for i, jnt in
+                                 enumerate(self.arm_jnt_names))
         self.ee_link_jnt = self.cfgs.ARM.ROBOT_EE_FRAME_JOINT
 
     def _build_jnt_id(self):
@@ -178,7 +178,7 @@ class SingleArmReal(ARM):
         using ROS subscriber to the tf tree topic.
 
         Returns:
-            4-element tuple containing
+            Pose: EE pose, which unpacks like a 4-element tuple containing
 
             - np.ndarray: x, y, z position of the EE (shape: :math:`[3]`).
             - np.ndarray: quaternion representation ([x, y, z, w]) of the EE
@@ -319,7 +319,7 @@ class SingleArmReal(ARM):
         if ori is not None:
             ee_quat = arutil.to_quat(ori)
         else:
-            ee_pos, ee_quat, ee_rot_mat, ee_euler = self.get_ee_pose()
+            ee_quat = self.get_ee_pose().quat
         ori_x = ee_quat[0]
         ori_y = ee_quat[1]
         ori_z = ee_quat[2]
@@ -19,6 +19,9 @@ from sensor_msgs.msg import JointState
 
 import airobot.utils.common as arutil
 from airobot.arm.single_arm_real import SingleArmReal
+from airobot.utils.buffer_util import TimeSeriesBuffer
+from airobot.utils.clock import EventClock
+from airobot.utils.clock import monotonic
 from airobot.utils.moveit_util import MoveitScene
 from airobot.utils.moveit_util import moveit_cartesian_path
 from airobot.utils.ros_util import get_tf_transform
@@ -140,13 +143,11 @@ class SingleArmROS(SingleArmReal):
         if ori is None and pos is None:
             return True
         if ori is None:
-            pose = self.get_ee_pose()  # last index is euler angles
-            quat = pose[1]
+            quat = self.get_ee_pose().quat
         else:
             quat = arutil.to_quat(ori)
         if pos is None:
-            pose = self.get_ee_pose()
-            pos = pose[0]
+            pos = self.get_ee_pose().pos
 
         pose = self.moveit_group.get_current_pose()
         pose.pose.position.x = pos[0]
@@ -177,10 +178,10 @@ class SingleArmROS(SingleArmReal):
         Returns:
             bool: True if robot successfully reached the goal pose.
         """
-        ee_pos, ee_quat, ee_rot_mat, ee_euler = self.get_ee_pose()
+        ee_pose = self.get_ee_pose()
 
-        plan = moveit_cartesian_path(ee_pos,
-                                     ee_quat,
+        plan = moveit_cartesian_path(ee_pose.pos,
+                                     ee_pose.quat,
                                      delta_xyz,
                                      self.moveit_group,
                                      eef_step)
@@ -251,13 +252,102 @@ class SingleArmROS(SingleArmReal):
         self._j_state_lock.release()
         return jvel
 
+    def add_joint_state_callback(self, callback):
+        """
+        Subscribe to the joint state stream. The callback is called
+        in the ROS subscriber thread every time a new joint state
+        message arrives, so it should return quickly.
+
+        Args:
+            callback (callable): function that takes two arguments,
+                the joint positions and the joint velocities (lists,
+                shape: :math:`[DOF]`).
+        """
+        with self._j_state_lock:
+            self._j_state_callbacks.append(callback)
+
+    def remove_joint_state_callback(self, callback):
+        """
+        Unsubscribe a callback added by `add_joint_state_callback`.
+
+        Args:
+            callback (callable): the callback to remove.
+        """
+        with self._j_state_lock:
+            if callback in self._j_state_callbacks:
+                self._j_state_callbacks.remove(callback)
+
+    def wait_for_joint_state(self, predicate, timeout=None):
+        """
+        Block until the joint state satisfies the predicate. The
+        predicate is checked on the current joint state and then
+        only when a new joint state message arrives.
+
+        Args:
+            predicate (callable): function that takes the joint
+                positions and the joint velocities (lists,
+                shape: :math:`[DOF]`) and returns a bool.
+            timeout (float): maximum waiting time (wall-clock
+                seconds). If None, wait forever.
+
+        Returns:
+            bool: True if the predicate is satisfied, False on timeout.
+        """
+        start_time = monotonic()
+        remaining = timeout
+        while True:
+            seq = self._clock.get_seq()
+            state = self._get_jstate_lists()
+            if state is not None and predicate(*state):
+                return True
+            if timeout is not None:
+                remaining = timeout - (monotonic() - start_time)
+                if remaining <= 0:
+                    return False
+            if not self._clock.wait_for_update(seq, timeout=remaining):
+                return False
+
+    def get_jstate_at(self, t):
+        """
+        Return the joint positions and velocities at the given
+        ROS time(s), linearly interpolated between the joint state
+        messages in the history (e.g. the arm configuration at the
+        capture time of a camera frame, to be passed to
+        `compute_fk_position`).
+
+        Args:
+            t (float or np.ndarray): ROS time(s) (seconds), within
+                the range of the history (see `get_jstate_range`).
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: joint positions (shape: :math:`[DOF]`,
+              or :math:`[N, DOF]` for N times).
+            - np.ndarray: joint velocities (shape: :math:`[DOF]`,
+              or :math:`[N, DOF]` for N times).
+        """
+        jstate = self._j_history.query(t)
+        return jstate[..., 0, :], jstate[..., 1, :]
+
+    def get_jstate_range(self):
+        """
+        Return the time range of the joint state history.
+
+        Returns:
+            2-element tuple containing the ROS times (float) of the
+            oldest and the newest joint states in the history.
+            None if no joint state has been received.
+        """
+        return self._j_history.get_range()
+
     def get_ee_pose(self):
         """
         Get current cartesian pose of the EE, in the robot's base frame,
         using ROS subscriber to the tf tree topic.
 
         Returns:
-            4-element tuple containing
+            Pose: EE pose, which unpacks like a 4-element tuple containing
 
             - np.ndarray: x, y, z position of the EE (shape: :math:`[3]`).
             - np.ndarray: quaternion representation ([x, y, z, w]) of the EE
@@ -267,13 +357,14 @@ class SingleArmROS(SingleArmReal):
             - np.ndarray: euler angle representation of the EE orientation
               (roll, pitch, yaw with static reference frame)
               (shape: :math:`[3]`).
+
+            The rotation matrix and the euler angles are only
+            computed when they are accessed.
         """
         pos, quat = get_tf_transform(self.tf_listener,
                                      self.cfgs.ARM.ROBOT_BASE_FRAME,
                                      self.cfgs.ARM.ROBOT_EE_FRAME)
-        rot_mat = arutil.quat2rot(quat)
-        euler_ori = arutil.quat2euler(quat)
-        return np.array(pos), np.array(quat), rot_mat, euler_ori
+        return arutil.Pose(pos, quat)
 
     def get_ee_vel(self):
         """
@@ -339,6 +430,13 @@ class SingleArmROS(SingleArmReal):
         self._j_vel = dict()
         self._j_torq = dict()
         self._j_state_lock = threading.RLock()
+        self._j_state_callbacks = []
+        # ROS time, notified on every joint state message
+        self._clock = EventClock(rospy.get_time)
+        # positions and velocities of the arm joints
+        self._j_history = TimeSeriesBuffer(
+            self.cfgs.ARM.JOINT_STATE_HISTORY_LEN,
+            value_shape=(2, len(self.arm_jnt_names)))
         self.tf_listener = tf.TransformListener()
         rospy.Subscriber(self.cfgs.ARM.ROSTOPIC_JOINT_STATES, JointState,
                          self._callback_joint_states)
@@ -359,4 +457,29 @@ class SingleArmROS(SingleArmReal):
                     self._j_vel[name] = msg.velocity[idx]
                 if idx < len(msg.effort):
                     self._j_torq[name] = msg.effort[idx]
+        callbacks = list(self._j_state_callbacks)
         self._j_state_lock.release()
+        state = self._get_jstate_lists()
+        if state is not None:
+            stamp = msg.header.stamp.to_sec()
+            if stamp == 0:
+                # the publisher did not fill in the stamp
+                stamp = rospy.get_time()
+            self._j_history.append(stamp, state)
+        self._clock.notify()
+        if state is not None:
+            for callback in callbacks:
+                callback(*state)
+
+    def _get_jstate_lists(self):
+        """
+        Return the joint positions and velocities of the arm joints,
+        or None if the states of some joints have not been received.
+        """
+        with self._j_state_lock:
+            try:
+                jpos = [self._j_pos[jnt] for jnt in self.arm_jnt_names]
+                jvel = [self._j_vel[jnt] for jnt in self.arm_jnt_names]
+            except KeyError:
+                return None
+        return jpos, jvel
@@ -6,8 +6,12 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import numpy as np
+
+import airobot as ar
 import airobot.utils.common as arutil
 from airobot.arm.single_arm_pybullet import SingleArmPybullet
+from airobot.utils.ur_ik import URAnalyticalIK
 
 
 class UR5ePybullet(SingleArmPybullet):
@@ -23,6 +27,9 @@ class UR5ePybullet(SingleArmPybullet):
                                not whiling loading URDF
         eetool_cfg (dict): arguments to pass in the constructor
             of the end effector tool class
+        use_analytical_ik (bool): use the closed-form inverse
+            kinematics in `compute_ik`. If None,
+            `cfgs.ARM.USE_ANALYTICAL_IK` is used.
 
     Attributes:
         floor_id (int): pybullet body unique id of the floor
@@ -31,6 +38,8 @@ class UR5ePybullet(SingleArmPybullet):
             shape: :math:`[3,]` ([x, y, z])
         robot_base_ori (list): world frame orientation of the robot base link
             shape: :math:`[4,]` ([x, y, z, w])
+        analytical_ik (URAnalyticalIK): closed-form inverse kinematics
+            of the arm, None if it's not used.
     """
 
     def __init__(self,
@@ -38,18 +47,44 @@ class UR5ePybullet(SingleArmPybullet):
                  pb_client,
                  seed=None,
                  self_collision=False,
-                 eetool_cfg=None):
+                 eetool_cfg=None,
+                 use_analytical_ik=None):
         super(UR5ePybullet, self).__init__(cfgs=cfgs,
                                            pb_client=pb_client,
                                            seed=seed,
                                            self_collision=self_collision,
                                            eetool_cfg=eetool_cfg)
+        if use_analytical_ik is None:
+            use_analytical_ik = self.cfgs.ARM.USE_ANALYTICAL_IK
+        self.analytical_ik = None
+        if use_analytical_ik:
+            try:
+                self.analytical_ik = URAnalyticalIK.from_urdf(
+                    self.cfgs.PYBULLET_URDF,
+                    self.cfgs.ARM.ROBOT_BASE_FRAME,
+                    self.cfgs.ARM.ROBOT_EE_FRAME,
+                    self.arm_jnt_names)
+            except (IOError, ValueError, KeyError) as e:
+                ar.log_warn('Analytical IK is not available, '
+                            'using the numerical IK: %s' % str(e))
         self.reset()
 
-    def reset(self):
+    def reset(self, fast=False):
         """
         Reset the simulation environment.
+
+        Args:
+            fast (bool): if True, restore the in-memory snapshot taken
+                at the end of the first full reset instead of resetting
+                the simulation and reloading the floor and the robot URDF.
+                Bodies loaded after the snapshot are removed. It falls
+                back to a full reset if no snapshot has been taken yet or
+                the snapshot has been invalidated (e.g. by removing a body
+                or resetting the simulation).
         """
+        if fast and self._pb.has_state(self._reset_state_id):
+            self._fast_reset()
+            return
         if hasattr(self, 'eetool'):
             self.eetool.deactivate()
         self._pb.resetSimulation()
@@ -82,6 +117,106 @@ class UR5ePybullet(SingleArmPybullet):
                 # weird behavior occurs on the gripper
                 # when self-collision is enforced
                 self.eetool.disable_gripper_self_collision()
+        if self.analytical_ik is not None:
+            self._set_ik_base_pose()
+        # resetSimulation has already invalidated the previous snapshot
+        self._reset_state_id = self._pb.save_state()
+
+    def compute_ik(self, pos, ori=None, ns=False, qinit=None,
+                   *args, **kwargs):
+        """
+        Compute the inverse kinematics solution given the
+        position and orientation of the end effector.
+
+        With the analytical IK (see `compute_ik_all`), it returns the
+        solution branch that is closest to `qinit`. The numerical IK of
+        pybullet is used if `ori` is None, `ns` is True, or the pose is
+        out of reach.
+
+        Args:
+            pos (list or np.ndarray): position (shape: :math:`[3,]`).
+            ori (list or np.ndarray): orientation. It can be euler angles
+                ([roll, pitch, yaw], shape: :math:`[3,]`), or
+                quaternion ([qx, qy, qz, qw], shape: :math:`[4,]`),
+                or rotation matrix (shape: :math:`[3, 3]`).
+            ns (bool): whether to use the nullspace options in pybullet,
+                True if nullspace should be used. Defaults to False.
+            qinit (list or np.ndarray): joint positions the solution
+                should be close to (shape: :math:`[DOF]`).
+                Defaults to the current joint positions.
+
+        Returns:
+            list: solution to inverse kinematics, joint angles which achieve
+            the specified EE pose (shape: :math:`[DOF]`).
+        """
+        if self.analytical_ik is not None and ori is not None and not ns:
+            if qinit is None:
+                qinit = self.get_jpos()
+            jpos, found = self.analytical_ik.ik(self._to_ik_pose(pos, ori),
+                                                qinit)
+            if found:
+                return jpos.tolist()
+        return super(UR5ePybullet, self).compute_ik(pos, ori, ns,
+                                                    *args, **kwargs)
+
+    def compute_ik_all(self, pos, ori):
+        """
+        Compute all the closed-form inverse kinematics solutions
+        (8 branches: shoulder left/right, wrist up/down, elbow up/down)
+        of one or a batch of end effector poses.
+
+        Args:
+            pos (list or np.ndarray): positions (shape: :math:`[3,]`
+                or :math:`[N, 3]`).
+            ori (list or np.ndarray): orientations. For a single pose,
+                it can be euler angles, quaternion or rotation matrix
+                (see `compute_ik`). For a batch, quaternions
+                (shape: :math:`[N, 4]`).
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: joint angles in [-pi, pi) of each branch, NaN
+              if the pose is out of reach for the branch
+              (shape: :math:`[8, DOF]` or :math:`[N, 8, DOF]`).
+            - np.ndarray: whether each branch is valid
+              (shape: :math:`[8,]` or :math:`[N, 8]`).
+        """
+        if self.analytical_ik is None:
+            raise ValueError('Analytical IK is not available.')
+        return self.analytical_ik.ik_all(self._to_ik_pose(pos, ori))
+
+    def _set_ik_base_pose(self):
+        """
+        Compute the world frame pose of the arm base frame
+        (`cfgs.ARM.ROBOT_BASE_FRAME`) used by the analytical IK.
+        """
+        info = self._pb.getLinkState(self.robot_id, self.ee_link_id,
+                                     computeForwardKinematics=1)
+        ee_tf = np.eye(4)
+        ee_tf[:3, :3] = arutil.quat2rot(info[5])
+        ee_tf[:3, 3] = info[4]
+        base_tf = ee_tf.dot(np.linalg.inv(
+            self.analytical_ik.fk(self.get_jpos())))
+        self._ik_base_pos = base_tf[:3, 3]
+        self._ik_base_rot = base_tf[:3, :3]
+        self._ik_base_quat_inv = arutil.quat_inverse(
+            arutil.rot2quat(base_tf[:3, :3]))
+
+    def _to_ik_pose(self, pos, ori):
+        """
+        Convert world frame poses of the end effector to the
+        [x, y, z, qx, qy, qz, qw] poses in the arm base frame.
+        """
+        pos = np.asarray(pos, dtype=np.float64)
+        if pos.ndim == 1:
+            quat = arutil.to_quat(ori)
+        else:
+            quat = np.asarray(ori, dtype=np.float64)
+        # R^T * (pos - t)
+        pos = (pos - self._ik_base_pos).dot(self._ik_base_rot)
+        quat = arutil.quat_multiply(self._ik_base_quat_inv, quat)
+        return np.concatenate([pos, quat], axis=-1)
 
     def set_visual_shape(self):
         """
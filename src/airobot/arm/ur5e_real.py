@@ -22,6 +22,7 @@ from airobot.utils.arm_util import wait_to_reach_ee_goal
 from airobot.utils.arm_util import wait_to_reach_jnt_goal
 from airobot.utils.moveit_util import moveit_cartesian_path
 from airobot.utils.ros_util import kdl_frame_to_numpy
+from airobot.utils.ur_ik import URAnalyticalIK
 
 
 class UR5eReal(SingleArmROS):
@@ -37,6 +38,9 @@ class UR5eReal(SingleArmROS):
             mounted. If so, a box will be placed around the camera
             so that moveit is aware of the wrist camera when it's
             doing motion planning.
+        use_analytical_ik (bool): use the closed-form inverse
+            kinematics in `compute_ik`. If None,
+            `cfgs.ARM.USE_ANALYTICAL_IK` is used.
 
     Attributes:
         gripper_tip_pos (list): Position of the end effector link frame
@@ -44,17 +48,22 @@ class UR5eReal(SingleArmROS):
         gripper_tip_ori (list): Orientation of the end effector link frame
             w.r.t. to its parent link frame,
             shape: :math:`[4,]` ([x, y, z, w]).
+        analytical_ik (URAnalyticalIK): closed-form inverse kinematics
+            of the arm, None if it's not used.
     """
 
     def __init__(self, cfgs,
                  moveit_planner='RRTstarkConfigDefault',
                  eetool_cfg=None,
-                 wrist_cam=True):
+                 wrist_cam=True,
+                 use_analytical_ik=None):
         super(UR5eReal, self).__init__(cfgs=cfgs,
                                        moveit_planner=moveit_planner,
                                        eetool_cfg=eetool_cfg)
         self._has_wrist_cam = wrist_cam
-        self._init_ur_consts()
+        if use_analytical_ik is None:
+            use_analytical_ik = self.cfgs.ARM.USE_ANALYTICAL_IK
+        self._init_ur_consts(use_analytical_ik)
 
         if not self._gazebo_sim:
             self.robot_ip = rospy.get_param('robot_ip')
@@ -156,7 +165,8 @@ class UR5eReal(SingleArmROS):
                     joint_name=joint_name,
                     get_func_derv=self.get_jvel,
                     timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                    max_error=self.cfgs.ARM.MAX_JOINT_ERROR
+                    max_error=self.cfgs.ARM.MAX_JOINT_ERROR,
+                    clock=self._clock
                 )
         else:
             self.moveit_group.set_joint_value_target(tgt_pos)
@@ -230,7 +240,8 @@ class UR5eReal(SingleArmROS):
                 get_func=self.get_jvel,
                 joint_name=joint_name,
                 timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR
+                max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR,
+                clock=self._clock
             )
 
         return success
@@ -263,13 +274,11 @@ class UR5eReal(SingleArmROS):
             return True
         success = False
         if ori is None:
-            pose = self.get_ee_pose()  # last index is euler angles
-            quat = pose[1]
+            quat = self.get_ee_pose().quat
         else:
             quat = arutil.to_quat(ori)
         if pos is None:
-            pose = self.get_ee_pose()
-            pos = pose[0]
+            pos = self.get_ee_pose().pos
 
         if self._use_urscript:
             if ik_first:
@@ -300,7 +309,8 @@ class UR5eReal(SingleArmROS):
                         'get_func_derv': self.get_ee_vel,
                         'timeout': self.cfgs.ARM.TIMEOUT_LIMIT,
                         'pos_tol': self.cfgs.ARM.MAX_EE_POS_ERROR,
-                        'ori_tol': self.cfgs.ARM.MAX_EE_ORI_ERROR
+                        'ori_tol': self.cfgs.ARM.MAX_EE_ORI_ERROR,
+                        'clock': self._clock
                     }
                     success = wait_to_reach_ee_goal(pos, quat,
                                                     **args_dict)
@@ -334,30 +344,117 @@ class UR5eReal(SingleArmROS):
         Returns:
             bool: True if robot successfully reached the goal pose.
         """
-        ee_pos, ee_quat, ee_rot_mat, ee_euler = self.get_ee_pose()
+        ee_pose = self.get_ee_pose()
+        ee_pos = ee_pose.pos
 
         if self._use_urscript:
             ee_pos[0] += delta_xyz[0]
             ee_pos[1] += delta_xyz[1]
             ee_pos[2] += delta_xyz[2]
-            success = self.set_ee_pose(ee_pos, ee_euler, wait=wait,
+            success = self.set_ee_pose(ee_pos, ee_pose.quat, wait=wait,
                                        ik_first=False)
         else:
             plan = moveit_cartesian_path(ee_pos,
-                                         ee_quat,
+                                         ee_pose.quat,
                                          delta_xyz,
                                          self.moveit_group,
                                          eef_step)
             success = self.moveit_group.execute(plan, wait=wait)
         return success
 
-    def _init_ur_consts(self):
+    def compute_ik(self, pos, ori=None, qinit=None, *args, **kwargs):
+        """
+        Compute the inverse kinematics solution given the
+        position and orientation of the end effector
+        (self.cfgs.ARM.ROBOT_EE_FRAME).
+
+        With the analytical IK (see `compute_ik_all`), it returns the
+        solution branch that is closest to `qinit`. The numerical IK is
+        used if the pose is out of reach.
+
+        Args:
+            pos (list or np.ndarray): position (shape: :math:`[3,]`).
+            ori (list or np.ndarray): orientation. It can be euler angles
+                ([roll, pitch, yaw], shape: :math:`[4,]`),
+                or quaternion ([qx, qy, qz, qw], shape: :math:`[4,]`),
+                or rotation matrix (shape: :math:`[3, 3]`). If it's None,
+                the solver will use the current end effector
+                orientation as the target orientation.
+            qinit (list or np.ndarray): joint positions the solution
+                should be close to, and initial joint positions for
+                numerical IK (shape: :math:`[6,]`). Defaults to the
+                current joint positions.
+
+        Returns:
+            list: inverse kinematics solution (joint angles)
+        """
+        if self.analytical_ik is not None:
+            if ori is None:
+                ori = self.get_ee_pose().quat
+            if qinit is None:
+                qinit = self.get_jpos()
+            pose = np.concatenate([pos, arutil.to_quat(ori)])
+            jnt_poss, found = self.analytical_ik.ik(pose, qinit)
+            if found:
+                return jnt_poss.tolist()
+        return super(UR5eReal, self).compute_ik(pos, ori, qinit,
+                                                *args, **kwargs)
+
+    def compute_ik_all(self, pos, ori):
+        """
+        Compute all the closed-form inverse kinematics solutions
+        (8 branches: shoulder left/right, wrist up/down, elbow up/down)
+        of one or a batch of end effector poses, in the robot's
+        base frame.
+
+        Args:
+            pos (list or np.ndarray): positions (shape: :math:`[3,]`
+                or :math:`[N, 3]`).
+            ori (list or np.ndarray): orientations. For a single pose,
+                it can be euler angles, quaternion or rotation matrix
+                (see `compute_ik`). For a batch, quaternions
+                (shape: :math:`[N, 4]`).
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: joint angles in [-pi, pi) of each branch, NaN
+              if the pose is out of reach for the branch
+              (shape: :math:`[8, 6]` or :math:`[N, 8, 6]`).
+            - np.ndarray: whether each branch is valid
+              (shape: :math:`[8,]` or :math:`[N, 8]`).
+        """
+        if self.analytical_ik is None:
+            raise ValueError('Analytical IK is not available.')
+        pos = np.asarray(pos, dtype=np.float64)
+        if pos.ndim == 1:
+            ori = arutil.to_quat(ori)
+        return self.analytical_ik.ik_all(np.concatenate([pos, ori], axis=-1))
+
+    def _init_ur_consts(self, use_analytical_ik):
         """
         Initialize constants.
+
+        Args:
+            use_analytical_ik (bool): set up the closed-form
+                inverse kinematics.
         """
 
         self.gripper_tip_pos, self.gripper_tip_ori = self._get_tip_transform()
 
+        self.analytical_ik = None
+        if use_analytical_ik:
+            urdf_string = rospy.get_param(self.cfgs.ROBOT_DESCRIPTION)
+            try:
+                self.analytical_ik = URAnalyticalIK.from_urdf(
+                    urdf_string,
+                    self.cfgs.ARM.ROBOT_BASE_FRAME,
+                    self.cfgs.ARM.ROBOT_EE_FRAME,
+                    self.arm_jnt_names)
+            except (ValueError, KeyError) as e:
+                ar.log_warn('Analytical IK is not available, '
+                            'using the numerical IK: %s' % str(e))
+
         self.scale_motion(vel_scale=0.2, acc_scale=0.2)
 
         # add a virtual base support frame of the real robot:
@@ -119,7 +119,8 @@ class CompliantYumiArm(SingleArmPybullet):
                 joint_name=joint_name,
                 get_func_derv=self.get_jvel,
                 timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                max_error=self.cfgs.ARM.MAX_JOINT_ERROR
+                max_error=self.cfgs.ARM.MAX_JOINT_ERROR,
+                clock=self._pb.get_clock()
             )
         return success
 
@@ -177,7 +178,8 @@ class CompliantYumiArm(SingleArmPybullet):
                     get_func=self.get_jvel,
                     joint_name=joint_name,
                     timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                    max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR
+                    max_error=self.cfgs.ARM.MAX_JOINT_VEL_ERROR,
+                    clock=self._pb.get_clock()
                 )
             else:
                 success = True
@@ -197,6 +199,8 @@ class CompliantYumiArm(SingleArmPybullet):
             in step_simulation mode instead of realtime_simulation mode.
             If you are using realtime_simulation mode, the time interval
             between two set_jtorq() calls must be small enough (like 0.0002s).
+            A pre-step hook (`pb_client.add_step_hook`) can send the
+            torques right before every simulation step.
 
         Args:
             torque (float or list): torque value(s) for the joint(s).
@@ -308,10 +312,22 @@ class YumiPalmsPybullet(DualArmPybullet):
                                          eetool_cfg=eetool_cfg)
         self.reset()
 
-    def reset(self):
+    def reset(self, fast=False):
         """
         Reset the simulation environment.
+
+        Args:
+            fast (bool): if True, restore the in-memory snapshot taken
+                at the end of the first full reset instead of resetting
+                the simulation and reloading the robot URDF.
+                Bodies loaded after the snapshot are removed. It falls
+                back to a full reset if no snapshot has been taken yet or
+                the snapshot has been invalidated (e.g. by removing a body
+                or resetting the simulation).
         """
+        if fast and self._pb.has_state(self._reset_state_id):
+            self._fast_reset()
+            return
         self._pb.resetSimulation()
 
         yumi_pos = self.cfgs.ARM.PYBULLET_RESET_POS
@@ -330,6 +346,8 @@ class YumiPalmsPybullet(DualArmPybullet):
 
         self.setup_single_arms(right_arm=self.right_arm,
                                left_arm=self.left_arm)
+        # resetSimulation has already invalidated the previous snapshot
+        self._reset_state_id = self._pb.save_state()
 
     def setup_single_arms(self, right_arm, left_arm):
         """
@@ -54,10 +54,22 @@ class YumiPybullet(DualArmPybullet):
                                           eetool_cfg=eetool_cfg)
         self.reset()
 
-    def reset(self):
+    def reset(self, fast=False):
         """
         Reset the simulation environment.
+
+        Args:
+            fast (bool): if True, restore the in-memory snapshot taken
+                at the end of the first full reset instead of resetting
+                the simulation and reloading the robot URDF.
+                Bodies loaded after the snapshot are removed. It falls
+                back to a full reset if no snapshot has been taken yet or
+                the snapshot has been invalidated (e.g. by removing a body
+                or resetting the simulation).
         """
+        if fast and self._pb.has_state(self._reset_state_id):
+            self._fast_reset()
+            return
         self._pb.resetSimulation()
 
         yumi_pos = self.cfgs.ARM.PYBULLET_RESET_POS
@@ -83,3 +95,5 @@ class YumiPybullet(DualArmPybullet):
                 arm.eetool.activate()
                 if arm._self_collision:
                     arm.eetool.disable_gripper_self_collision()
+        # resetSimulation has already invalidated the previous snapshot
+        self._reset_state_id = self._pb.save_state()
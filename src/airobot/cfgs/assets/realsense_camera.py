@@ -13,6 +13,9 @@ _C.DEPTH_MIN = 0.2
 _C.DEPTH_MAX = 2
 # scale factor to map depth image values to real depth values (m)
 _C.DEPTH_SCALE = 0.001
+# number of frames (raw image messages) kept in the
+# time-indexed history
+_C.FRAME_HISTORY_LEN = 30
 
 
 def get_realsense_cam_cfg():
@@ -10,6 +10,8 @@ _C = CN()
 _C.CLASS = 'UR5e'
 _C.MOVEGROUP_NAME = 'manipulator'
 _C.ROSTOPIC_JOINT_STATES = '/joint_states'
+# number of joint states kept in the time-indexed history
+_C.JOINT_STATE_HISTORY_LEN = 1000
 
 # https://www.universal-robots.com/how-tos-and-faqs/faq/ur-faq/max-joint-torques-17260/
 _C.MAX_TORQUES = [150, 150, 150, 28, 28, 28]
@@ -28,6 +30,12 @@ _C.URSCRIPT_TOPIC = '/ur_driver/URScript'
 _C.IK_POSITION_TOLERANCE = 0.01
 # inverse kinematics orientation tolerance (rad)
 _C.IK_ORIENTATION_TOLERANCE = 0.05
+# use the closed-form inverse kinematics (airobot.utils.ur_ik),
+# whose DH parameters are read from the URDF, in compute_ik.
+# It returns the solution branch closest to qinit, which may differ
+# from the solution of the numerical solver. The numerical solver is
+# still used if the pose is out of reach
+_C.USE_ANALYTICAL_IK = False
 _C.HOME_POSITION = [0, -1.66, -1.92, -1.12, 1.57, 0]
 _C.MAX_JOINT_ERROR = 0.01
 _C.MAX_JOINT_VEL_ERROR = 0.05
@@ -4,6 +4,8 @@ _C = CN()
 _C.ROBOT_DESCRIPTION = '/robot_description'
 
 _C.ROSTOPIC_JOINT_STATES = '/joint_states'
+# number of joint states kept in the time-indexed history
+_C.JOINT_STATE_HISTORY_LEN = 1000
 
 # base frame for the arm
 _C.ROBOT_BASE_FRAME = 'yumi_body'
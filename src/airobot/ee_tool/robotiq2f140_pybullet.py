@@ -1,10 +1,10 @@
-import threading
-import time
-
 import airobot.utils.common as arutil
 from airobot.ee_tool.ee import EndEffectorTool
 from airobot.utils.arm_util import wait_to_reach_jnt_goal
 
+# maximum force of the gear constraints between the gripper joints
+MIMIC_MAX_FORCE = 100
+
 
 class Robotiq2F140Pybullet(EndEffectorTool):
     """
@@ -40,7 +40,9 @@ class Robotiq2F140Pybullet(EndEffectorTool):
         self._max_torque = 5.0
         self.gripper_close_angle = self.cfgs.EETOOL.CLOSE_ANGLE
         self.gripper_open_angle = self.cfgs.EETOOL.OPEN_ANGLE
-        self._mthread_started = False
+        # ids of the gear constraints that couple
+        # the rest joints to the first joint
+        self._mimic_constraints = []
         self.deactivate()
 
     def feed_robot_info(self, robot_id, jnt_to_id):
@@ -68,18 +70,7 @@ class Robotiq2F140Pybullet(EndEffectorTool):
                                 lateralFriction=2.0,
                                 spinningFriction=1.0,
                                 rollingFriction=1.0)
-        # if the gripper has been activated once,
-        # the following code is used to prevent starting
-        # a new thread after the arm reset if a thread has been started
-
-        if not self._mthread_started:
-            self._mthread_started = True
-            # gripper thread
-            self._th_gripper = threading.Thread(target=self._th_mimic_gripper)
-            self._th_gripper.daemon = True
-            self._th_gripper.start()
-        else:
-            return
+        self._setup_mimic_constraints()
 
     def open(self, wait=True):
         """
@@ -130,8 +121,6 @@ class Robotiq2F140Pybullet(EndEffectorTool):
                                        self._pb.POSITION_CONTROL,
                                        targetPosition=tgt_pos,
                                        force=self._max_torque)
-        if not self._pb.in_realtime_mode():
-            self._set_rest_joints(tgt_pos)
 
         success = False
         if self._pb.in_realtime_mode() and wait:
@@ -141,7 +130,8 @@ class Robotiq2F140Pybullet(EndEffectorTool):
                 joint_name=joint_name,
                 get_func_derv=self.get_vel,
                 timeout=self.cfgs.ARM.TIMEOUT_LIMIT,
-                max_error=self.cfgs.ARM.MAX_JOINT_ERROR
+                max_error=self.cfgs.ARM.MAX_JOINT_ERROR,
+                clock=self._pb.get_clock()
             )
         return success
 
@@ -187,39 +177,44 @@ class Robotiq2F140Pybullet(EndEffectorTool):
                                                 jnt_idx2,
                                                 enableCollision=0)
 
-    def _mimic_gripper(self, joint_val):
-        """
-        Given the value for the first joint,
-        mimic the joint values for the rest joints.
-        """
-        jnt_vals = [joint_val]
-        for i in range(1, len(self.jnt_names)):
-            jnt_vals.append(joint_val * self._gripper_mimic_coeff[i])
-        return jnt_vals
-
-    def _th_mimic_gripper(self):
-        """
-        Make all the other joints of the gripper
-        follow the motion of the first joint of the gripper.
-        """
-        while True:
-            if self._is_activated and self._pb.in_realtime_mode():
-                self._set_rest_joints()
-            time.sleep(0.005)
-
-    def _set_rest_joints(self, gripper_pos=None):
-        max_torq = self._max_torque
-        max_torques = [max_torq] * (len(self.jnt_names) - 1)
-        if gripper_pos is None:
-            gripper_pos = self.get_pos()
-        gripper_poss = self._mimic_gripper(gripper_pos)[1:]
-        gripper_vels = [0.0] * len(max_torques)
-        self._pb.setJointMotorControlArray(self.robot_id,
-                                           self.gripper_jnt_ids[1:],
-                                           self._pb.POSITION_CONTROL,
-                                           targetPositions=gripper_poss,
-                                           targetVelocities=gripper_vels,
-                                           forces=max_torques)
+    def _setup_mimic_constraints(self):
+        """
+        Make all the other joints of the gripper follow the motion
+        of the first joint of the gripper. Pybullet solves the gear
+        constraints (coeff * q_first - q_rest = 0) in every
+        simulation step, so no thread is needed to update
+        the rest joints.
+        """
+        # constraints from a previous call are removed by
+        # resetSimulation, but they still exist if the robot
+        # was not reloaded
+        existing = set(self._pb.getConstraintUniqueId(i)
+                       for i in range(self._pb.getNumConstraints()))
+        for cid in self._mimic_constraints:
+            if cid in existing:
+                self._pb.removeConstraint(cid)
+        self._mimic_constraints = []
+        first_jnt_id = self.gripper_jnt_ids[0]
+        for jnt_id, coeff in zip(self.gripper_jnt_ids[1:],
+                                 self._gripper_mimic_coeff[1:]):
+            # turn off the default velocity motor of the joint
+            self._pb.setJointMotorControl2(self.robot_id,
+                                           jnt_id,
+                                           self._pb.VELOCITY_CONTROL,
+                                           targetVelocity=0,
+                                           force=0)
+            cid = self._pb.createConstraint(
+                self.robot_id, first_jnt_id,
+                self.robot_id, jnt_id,
+                jointType=self._pb.JOINT_GEAR,
+                jointAxis=[1, 0, 0],
+                parentFramePosition=[0, 0, 0],
+                childFramePosition=[0, 0, 0])
+            self._pb.changeConstraint(cid,
+                                      gearRatio=-coeff,
+                                      maxForce=MIMIC_MAX_FORCE,
+                                      erp=1)
+            self._mimic_constraints.append(cid)
 
     def deactivate(self):
         """
@@ -0,0 +1,265 @@
+import cv2
+import numpy as np
+
+from airobot.sensor.camera.rgbdcam_pybullet import RGBDCameraPybullet
+from airobot.utils.render_util import RenderWorkerPool
+
+
+class CameraRig(object):
+    """
+    A set of cameras in Pybullet with the same configurations (image
+    size, field of view, clipping planes) that are rendered together.
+    The images of all the views are returned as stacked arrays.
+
+    Each view is a `RGBDCameraPybullet`, so the view and projection
+    matrices are computed once in `add_camera`, and the camera of
+    each view can still be used on its own (e.g. `get_pcd`,
+    `get_pix_3dpt`). The frames rendered by the rig are stored in
+    the frame cache of each camera, so these calls do not render
+    again until the scene changes.
+
+    With render workers, the rig also has a render-service mode:
+    `submit_render` sends the current scene to a worker without
+    waiting, and `get_rendered` returns the images later, tagged
+    with the simulation step that produced them.
+
+    Args:
+        cfgs (YACS CfgNode): configurations for the cameras.
+        pb_client (BulletClient): pybullet client.
+        num_workers (int): number of render worker processes. If 0,
+            the views are rendered one after another in this process.
+            Otherwise, the views are distributed among the workers,
+            which render copies of the scene in parallel
+            (see `airobot.utils.render_util.RenderWorkerPool`).
+            The workers copy the scene from the scene log of the client,
+            so the rig should be created before the scene is loaded,
+            unless the client is created with `scene_log=True`.
+        start_method (str): multiprocessing start method
+            of the render workers.
+
+    Attributes:
+        cameras (list): the camera (RGBDCameraPybullet) of each view.
+        img_height (int): height of the images.
+        img_width (int): width of the images.
+    """
+
+    def __init__(self, cfgs, pb_client, num_workers=0, start_method=None):
+        self.cfgs = cfgs
+        self._pb = pb_client
+        self.cameras = []
+        self.img_height = self.cfgs.CAM.SIM.HEIGHT
+        self.img_width = self.cfgs.CAM.SIM.WIDTH
+        self._pool = None
+        self._submit_count = 0
+        # {submit id: (frame id, get_seg)} of the pending frames
+        self._submitted = {}
+        if num_workers > 0:
+            self._pool = RenderWorkerPool(pb_client,
+                                          num_workers=num_workers,
+                                          start_method=start_method)
+
+    def add_camera(self, focus_pt=None, dist=3, yaw=0, pitch=0, roll=0):
+        """
+        Add a view to the rig. The arguments are the same as
+        `RGBDCameraPybullet.setup_camera`.
+
+        Args:
+            focus_pt (list): position of the target (focus) point,
+                in Cartesian world coordinates.
+            dist (float): distance from eye (camera) to the focus point.
+            yaw (float): yaw angle in degrees,
+                left/right around up-axis (z-axis).
+            pitch (float): pitch in degrees, up/down.
+            roll (float): roll in degrees around forward vector.
+
+        Returns:
+            int: index of the view.
+        """
+        cam = RGBDCameraPybullet(cfgs=self.cfgs, pb_client=self._pb)
+        cam.setup_camera(focus_pt=focus_pt, dist=dist,
+                         yaw=yaw, pitch=pitch, roll=roll,
+                         height=self.img_height,
+                         width=self.img_width)
+        self.cameras.append(cam)
+        return len(self.cameras) - 1
+
+    def get_images(self, get_rgb=True, get_depth=True,
+                   get_seg=False, use_cache=True, depth_dtype=np.float64,
+                   **kwargs):
+        """
+        Return the rgb, depth, and segmentation images of all the views.
+
+        Args:
+            get_rgb (bool): return rgb images if True, None otherwise.
+            get_depth (bool): return depth images if True, None otherwise.
+            get_seg (bool): return the segmentation masks if True,
+                None otherwise.
+            use_cache (bool): reuse the cached frame of a view if the
+                scene has not changed. If False, always render.
+            depth_dtype (np.dtype): data type of the depth images.
+                np.float32 is faster.
+            **kwargs: other arguments to pass to `getCameraImage`.
+
+        Returns:
+            2-element tuple (if `get_seg` is False) containing
+
+            - np.ndarray: rgb images (shape: :math:`[N, H, W, 3]`).
+            - np.ndarray: depth images (shape: :math:`[N, H, W]`).
+
+            3-element tuple (if `get_seg` is True) containing
+
+            - np.ndarray: rgb images (shape: :math:`[N, H, W, 3]`).
+            - np.ndarray: depth images (shape: :math:`[N, H, W]`).
+            - np.ndarray: segmentation masks (shape: :math:`[N, H, W]`).
+        """
+        if not self.cameras:
+            raise ValueError('Please call add_camera() first!')
+        for cam in self.cameras:
+            if cam.img_height != self.img_height or \
+                    cam.img_width != self.img_width:
+                raise ValueError('All the views should have the '
+                                 'same image size.')
+        frames = self._get_frames(get_seg, use_cache, kwargs)
+        return self._to_images([frame['rgba'] for frame in frames],
+                               [frame['depth'] for frame in frames],
+                               [frame['seg'] for frame in frames],
+                               get_rgb, get_depth, get_seg, depth_dtype)
+
+    def submit_render(self, get_seg=False, **kwargs):
+        """
+        Send the current scene to a render worker and return without
+        waiting for the images (render-service mode), so the physics
+        can keep stepping while the views are rendered. The images
+        are returned later by `get_rendered`. It needs render
+        workers (`num_workers` > 0).
+
+        If all the render workers are busy, the frame is dropped.
+        With one worker, at most one frame is rendered at a time;
+        more workers render several frames at the same time.
+
+        Args:
+            get_seg (bool): render the segmentation masks.
+            **kwargs: other arguments to pass to `getCameraImage`.
+
+        Returns:
+            int: frame id, which is the simulation step count of the
+            pybullet client (see `BulletClient.get_step_count`) when
+            the scene is sent. None if the frame is dropped.
+        """
+        if self._pool is None:
+            raise ValueError('The render-service mode needs render '
+                             'workers (num_workers > 0).')
+        if not self.cameras:
+            raise ValueError('Please call add_camera() first!')
+        cam_img_kwargs = [cam._cam_img_kwargs(get_seg, kwargs)
+                          for cam in self.cameras]
+        frame_id = self._pb.get_step_count()
+        self._submit_count += 1
+        if not self._pool.submit(cam_img_kwargs, self._submit_count):
+            return None
+        self._submitted[self._submit_count] = (frame_id, get_seg)
+        return frame_id
+
+    def get_rendered(self, timeout=0, get_rgb=True, get_depth=True,
+                     depth_dtype=np.float64):
+        """
+        Return the newest frame rendered from `submit_render` since
+        the last call. The older finished frames are discarded.
+
+        Args:
+            timeout (float): maximum time to wait for a frame if none
+                is ready (seconds). 0 returns immediately, None waits
+                until a frame is ready (if any frame is pending).
+            get_rgb (bool): return rgb images if True, None otherwise.
+            get_depth (bool): return depth images if True, None otherwise.
+            depth_dtype (np.dtype): data type of the depth images.
+
+        Returns:
+            2-element tuple containing
+
+            - int: frame id returned by `submit_render`.
+            - tuple: images of the frame, in the same
+              format as `get_images`.
+
+            None if no frame is ready.
+        """
+        if self._pool is None:
+            raise ValueError('The render-service mode needs render '
+                             'workers (num_workers > 0).')
+        frames = self._pool.collect(timeout=timeout)
+        if not frames:
+            return None
+        for frame in frames[:-1]:
+            self._submitted.pop(frame[0], None)
+        submit_id, rgba, depth, seg = frames[-1]
+        frame_id, get_seg = self._submitted.pop(submit_id)
+        images = self._to_images(rgba, depth, seg,
+                                 get_rgb, get_depth, get_seg, depth_dtype)
+        return frame_id, images
+
+    def close(self):
+        """
+        Shut down the render worker processes.
+        """
+        if self._pool is not None:
+            self._pool.close()
+
+    def _get_frames(self, get_seg, use_cache, kwargs):
+        """
+        Return the frames (raw buffers) of all the views, rendering
+        the views that are not in the frame caches of the cameras.
+        """
+        if self._pool is None:
+            return [cam._get_frame(get_seg, use_cache, kwargs)
+                    for cam in self.cameras]
+        frames = []
+        missing = []
+        for i, cam in enumerate(self.cameras):
+            key = cam._frame_key(kwargs)
+            frame = None
+            if use_cache:
+                frame = cam._get_cached_frame(key, get_seg)
+            frames.append(frame)
+            if frame is None:
+                missing.append((i, key))
+        if missing:
+            cam_img_kwargs = [self.cameras[i]._cam_img_kwargs(get_seg, kwargs)
+                              for i, _ in missing]
+            rgba, depth, seg = self._pool.render(cam_img_kwargs)
+            # the pool buffers are overwritten by the next render
+            for slot, (i, key) in enumerate(missing):
+                seg_slot = np.array(seg[slot]) if get_seg else None
+                frames[i] = self.cameras[i]._store_frame(key,
+                                                         np.array(rgba[slot]),
+                                                         np.array(depth[slot]),
+                                                         seg_slot)
+        return frames
+
+    def _to_images(self, rgba, depth_buf, seg_buf,
+                   get_rgb, get_depth, get_seg, depth_dtype):
+        """
+        Convert the raw buffers of the views (rgba, depth buffer and
+        segmentation mask of each view) into stacked images.
+        """
+        shape = (len(self.cameras), self.img_height, self.img_width)
+        rgb = None
+        depth = None
+        if get_rgb:
+            rgb = np.empty(shape + (3,), dtype=np.uint8)
+            for i in range(shape[0]):
+                cv2.cvtColor(rgba[i], cv2.COLOR_RGBA2RGB, dst=rgb[i])
+        if get_depth:
+            # the views have the same clipping planes
+            cam = self.cameras[0]
+            depth = np.empty(shape, dtype=depth_dtype)
+            for i in range(shape[0]):
+                np.multiply(depth_buf[i], cam._depth_den_scale,
+                            out=depth[i])
+            depth += cam._depth_den_offset
+            np.divide(cam._depth_num, depth, out=depth)
+        if get_seg:
+            seg = np.empty(shape, dtype=np.int32)
+            for i in range(shape[0]):
+                seg[i] = seg_buf[i]
+            return rgb, depth, seg
+        return rgb, depth
@@ -1,7 +1,17 @@
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 
 from airobot.sensor.camera.camera import Camera
 
+# reductions over the depth values in a kernel, the windows
+# at the image borders are padded with NaN
+_KTYPE_FUNCS = {
+    'min': np.nanmin,
+    'max': np.nanmax,
+    'median': np.nanmedian,
+    'mean': np.nanmean,
+}
+
 
 class RGBDCamera(Camera):
     """
@@ -36,12 +46,23 @@ class RGBDCamera(Camera):
         self.depth_scale = None
         self.depth_min = None
         self.depth_max = None
+        self._pcd_buffers = {}
+        self._depth_pad_bufs = {}
+        # intrinsic matrix and image size of the perspective matrices
+        self._pers_key = None
 
     def _init_pers_mat(self):
         """
         Initialize related matrices for projecting
-        pixels to points in camera frame.
+        pixels to points in camera frame. Nothing is recomputed if
+        the intrinsic matrix and the image size have not changed
+        (e.g. when only the camera pose is changed).
         """
+        pers_key = (np.asarray(self.cam_int_mat, dtype=np.float64).tobytes(),
+                    self.img_height, self.img_width)
+        if pers_key == self._pers_key:
+            return
+        self._pers_key = pers_key
         self.cam_int_mat_inv = np.linalg.inv(self.cam_int_mat)
 
         img_pixs = np.mgrid[0: self.img_height,
@@ -50,6 +71,46 @@ class RGBDCamera(Camera):
         self._uv_one = np.concatenate((img_pixs,
                                        np.ones((1, img_pixs.shape[1]))))
         self._uv_one_in_cam = np.dot(self.cam_int_mat_inv, self._uv_one)
+        # {dtype: rays in camera frame (shape: [H * W, 3])}
+        self._cam_rays = {}
+        # {dtype: (extrinsic matrix bytes, rays in world frame,
+        #          camera position in world frame)}
+        self._world_rays = {}
+
+    def _get_rays(self, in_world, dtype):
+        """
+        Return the rays (the 3D points at depth 1) of all the
+        pixels, in row-major order, and the position of the camera.
+        They are cached per dtype, and the ones in the world
+        frame are recomputed only when the extrinsic matrix changes.
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: rays (shape: :math:`[H * W, 3]`).
+            - np.ndarray: camera position (shape: :math:`[3,]`).
+        """
+        dtype = np.dtype(dtype)
+        cam_rays = self._cam_rays.get(dtype)
+        if cam_rays is None:
+            cam_rays = np.ascontiguousarray(self._uv_one_in_cam.T,
+                                            dtype=dtype)
+            self._cam_rays[dtype] = cam_rays
+        if not in_world:
+            return cam_rays, np.zeros(3, dtype=dtype)
+        if self.cam_ext_mat is None:
+            raise ValueError('Please call set_cam_ext() first to set up'
+                             ' the camera extrinsic matrix')
+        ext_key = np.asarray(self.cam_ext_mat, dtype=np.float64).tobytes()
+        cached = self._world_rays.get(dtype)
+        if cached is None or cached[0] != ext_key:
+            ext_mat = np.asarray(self.cam_ext_mat, dtype=np.float64)
+            rays = np.dot(self._uv_one_in_cam.T, ext_mat[:3, :3].T)
+            cached = (ext_key,
+                      np.ascontiguousarray(rays, dtype=dtype),
+                      ext_mat[:3, 3].astype(dtype))
+            self._world_rays[dtype] = cached
+        return cached[1], cached[2]
 
     def get_cam_ext(self):
         """
@@ -98,7 +159,8 @@ class RGBDCamera(Camera):
                method will be applied to use some statistical value
                (such as minimum, maximum, median, mean) of all the depth
                values in the slicing window as a more robust estimate of
-               the depth value of the specified pixels.
+               the depth value of the specified pixels. The windows at
+               the image borders only contain the pixels inside the image.
             ktype (str): what kind of statistical value of all the depth
                values in the sliced kernel
                to use as a proxy of the depth value at specified pixels.
@@ -118,75 +180,82 @@ class RGBDCamera(Camera):
         if not isinstance(cs, int) and not isinstance(cs, list) and \
                 not isinstance(cs, np.ndarray):
             raise TypeError('cs should be an int, a list or a numpy array')
-        if isinstance(rs, int):
-            rs = [rs]
-        if isinstance(cs, int):
-            cs = [cs]
-        if isinstance(rs, np.ndarray):
-            rs = rs.flatten()
-        if isinstance(cs, np.ndarray):
-            cs = cs.flatten()
+        rs = np.asarray(rs, dtype=int).reshape(-1)
+        cs = np.asarray(cs, dtype=int).reshape(-1)
         if not (isinstance(k, int) and (k % 2) == 1):
             raise TypeError('k should be a positive odd integer.')
+        if k > 1 and ktype not in _KTYPE_FUNCS:
+            raise TypeError('Unsupported ktype:[%s]' % ktype)
         _, depth_im = self.get_images(get_rgb=False, get_depth=True)
         if k == 1:
-            depth_im = depth_im[rs, cs]
+            depth = depth_im[rs, cs]
         else:
-            depth_im_list = []
-            if ktype == 'min':
-                ktype_func = np.min
-            elif ktype == 'max':
-                ktype_func = np.max
-            elif ktype == 'median':
-                ktype_func = np.median
-            elif ktype == 'mean':
-                ktype_func = np.mean
-            else:
-                raise TypeError('Unsupported ktype:[%s]' % ktype)
-            for r, c in zip(rs, cs):
-                s = k // 2
-                rmin = max(0, r - s)
-                rmax = min(self.img_height, r + s + 1)
-                cmin = max(0, c - s)
-                cmax = min(self.img_width, c + s + 1)
-                depth_im_list.append(ktype_func(depth_im[rmin:rmax,
-                                                cmin:cmax]))
-            depth_im = np.array(depth_im_list)
-
-        depth = depth_im.reshape(-1) * self.depth_scale
-        img_pixs = np.stack((rs, cs)).reshape(2, -1)
-        img_pixs[[0, 1], :] = img_pixs[[1, 0], :]
-        depth_min = depth_min if depth_min else self.depth_min
-        depth_max = depth_max if depth_max else self.depth_max
+            windows = self._get_depth_windows(depth_im, k)
+            win_vals = windows[rs, cs].reshape(rs.size, -1)
+            depth = _KTYPE_FUNCS[ktype](win_vals, axis=1)
+
+        depth = depth.reshape(-1) * self.depth_scale
+        pix_ids = rs * self.img_width + cs
         if filter_depth:
+            depth_min = depth_min if depth_min else self.depth_min
+            depth_max = depth_max if depth_max else self.depth_max
             valid = depth > depth_min
             valid = np.logical_and(valid,
                                    depth < depth_max)
-            depth = depth[:, valid]
-            img_pixs = img_pixs[:, valid]
-        uv_one = np.concatenate((img_pixs,
-                                 np.ones((1, img_pixs.shape[1]))))
-        uv_one_in_cam = np.dot(self.cam_int_mat_inv, uv_one)
-        pts_in_cam = np.multiply(uv_one_in_cam, depth)
+            depth = depth[valid]
+            pix_ids = pix_ids[valid]
+        rays, cam_pos = self._get_rays(in_world, np.float64)
+        pts = rays[pix_ids] * depth[:, None]
         if in_world:
-            if self.cam_ext_mat is None:
-                raise ValueError('Please call set_cam_ext() first to set up'
-                                 ' the camera extrinsic matrix')
-            pts_in_cam = np.concatenate((pts_in_cam,
-                                         np.ones((1, pts_in_cam.shape[1]))),
-                                        axis=0)
-            pts_in_world = np.dot(self.cam_ext_mat, pts_in_cam)
-            pts_in_world = pts_in_world[:3, :].T
-            return pts_in_world
-        else:
-            return pts_in_cam.T
+            pts += cam_pos
+        return pts
+
+    def _get_depth_windows(self, depth_im, k):
+        """
+        Return a (k, k) sliding window view centered at each pixel
+        of the depth image. The image is padded with NaN so that
+        the windows at the borders only contain the pixels inside
+        the image. The padded image buffer is reused across calls.
+
+        Args:
+            depth_im (np.ndarray): depth image (shape: :math:`[H, W]`).
+            k (int): kernel size.
+
+        Returns:
+            np.ndarray: read-only view of the windows
+            (shape: :math:`[H, W, k, k]`).
+        """
+        s = k // 2
+        height, width = depth_im.shape
+        dtype = np.result_type(depth_im.dtype, np.float32)
+        key = (k, dtype)
+        padded = self._depth_pad_bufs.get(key)
+        if padded is None or padded.shape != (height + 2 * s,
+                                              width + 2 * s):
+            padded = np.full((height + 2 * s, width + 2 * s), np.nan,
+                             dtype=dtype)
+            self._depth_pad_bufs[key] = padded
+        # the border stays NaN, only the inside is overwritten
+        padded[s:s + height, s:s + width] = depth_im
+        st_r, st_c = padded.strides
+        windows = as_strided(padded,
+                             shape=(height, width, k, k),
+                             strides=(st_r, st_c, st_r, st_c))
+        windows.flags.writeable = False
+        return windows
 
     def get_pcd(self, in_world=True, filter_depth=True,
-                depth_min=None, depth_max=None):
+                depth_min=None, depth_max=None,
+                organized=False, dtype=np.float64, out=None):
         """
         Get the point cloud from the entire depth image
         in the camera frame or in the world frame.
 
+        The points are computed as ray * depth + camera position, with
+        the rays of all the pixels precomputed (and rotated into the
+        world frame once per extrinsic matrix), so there is no
+        homogeneous coordinate and no 4x4 matrix product per frame.
+
         Args:
             in_world (bool): return point cloud in the world frame, otherwise,
                 return point cloud in the camera frame.
@@ -196,44 +265,77 @@ class RGBDCamera(Camera):
                 default minimum depth value defined in the config file.
             depth_max (float): maximum depth value. If None, it will use the
                 default maximum depth value defined in the config file.
+            organized (bool): if True, return the point cloud in the
+                image layout (shape: :math:`[H, W, 3]`). The points
+                filtered out by `filter_depth` are set to NaN.
+            dtype (np.dtype): data type of the points
+                (np.float64 or np.float32).
+            out (np.ndarray): if provided, the points are written into
+                this array (shape: :math:`[H, W, 3]` or
+                :math:`[H * W, 3]`, data type: `dtype`). Only used
+                when `organized` is True.
 
         Returns:
             2-element tuple containing
 
-            - np.ndarray: point coordinates (shape: :math:`[N, 3]`).
-            - np.ndarray: rgb values (shape: :math:`[N, 3]`).
+            - np.ndarray: point coordinates (shape: :math:`[N, 3]`,
+              or :math:`[H, W, 3]` if `organized` is True).
+            - np.ndarray: rgb values (shape: :math:`[N, 3]`,
+              or :math:`[H, W, 3]` if `organized` is True).
         """
         rgb_im, depth_im = self.get_images(get_rgb=True, get_depth=True)
-        # pcd in camera from depth
-        depth = depth_im.reshape(-1) * self.depth_scale
+        rays, cam_pos = self._get_rays(in_world, dtype)
+        npix = rays.shape[0]
+        if organized and out is not None:
+            if out.dtype != rays.dtype or out.size != npix * 3 or \
+                    not out.flags.c_contiguous:
+                raise ValueError('out should be a contiguous array with'
+                                 ' %d elements in data type'
+                                 ' %s' % (npix * 3, rays.dtype))
+            pts = out.reshape(npix, 3)
+        else:
+            pts = self._pcd_buffer(npix, rays.dtype, organized)
+        depth = pts[:, 2:]
+        np.multiply(depth_im.reshape(npix, 1), self.depth_scale,
+                    out=depth, dtype=rays.dtype)
+        valid = None
+        if filter_depth:
+            depth_min = depth_min if depth_min else self.depth_min
+            depth_max = depth_max if depth_max else self.depth_max
+            valid = depth[:, 0] > depth_min
+            valid &= depth[:, 0] < depth_max
+        # the depth is stored in the last column of the
+        # output, numpy buffers it since the operands overlap
+        np.multiply(rays, depth, out=pts)
+        if in_world:
+            pts += cam_pos
         rgb = None
+        if organized:
+            if valid is not None:
+                pts[~valid] = np.nan
+            pts = pts.reshape(self.img_height, self.img_width, 3)
+            if rgb_im is not None:
+                rgb = rgb_im.reshape(self.img_height, self.img_width, 3)
+            return pts, rgb
         if rgb_im is not None:
             rgb = rgb_im.reshape(-1, 3)
-        depth_min = depth_min if depth_min else self.depth_min
-        depth_max = depth_max if depth_max else self.depth_max
-        if filter_depth:
-            valid = depth > depth_min
-            valid = np.logical_and(valid,
-                                   depth < depth_max)
-            depth = depth[valid]
+        if valid is not None:
+            pts = np.compress(valid, pts, axis=0)
             if rgb is not None:
-                rgb = rgb[valid]
-            uv_one_in_cam = self._uv_one_in_cam[:, valid]
-        else:
-            uv_one_in_cam = self._uv_one_in_cam
-        pts_in_cam = np.multiply(uv_one_in_cam, depth)
-        if not in_world:
-            pcd_pts = pts_in_cam.T
-            pcd_rgb = rgb
-            return pcd_pts, pcd_rgb
+                rgb = np.compress(valid, rgb, axis=0)
         else:
-            if self.cam_ext_mat is None:
-                raise ValueError('Please call set_cam_ext() first to set up'
-                                 ' the camera extrinsic matrix')
-            pts_in_cam = np.concatenate((pts_in_cam,
-                                         np.ones((1, pts_in_cam.shape[1]))),
-                                        axis=0)
-            pts_in_world = np.dot(self.cam_ext_mat, pts_in_cam)
-            pcd_pts = pts_in_world[:3, :].T
-            pcd_rgb = rgb
-            return pcd_pts, pcd_rgb
+            pts = pts.copy()
+        return pts, rgb
+
+    def _pcd_buffer(self, npix, dtype, new):
+        """
+        Return a buffer for the points of all the pixels. If `new`
+        is False, the buffer is reused by the next call.
+        """
+        if new:
+            return np.empty((npix, 3), dtype=dtype)
+        buf = self._pcd_buffers.get(dtype)
+        if buf is None or buf.shape[0] != npix:
+            buf = np.empty((npix, 3), dtype=dtype)
+            self._pcd_buffers[dtype] = buf
+        return buf
@@ -1,6 +1,8 @@
+import cv2
 import numpy as np
 
 from airobot.sensor.camera.rgbdcam import RGBDCamera
+from airobot.utils.render_util import get_scene_state
 
 
 class RGBDCameraPybullet(RGBDCamera):
@@ -25,6 +27,9 @@ class RGBDCameraPybullet(RGBDCamera):
         self.depth_scale = 1
         self.depth_min = self.cfgs.CAM.SIM.ZNEAR
         self.depth_max = self.cfgs.CAM.SIM.ZFAR
+        # increased whenever the camera matrices change
+        self._cam_version = 0
+        self.clear_cache()
 
     def setup_camera(self, focus_pt=None, dist=3,
                      yaw=0, pitch=0, roll=0,
@@ -68,6 +73,14 @@ class RGBDCameraPybullet(RGBDCamera):
                                                  znear,
                                                  zfar)
         self.proj_matrix = np.array(pm).reshape(4, 4)
+        # constants for getCameraImage and the depth linearization
+        # depth = zfar * znear / (zfar - (zfar - znear) * depth_buffer)
+        self._view_matrix_list = list(vm)
+        self._proj_matrix_list = list(pm)
+        self._depth_num = zfar * znear
+        self._depth_den_scale = -(zfar - znear)
+        self._depth_den_offset = zfar
+        self._cam_version += 1
         rot = np.array([[1, 0, 0, 0],
                         [0, -1, 0, 0],
                         [0, 0, -1, 0],
@@ -87,15 +100,39 @@ class RGBDCameraPybullet(RGBDCamera):
         self._init_pers_mat()
 
     def get_images(self, get_rgb=True, get_depth=True,
-                   get_seg=False, **kwargs):
+                   get_seg=False, rgb_out=None, depth_out=None,
+                   seg_out=None, use_cache=True, depth_dtype=np.float64,
+                   **kwargs):
         """
         Return rgb, depth, and segmentation images.
 
+        The last rendered frame is cached. If nothing in the scene
+        has changed since then (same simulation state, camera
+        matrices and render settings), the images are computed from
+        the cached frame instead of rendering again. So calling
+        `get_pcd` and `get_pix_3dpt` in the same control step only
+        renders once.
+
         Args:
             get_rgb (bool): return rgb image if True, None otherwise.
             get_depth (bool): return depth image if True, None otherwise.
             get_seg (bool): return the segmentation mask if True,
                 None otherwise.
+            rgb_out (np.ndarray): if provided, the rgb image is written
+                into this array (shape: [H, W, 3], dtype: np.uint8)
+                and it is returned.
+            depth_out (np.ndarray): if provided, the depth image is
+                written into this array (shape: [H, W]) and it is
+                returned. The depth is computed in the data type
+                of this array.
+            seg_out (np.ndarray): if provided, the segmentation mask
+                is written into this array (shape: [H, W]) and it is
+                returned.
+            use_cache (bool): reuse the cached frame if the scene
+                has not changed. If False, always render.
+            depth_dtype (np.dtype): data type of the depth image if
+                `depth_out` is not provided. np.float32 is faster.
+            **kwargs: other arguments to pass to `getCameraImage`.
 
         Returns:
             2-element tuple (if `get_seg` is False) containing
@@ -114,44 +151,164 @@ class RGBDCameraPybullet(RGBDCamera):
               value = objectUniqueId + (linkIndex+1)<<24 ...
               for a free floating body without joints/links, the
               segmentation mask is equal to its body unique id,
-              since its link index is -1.".
+              since its link index is -1.". See `airobot.utils.seg_util`
+              to decode it and to index the pixels of each object.
         """
 
         if self.view_matrix is None:
             raise ValueError('Please call setup_camera() first!')
+        shape = (self.img_height, self.img_width)
+        if get_rgb and rgb_out is not None:
+            if rgb_out.shape != shape + (3,) or rgb_out.dtype != np.uint8 \
+                    or not rgb_out.flags.c_contiguous:
+                raise ValueError('rgb_out should be a contiguous np.uint8 '
+                                 'array of shape %s.' % str(shape + (3,)))
+        frame = self._get_frame(get_seg, use_cache, kwargs)
+        rgb = None
+        depth = None
+        if get_rgb:
+            # 0 to 255, much faster than copying
+            # the strided view rgba[:, :, :3]
+            rgb = cv2.cvtColor(frame['rgba'], cv2.COLOR_RGBA2RGB,
+                               dst=rgb_out)
+        if get_depth:
+            if depth_out is None:
+                depth = np.empty(shape, dtype=depth_dtype)
+            else:
+                depth = depth_out
+            np.multiply(frame['depth'], self._depth_den_scale,
+                        out=depth, dtype=depth.dtype)
+            depth += self._depth_den_offset
+            np.divide(self._depth_num, depth, out=depth)
+        if get_seg:
+            if seg_out is not None:
+                np.copyto(seg_out, frame['seg'])
+                seg = seg_out
+            else:
+                seg = frame['seg'].copy()
+            return rgb, depth, seg
+        else:
+            return rgb, depth
+
+    def get_cache_stats(self):
+        """
+        Return the statistics of the frame cache.
+
+        Returns:
+            dict: number of `hits` (images computed from the
+            cached frame) and `misses` (frames rendered).
+        """
+        return {'hits': self._cache_hits,
+                'misses': self._cache_misses}
+
+    def clear_cache(self):
+        """
+        Drop the cached frame and reset the cache statistics.
+        The next call to `get_images` renders a new frame.
+        """
+        self._frame_cache = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _get_frame(self, get_seg, use_cache, kwargs):
+        """
+        Return the raw buffers (rgba, depth buffer and segmentation
+        mask if requested) of the current frame, rendered or cached.
+        The buffers are not modified by the callers.
+        """
+        # fingerprint taken before rendering, so a state change
+        # during the rendering invalidates the frame
+        key = self._frame_key(kwargs)
+        if use_cache:
+            frame = self._get_cached_frame(key, get_seg)
+            if frame is not None:
+                return frame
+        cam_img_kwargs = self._cam_img_kwargs(get_seg, kwargs)
+        images = self._pb.getCameraImage(**cam_img_kwargs)
+        seg = images[4] if get_seg else None
+        return self._store_frame(key, images[2], images[3], seg)
+
+    def _cam_img_kwargs(self, get_seg, kwargs):
+        """
+        Return the arguments of `getCameraImage` for this camera.
+        """
         if self._pb.opengl_render:
             renderer = self._pb.ER_BULLET_HARDWARE_OPENGL
         else:
             renderer = self._pb.ER_TINY_RENDERER
+        if get_seg:
+            flags = self._pb.ER_SEGMENTATION_MASK_OBJECT_AND_LINKINDEX
+        else:
+            flags = self._pb.ER_NO_SEGMENTATION_MASK
         cam_img_kwargs = {
             'width': self.img_width,
             'height': self.img_height,
-            'viewMatrix': self.view_matrix.flatten(),
-            'projectionMatrix': self.proj_matrix.flatten(),
-            'flags': self._pb.ER_NO_SEGMENTATION_MASK,
+            'viewMatrix': self._view_matrix_list,
+            'projectionMatrix': self._proj_matrix_list,
+            'flags': flags,
             'renderer': renderer
         }
-        if get_seg:
-            pb_seg_flag = self._pb.ER_SEGMENTATION_MASK_OBJECT_AND_LINKINDEX
-            cam_img_kwargs['flags'] = pb_seg_flag
-
         cam_img_kwargs.update(kwargs)
-        images = self._pb.getCameraImage(**cam_img_kwargs)
-        rgb = None
-        depth = None
-        if get_rgb:
-            rgb = np.reshape(images[2],
-                             (self.img_height,
-                              self.img_width, 4))[:, :, :3]  # 0 to 255
-        if get_depth:
-            depth_buffer = np.reshape(images[3], [self.img_height,
-                                                  self.img_width])
-            znear = self.cfgs.CAM.SIM.ZNEAR
-            zfar = self.cfgs.CAM.SIM.ZFAR
-            depth = zfar * znear / (zfar - (zfar - znear) * depth_buffer)
-        if get_seg:
-            seg = np.reshape(images[4], [self.img_height,
-                                         self.img_width])
-            return rgb, depth, seg
-        else:
-            return rgb, depth
+        return cam_img_kwargs
+
+    def _frame_key(self, kwargs):
+        """
+        Return the key of the frame that would be rendered now
+        with the extra `getCameraImage` arguments `kwargs`.
+        """
+        return (self._scene_fingerprint(), self._cam_version,
+                self._pb.opengl_render, repr(sorted(kwargs.items())))
+
+    def _get_cached_frame(self, key, get_seg):
+        """
+        Return the cached frame if it has the given key (and the
+        segmentation mask if `get_seg` is True), None otherwise.
+        """
+        cached = self._frame_cache
+        if cached is not None and cached['key'] == key \
+                and (not get_seg or cached['seg'] is not None):
+            self._cache_hits += 1
+            return cached
+        return None
+
+    def _store_frame(self, key, rgba, depth, seg=None):
+        """
+        Cache a newly rendered frame (images from `getCameraImage`)
+        and return it.
+        """
+        self._cache_misses += 1
+        shape = (self.img_height, self.img_width)
+        frame = {
+            'key': key,
+            'rgba': self._img_buffer(rgba, shape + (4,), np.uint8),
+            'depth': self._img_buffer(depth, shape, np.float32),
+            'seg': None
+        }
+        if seg is not None:
+            frame['seg'] = self._img_buffer(seg, shape, np.int32)
+        self._frame_cache = frame
+        return frame
+
+    def _scene_fingerprint(self):
+        """
+        Return a value that changes whenever the rendered scene
+        may change. It is the state version of the pybullet client
+        if the client tracks the state changes. Otherwise (e.g.
+        GUI realtime mode), it is made of the base poses and
+        joint positions of all the bodies.
+        """
+        version = self._pb.get_state_version()
+        if version is not None:
+            return version
+        return get_scene_state(self._pb).tobytes()
+
+    @staticmethod
+    def _img_buffer(img, shape, dtype):
+        """
+        Return an image from getCameraImage as a numpy
+        array of the given shape. If pybullet is built with numpy,
+        the image is already a numpy array and no copy is made.
+        """
+        if isinstance(img, np.ndarray) and img.dtype == dtype:
+            return img.reshape(shape)
+        return np.array(img, dtype=dtype).reshape(shape)
@@ -1,27 +1,46 @@
 import threading
 import time
-from copy import deepcopy
 
+import cv2
 import message_filters
 import numpy as np
 import rospy
-from cv_bridge import CvBridge, CvBridgeError
 from sensor_msgs.msg import CameraInfo
 from sensor_msgs.msg import Image
 from tf import TransformListener
 
-import airobot as ar
 from airobot.sensor.camera.rgbdcam import RGBDCamera
+from airobot.utils.buffer_util import RingBuffer
+from airobot.utils.buffer_util import TimeSeriesBuffer
+from airobot.utils.clock import EventClock
 from airobot.utils.common import to_rot_mat
+from airobot.utils.ros_util import imgmsg_to_numpy
+
+# color conversion of each rgb image encoding
+_RGB_CONVERSIONS = {'rgb8': None,
+                    'bgr8': cv2.COLOR_BGR2RGB,
+                    'rgba8': cv2.COLOR_RGBA2RGB,
+                    'bgra8': cv2.COLOR_BGRA2RGB}
 
 
 class RGBDCameraReal(RGBDCamera):
     """
     Real RGBD camera.
 
+    The callback of the synchronized rgb and depth images only keeps
+    the latest pair of messages. The images are decoded when they
+    are requested, straight from the message data, into a
+    preallocated ring buffer (see `airobot.utils.buffer_util.RingBuffer`)
+    that caches the decoded frame of each message. Each frame has
+    the sequence number of its messages and the ROS timestamp
+    of the rgb image. The latest messages are also kept in a
+    time-indexed history, so the frame captured closest to a given
+    time can be looked up with `get_frame_at`.
+
     Args:
         cfgs (YACS CfgNode): configurations for the camera
         cam_name (str): camera name.
+        buffer_size (int): number of frames kept in the ring buffer.
 
     Attributes:
         cfgs (YACS CfgNode): configurations for the end effector.
@@ -37,7 +56,7 @@ class RGBDCameraReal(RGBDCamera):
         depth_max (float): maximum depth value considered in 3D reconstruction.
     """
 
-    def __init__(self, cfgs, cam_name=None):
+    def __init__(self, cfgs, cam_name=None, buffer_size=4):
         super(RGBDCameraReal, self).__init__(cfgs=cfgs)
         self.depth_scale = self.cfgs.CAM.REAL.DEPTH_SCALE
         self.cam_int_mat = None
@@ -57,12 +76,16 @@ class RGBDCameraReal(RGBDCamera):
                                                 cam_name)
             self._cam_info_topic = self._rp_cam_name(self._cam_info_topic,
                                                      cam_name)
-        self._cv_bridge = CvBridge()
         self._cam_info_lock = threading.RLock()
-        self._cam_img_lock = threading.RLock()
         self._tf_listener = TransformListener()
-        self._rgb_img = None
-        self._depth_img = None
+        self._frames = RingBuffer(num_slots=buffer_size)
+        self._decode_lock = threading.Lock()
+        # (sequence number, rgb message, depth message) of the
+        # latest pair, the sequence number is the message count
+        self._msgs = None
+        self._msg_clock = EventClock(rospy.get_time)
+        history_len = self.cfgs.CAM.REAL.FRAME_HISTORY_LEN
+        self._msg_history = TimeSeriesBuffer(history_len, dtype=object)
         self._cam_info = None
         self._cam_P = None
         self._rgb_img_shape = None
@@ -83,7 +106,7 @@ class RGBDCameraReal(RGBDCamera):
 
         start_time = time.time()
         while True:
-            if self.cam_int_mat is not None and self._rgb_img is not None:
+            if self.cam_int_mat is not None and self._msgs is not None:
                 break
             time.sleep(0.02)
             if time.time() - start_time > 4:
@@ -106,19 +129,55 @@ class RGBDCameraReal(RGBDCamera):
         self._cam_info_lock.release()
 
     def _sync_callback(self, color, depth):
-        self._cam_img_lock.acquire()
-        try:
-            bgr_img = self._cv_bridge.imgmsg_to_cv2(color, "bgr8")
-            self._rgb_img = bgr_img[:, :, ::-1]
-            self._depth_img = self._cv_bridge.imgmsg_to_cv2(depth,
-                                                            "passthrough")
-            if self._rgb_img_shape is None:
-                self._rgb_img_shape = self._rgb_img.shape
-            if self._depth_img_shape is None:
-                self._depth_img_shape = self._depth_img.shape
-        except CvBridgeError as e:
-            ar.log_error(e)
-        self._cam_img_lock.release()
+        # the images are decoded only when they are requested
+        if self._rgb_img_shape is None:
+            self._rgb_img_shape = (int(color.height), int(color.width), 3)
+        if self._depth_img_shape is None:
+            self._depth_img_shape = (int(depth.height), int(depth.width))
+        msgs = (self._msg_clock.get_seq() + 1, color, depth)
+        self._msg_history.append(color.header.stamp.to_sec(), msgs)
+        self._msgs = msgs
+        self._msg_clock.notify()
+
+    def _get_frame(self, copy):
+        """
+        Return the latest frame, decoding the latest
+        messages if they have not been decoded yet.
+        """
+        seq, color, depth = self._msgs
+        with self._decode_lock:
+            if seq > self._frames.get_seq():
+                self._decode(color, depth, seq)
+            return self._frames.get_latest(copy=copy)
+
+    def _decode(self, color, depth, seq=None):
+        """
+        Decode a pair of image messages into the ring buffer
+        (as frame `seq`), or into new arrays if `seq` is None.
+        """
+        if color.encoding not in _RGB_CONVERSIONS:
+            raise ValueError('Unsupported rgb image '
+                             'encoding: %s' % color.encoding)
+        rgb_img = imgmsg_to_numpy(color)
+        depth_img = imgmsg_to_numpy(depth)
+        # the depth image is stored in the native byte order
+        specs = {'rgb': (rgb_img.shape[:2] + (3,), np.uint8),
+                 'depth': (depth_img.shape,
+                           depth_img.dtype.newbyteorder('='))}
+        if seq is None:
+            out = dict((name, np.empty(shape, dtype=dtype))
+                       for name, (shape, dtype) in specs.items())
+        else:
+            out = self._frames.begin_write(**specs)
+        code = _RGB_CONVERSIONS[color.encoding]
+        if code is None:
+            np.copyto(out['rgb'], rgb_img)
+        else:
+            cv2.cvtColor(rgb_img, code, dst=out['rgb'])
+        np.copyto(out['depth'], depth_img)
+        if seq is not None:
+            self._frames.end_write(color.header.stamp.to_sec(), seq)
+        return out
 
     def _rp_cam_name(self, topic, cam_name):
         """
@@ -176,12 +235,80 @@ class RGBDCameraReal(RGBDCamera):
             - np.ndarray: rgb image (shape: :math:`[H, W, 3]`).
             - np.ndarray: depth image (shape: :math:`[H, W]`).
         """
-        rgb_img = None
-        depth_img = None
-        self._cam_img_lock.acquire()
-        if get_rgb:
-            rgb_img = deepcopy(self._rgb_img)
-        if get_depth:
-            depth_img = deepcopy(self._depth_img)
-        self._cam_img_lock.release()
+        frame = self._get_frame(copy=True)
+        rgb_img = frame['rgb'] if get_rgb else None
+        depth_img = frame['depth'] if get_depth else None
         return rgb_img, depth_img
+
+    def get_latest(self, copy=False):
+        """
+        Return the latest frame. Unlike `get_images`,
+        the images are not copied by default.
+
+        Args:
+            copy (bool): return copies of the images instead
+                of read-only views of the ring buffer. The views
+                are overwritten after `buffer_size - 1` newer frames
+                are decoded (see `RingBuffer.is_valid`).
+
+        Returns:
+            dict: the frame, with keys `rgb` (shape: :math:`[H, W, 3]`),
+            `depth` (shape: :math:`[H, W]`), `seq` (sequence number)
+            and `stamp` (ROS timestamp in seconds).
+        """
+        return self._get_frame(copy)
+
+    def wait_for_next(self, after_seq=None, timeout=None, copy=False):
+        """
+        Block until a frame newer than `after_seq` arrives,
+        instead of polling `get_images`.
+
+        Args:
+            after_seq (int): sequence number of the last frame the
+                caller has seen. If None, wait for the next frame.
+            timeout (float): maximum waiting time (seconds).
+            copy (bool): return copies of the images instead
+                of read-only views of the ring buffer.
+
+        Returns:
+            dict: the latest frame (see `get_latest`), None on timeout.
+        """
+        if after_seq is None:
+            after_seq = self._msg_clock.get_seq()
+        if self._msg_clock.get_seq() <= after_seq and \
+                not self._msg_clock.wait_for_update(after_seq, timeout):
+            return None
+        return self._get_frame(copy)
+
+    def get_frame_at(self, t, max_dt=None, copy=False):
+        """
+        Return the frame in the history whose timestamp is the
+        closest to `t` (e.g. to match the frame with the joint
+        states of the arm at the same time).
+
+        Args:
+            t (float): ROS time (seconds).
+            max_dt (float): maximum time difference between `t` and
+                the timestamp of the frame (seconds). If None, any
+                frame in the history can be returned.
+            copy (bool): if the frame is still in the ring buffer,
+                return copies of the images instead of read-only
+                views. Older frames are decoded into new arrays.
+
+        Returns:
+            dict: the frame (see `get_latest`), None if there is
+            no frame within `max_dt` of `t`.
+        """
+        found = self._msg_history.nearest(t)
+        if found is None:
+            return None
+        stamp, (seq, color, depth) = found
+        if max_dt is not None and abs(stamp - t) > max_dt:
+            return None
+        with self._decode_lock:
+            frame = self._frames.get(seq, copy=copy)
+        if frame is None:
+            frame = self._decode(color, depth)
+            frame['seq'] = seq
+            frame['stamp'] = stamp
+        return frame
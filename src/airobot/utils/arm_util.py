@@ -1,14 +1,18 @@
+import functools
 import numbers
-import time
 
 import numpy as np
 
 import airobot as ar
 import airobot.utils.common as arutil
+from airobot.utils.clock import WallClock
+
+_WALL_CLOCK = WallClock()
 
 
 def wait_to_reach_jnt_goal(goal, get_func, joint_name=None,
-                           get_func_derv=None, timeout=10.0, max_error=0.01):
+                           get_func_derv=None, timeout=10.0, max_error=0.01,
+                           clock=None):
     """
     Block the code to wait for the joint moving to the specified goal.
     The goal can be a desired velocity(s) or a desired position(s).
@@ -29,46 +33,59 @@ def wait_to_reach_jnt_goal(goal, get_func, joint_name=None,
             Otherwise, only the specified joint is compared.
         get_func_derv (function): the name of the function with which we
             can get the derivative of the joint values.
-        timeout (float): maximum waiting time.
+        timeout (float): maximum waiting time (in the time of `clock`).
         max_error (float): tolerance of error.
+        clock (WallClock or EventClock): clock used to measure the
+            timeout and to wait for new joint states. If the clock
+            notifies state updates (e.g. `BulletClient.get_clock()`),
+            the goal is checked once per update. Defaults to the
+            wall clock (polling every 1 ms).
 
     Returns:
         bool: if the goal is reached or not.
     """
+    if clock is None:
+        clock = _WALL_CLOCK
     success = False
-    start_time = time.time()
+    start_time = clock.now()
     vel_stop_time = None
     if joint_name is not None:
         if not isinstance(goal, numbers.Number):
             raise ValueError('Only one goal should be '
                              'specified for a single joint!')
+    goal_arr = np.array(goal)
+    get_val = _bind_joint_getter(get_func, joint_name)
+    if get_func_derv is not None:
+        get_derv = _bind_joint_getter(get_func_derv, joint_name)
     while True:
-        if time.time() - start_time > timeout:
+        seq = clock.get_seq()
+        if clock.now() - start_time > timeout:
             pt_str = 'Unable to move to joint goals (%s)' \
                      ' within %f s' % (str(goal),
                                        timeout)
             ar.log_error(pt_str)
             return success
-        if reach_jnt_goal(goal, get_func, joint_name, max_error):
+        if _reach_jnt_goal(goal_arr, get_val, max_error):
             success = True
             break
         if get_func_derv is not None:
             vel_threshold = 0.006
-            nargs = get_func_derv.__code__.co_argcount
-            if nargs == 1:
-                jnt_vel = get_func_derv()
-            else:
-                jnt_vel = get_func_derv(joint_name)
+            jnt_vel = get_derv()
             if np.max(np.abs(jnt_vel)) <= vel_threshold \
                     and vel_stop_time is None:
-                vel_stop_time = time.time()
+                vel_stop_time = clock.now()
             elif np.max(np.abs(jnt_vel)) > vel_threshold:
                 vel_stop_time = None
-            if vel_stop_time is not None and time.time() - vel_stop_time > 1.5:
+            if vel_stop_time is not None and \
+                    clock.now() - vel_stop_time > 1.5:
                 pt_str = 'Unable to move to joint goals (%s)' % str(goal)
                 ar.log_error(pt_str)
                 return success
-        time.sleep(0.001)
+        if not clock.wait_for_update(seq, timeout=timeout):
+            pt_str = 'No new joint state within %f s while moving ' \
+                     'to joint goals (%s)' % (timeout, str(goal))
+            ar.log_error(pt_str)
+            return success
     return success
 
 
@@ -89,23 +106,29 @@ def reach_jnt_goal(goal, get_func, joint_name=None, max_error=0.01):
     Returns:
         bool: if the goal is reached or not.
     """
-    goal = np.array(goal)
-    nargs = get_func.__code__.co_argcount
-    if nargs == 1:
-        new_jnt_val = get_func()
-    else:
-        new_jnt_val = get_func(joint_name)
-    new_jnt_val = np.array(new_jnt_val)
-    jnt_diff = new_jnt_val - goal
-    error = np.max(np.abs(jnt_diff))
-    if error < max_error:
-        return True
-    else:
-        return False
+    get_val = _bind_joint_getter(get_func, joint_name)
+    return _reach_jnt_goal(np.array(goal), get_val, max_error)
+
+
+def _reach_jnt_goal(goal, get_val, max_error):
+    new_jnt_val = np.array(get_val())
+    error = np.max(np.abs(new_jnt_val - goal))
+    return bool(error < max_error)
+
+
+def _bind_joint_getter(get_func, joint_name):
+    """
+    Return a function without arguments that returns the joint values.
+    `get_func` either takes no argument or takes the joint name.
+    """
+    if get_func.__code__.co_argcount == 1:
+        return get_func
+    return functools.partial(get_func, joint_name)
 
 
 def wait_to_reach_ee_goal(pos, ori, get_func, get_func_derv=None,
-                          timeout=10.0, pos_tol=0.01, ori_tol=0.02):
+                          timeout=10.0, pos_tol=0.01, ori_tol=0.02,
+                          clock=None):
     """
     Block the code to wait for the end effector to reach its
     specified goal pose (must be below both position and
@@ -121,18 +144,24 @@ def wait_to_reach_ee_goal(pos, ori, get_func, get_func_derv=None,
             the end effector pose.
         get_func_derv (function): the name of the function with which we
             can get end effector velocities.
-        timeout (float): maximum waiting time.
+        timeout (float): maximum waiting time (in the time of `clock`).
         pos_tol (float): tolerance of position error.
         ori_tol (float): tolerance of orientation error.
+        clock (WallClock or EventClock): clock used to measure the
+            timeout and to wait for new states. Defaults to the
+            wall clock (polling every 1 ms).
 
     Returns:
         bool: If end effector reached goal or not.
     """
+    if clock is None:
+        clock = _WALL_CLOCK
     success = False
-    start_time = time.time()
+    start_time = clock.now()
     vel_stop_time = None
     while True:
-        if time.time() - start_time > timeout:
+        seq = clock.get_seq()
+        if clock.now() - start_time > timeout:
             pt_str = 'Unable to move to end effector position:' \
                      '%s and orientaion: %s within %f s' % \
                      (str(pos), str(ori), timeout)
@@ -147,16 +176,22 @@ def wait_to_reach_ee_goal(pos, ori, get_func, get_func_derv=None,
             ee_pos_vel, ee_rot_vel = get_func_derv()
             ee_vel = np.concatenate((ee_pos_vel, ee_rot_vel))
             if np.max(np.abs(ee_vel)) < 0.001 and vel_stop_time is None:
-                vel_stop_time = time.time()
+                vel_stop_time = clock.now()
             elif np.max(np.abs(ee_vel)) > 0.001:
                 vel_stop_time = None
-            if vel_stop_time is not None and time.time() - vel_stop_time > 1.5:
+            if vel_stop_time is not None and \
+                    clock.now() - vel_stop_time > 1.5:
                 pt_str = 'Unable to move to end effector pose\n' \
                          'pos: %s \n' \
                          'ori: %s ' % (str(pos), str(ori))
                 arutil.print_red(pt_str)
                 return success
-        time.sleep(0.001)
+        if not clock.wait_for_update(seq, timeout=timeout):
+            pt_str = 'No new state within %f s while moving to end ' \
+                     'effector position: %s and orientaion: %s' % \
+                     (timeout, str(pos), str(ori))
+            arutil.print_red(pt_str)
+            return success
     return success
 
 
@@ -0,0 +1,396 @@
+"""
+Preallocated buffers for sensor data streams.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+
+import numpy as np
+
+from airobot.utils.clock import monotonic
+
+
+class RingBuffer(object):
+    """
+    A ring buffer of frames. A frame is a set of named numpy arrays
+    (e.g. an rgb image and a depth image) with a sequence number and
+    a timestamp. The arrays of all the slots are allocated once, when
+    the first frame is written, and the new frames are written into
+    the oldest slot, so streaming frames does not allocate memory.
+
+    One thread writes the frames (`begin_write` + `end_write`, or
+    `put`), and any number of threads can read them.
+
+    Note:
+        The frames returned with `copy=False` are read-only views of
+        the slots. A slot is reused after `num_slots - 1` newer frames
+        are written, so the views should not be kept longer than
+        that. `is_valid` tells if a frame is still in the buffer.
+
+    Args:
+        num_slots (int): number of frames kept in the buffer.
+    """
+
+    def __init__(self, num_slots=4):
+        if num_slots < 2:
+            raise ValueError('num_slots should be at least 2.')
+        self._num_slots = num_slots
+        self._cond = threading.Condition()
+        self._specs = None
+        self._slots = None
+        # sequence number and timestamp of the frame in each slot,
+        # 0 if the slot is empty or being written
+        self._slot_seqs = [0] * num_slots
+        self._slot_stamps = [None] * num_slots
+        self._seq = 0
+        self._next_slot = 0
+        self._writing = None
+
+    def begin_write(self, **specs):
+        """
+        Return the arrays of the next slot to be filled in place
+        (e.g. as the `dst` of an OpenCV function). The frame is
+        published by `end_write`.
+
+        Args:
+            **specs: (shape, dtype) of each array of the frame. If
+                they are different from the previous frames, the
+                slots are allocated again and the old frames are
+                dropped.
+
+        Returns:
+            dict: writable arrays of the slot.
+        """
+        specs = dict((name, (tuple(shape), np.dtype(dtype)))
+                     for name, (shape, dtype) in specs.items())
+        with self._cond:
+            if specs != self._specs:
+                self._slots = [dict((name, np.empty(shape, dtype=dtype))
+                                    for name, (shape, dtype)
+                                    in specs.items())
+                               for _ in range(self._num_slots)]
+                self._specs = specs
+                self._slot_seqs = [0] * self._num_slots
+                self._slot_stamps = [None] * self._num_slots
+            idx = self._next_slot
+            # the oldest frame is not readable while it is overwritten
+            self._slot_seqs[idx] = 0
+            self._writing = idx
+            return self._slots[idx]
+
+    def end_write(self, stamp=None, seq=None):
+        """
+        Publish the frame written into the slot from `begin_write`
+        and wake up the threads waiting for a new frame.
+
+        Args:
+            stamp (float): timestamp of the frame. Defaults to the
+                monotonic clock.
+            seq (int): sequence number of the frame, larger than the
+                previous one (e.g. the number of the message it is
+                decoded from, if some messages are skipped).
+                Defaults to the previous sequence number + 1.
+
+        Returns:
+            int: sequence number of the frame (starting from 1).
+        """
+        if stamp is None:
+            stamp = monotonic()
+        with self._cond:
+            if self._writing is None:
+                raise RuntimeError('begin_write() should be '
+                                   'called before end_write().')
+            if seq is None:
+                seq = self._seq + 1
+            elif seq <= self._seq:
+                raise ValueError('The sequence numbers should increase.')
+            self._seq = seq
+            self._slot_seqs[self._writing] = self._seq
+            self._slot_stamps[self._writing] = stamp
+            self._next_slot = (self._writing + 1) % self._num_slots
+            self._writing = None
+            self._cond.notify_all()
+            return self._seq
+
+    def put(self, stamp=None, seq=None, **arrays):
+        """
+        Copy a frame into the buffer.
+
+        Args:
+            stamp (float): timestamp of the frame. Defaults to the
+                monotonic clock.
+            seq (int): sequence number of the frame (see `end_write`).
+            **arrays: arrays of the frame.
+
+        Returns:
+            int: sequence number of the frame.
+        """
+        arrays = dict((name, np.asarray(arr))
+                      for name, arr in arrays.items())
+        slot = self.begin_write(**dict((name, (arr.shape, arr.dtype))
+                                       for name, arr in arrays.items()))
+        for name, arr in arrays.items():
+            np.copyto(slot[name], arr)
+        return self.end_write(stamp, seq)
+
+    def get_seq(self):
+        """
+        Return the sequence number of the latest frame.
+
+        Returns:
+            int: sequence number, 0 if there is no frame yet.
+        """
+        return self._seq
+
+    def is_valid(self, seq):
+        """
+        Check if a frame is still in the buffer.
+
+        Args:
+            seq (int): sequence number of the frame.
+
+        Returns:
+            bool: True if the frame has not been overwritten.
+        """
+        return seq > 0 and seq in self._slot_seqs
+
+    def get(self, seq, copy=False):
+        """
+        Return a frame by its sequence number.
+
+        Args:
+            seq (int): sequence number of the frame.
+            copy (bool): return copies of the arrays instead
+                of read-only views.
+
+        Returns:
+            dict: the arrays of the frame, plus `seq` and `stamp`.
+            None if the frame is not in the buffer.
+        """
+        with self._cond:
+            return self._get(seq, copy)
+
+    def get_latest(self, copy=False):
+        """
+        Return the latest frame.
+
+        Args:
+            copy (bool): return copies of the arrays instead
+                of read-only views.
+
+        Returns:
+            dict: the arrays of the frame, plus `seq` and `stamp`.
+            None if there is no frame yet.
+        """
+        with self._cond:
+            return self._get(self._seq, copy)
+
+    def wait_for_next(self, after_seq=None, timeout=None, copy=False):
+        """
+        Block until there is a frame newer than `after_seq`,
+        and return the latest frame.
+
+        Args:
+            after_seq (int): sequence number of the last frame the
+                caller has seen. If None, wait for the next frame.
+            timeout (float): maximum waiting time (seconds).
+            copy (bool): return copies of the arrays instead
+                of read-only views.
+
+        Returns:
+            dict: the arrays of the frame, plus `seq` and `stamp`.
+            None on timeout.
+        """
+        with self._cond:
+            if after_seq is None:
+                after_seq = self._seq
+            if timeout is None:
+                while self._seq <= after_seq:
+                    self._cond.wait()
+            else:
+                end_time = monotonic() + timeout
+                while self._seq <= after_seq:
+                    remaining = end_time - monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            return self._get(self._seq, copy)
+
+    def _get(self, seq, copy):
+        if not self.is_valid(seq):
+            return None
+        idx = self._slot_seqs.index(seq)
+        frame = {'seq': seq, 'stamp': self._slot_stamps[idx]}
+        for name, arr in self._slots[idx].items():
+            if copy:
+                arr = arr.copy()
+            else:
+                arr = arr.view()
+                arr.flags.writeable = False
+            frame[name] = arr
+        return frame
+
+
+class TimeSeriesBuffer(object):
+    """
+    A bounded history of timestamped values (e.g. joint states),
+    stored in two preallocated arrays: the timestamps and the values.
+    The timestamps should increase, so the values at a given time are
+    found by binary search. When the buffer is full, the oldest values
+    are dropped.
+
+    Each value is written twice, at index `i` and `i + capacity`
+    of arrays twice as long as the capacity, so the history
+    is always a contiguous slice of the arrays.
+
+    Args:
+        capacity (int): maximum number of values kept.
+        value_shape (tuple): shape of each value.
+        dtype (np.dtype): data type of the values. Use `object` to
+            store any python object (e.g. ROS messages). Only
+            `nearest` can be used in that case.
+    """
+
+    def __init__(self, capacity, value_shape=(), dtype=np.float64):
+        if capacity < 1:
+            raise ValueError('capacity should be a positive integer.')
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._stamps = np.zeros(2 * capacity, dtype=np.float64)
+        self._values = np.zeros((2 * capacity,) + tuple(value_shape),
+                                dtype=dtype)
+        # the history is [_start, _start + _size)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, stamp, value):
+        """
+        Add a value at the end of the history.
+
+        Args:
+            stamp (float): timestamp of the value.
+            value: the value (shape: `value_shape`).
+
+        Returns:
+            bool: True if the value is added, False if it is
+            dropped because its timestamp is not newer than
+            the last one.
+        """
+        with self._lock:
+            end = self._start + self._size
+            if self._size > 0 and stamp <= self._stamps[end - 1]:
+                return False
+            if self._size == self._capacity:
+                self._start += 1
+            else:
+                self._size += 1
+            if self._start == self._capacity:
+                self._start = 0
+            idx = (self._start + self._size - 1) % self._capacity
+            for i in (idx, idx + self._capacity):
+                self._stamps[i] = stamp
+                self._values[i] = value
+            return True
+
+    def clear(self):
+        """
+        Remove all the values.
+        """
+        with self._lock:
+            self._start = 0
+            self._size = 0
+
+    def get_range(self):
+        """
+        Return the timestamps of the oldest and the newest values.
+
+        Returns:
+            2-element tuple of float, None if the buffer is empty.
+        """
+        with self._lock:
+            if self._size == 0:
+                return None
+            return (float(self._stamps[self._start]),
+                    float(self._stamps[self._start + self._size - 1]))
+
+    def get_history(self):
+        """
+        Return a copy of the history.
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: timestamps, oldest first (shape: :math:`[N,]`).
+            - np.ndarray: values (shape: :math:`[N, ...]`).
+        """
+        with self._lock:
+            stamps, values = self._window()
+            return stamps.copy(), values.copy()
+
+    def query(self, t):
+        """
+        Return the values at the given times, linearly interpolated
+        between the two values around each time.
+
+        Args:
+            t (float or np.ndarray): time(s), within the range
+                returned by `get_range`.
+
+        Returns:
+            np.ndarray: values at the times (shape: `value_shape`
+            for a single time, :math:`[N,]` + `value_shape` for N times).
+        """
+        t = np.asarray(t, dtype=np.float64)
+        with self._lock:
+            stamps, values = self._window()
+            if stamps.size == 0:
+                raise ValueError('The history is empty.')
+            if np.any(t < stamps[0]) or np.any(t > stamps[-1]):
+                raise ValueError('The time should be between %f and '
+                                 '%f.' % (stamps[0], stamps[-1]))
+            if stamps.size == 1:
+                return np.broadcast_to(values[0],
+                                       t.shape + values.shape[1:]).copy()
+            # index of the value after each time
+            hi = np.clip(np.searchsorted(stamps, t), 1, stamps.size - 1)
+            lo = hi - 1
+            w = (t - stamps[lo]) / (stamps[hi] - stamps[lo])
+            w = w.reshape(w.shape + (1,) * (values.ndim - 1))
+            return values[lo] + w * (values[hi] - values[lo])
+
+    def nearest(self, t):
+        """
+        Return the value whose timestamp is the closest to `t`.
+
+        Args:
+            t (float): time.
+
+        Returns:
+            2-element tuple containing
+
+            - float: timestamp of the value.
+            - the value.
+
+            None if the buffer is empty.
+        """
+        with self._lock:
+            stamps, values = self._window()
+            if stamps.size == 0:
+                return None
+            idx = int(np.searchsorted(stamps, t))
+            if idx == stamps.size or \
+                    (idx > 0 and t - stamps[idx - 1] <= stamps[idx] - t):
+                idx -= 1
+            return float(stamps[idx]), values[idx]
+
+    def _window(self):
+        """
+        Return views of the timestamps and the values in the history.
+        """
+        end = self._start + self._size
+        return self._stamps[self._start:end], self._values[self._start:end]
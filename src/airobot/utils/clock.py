@@ -0,0 +1,136 @@
+"""
+Clocks used by the blocking calls (e.g. `set_jpos(wait=True)`)
+to measure timeouts and to wait for new robot states.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+import time
+
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+class WallClock(object):
+    """
+    Wall clock. There is no notification when the robot state
+    changes, so waiting for an update sleeps for a short period.
+
+    Args:
+        poll_period (float): how long `wait_for_update` sleeps (seconds).
+    """
+
+    def __init__(self, poll_period=0.001):
+        self._poll_period = poll_period
+
+    def now(self):
+        """
+        Return the current time.
+
+        Returns:
+            float: current time (seconds).
+        """
+        return monotonic()
+
+    def get_seq(self):
+        """
+        Return the update counter. The wall clock
+        has no updates, so it is always 0.
+
+        Returns:
+            int: update counter.
+        """
+        return 0
+
+    def wait_for_update(self, seq=None, timeout=None):
+        """
+        Sleep for one polling period.
+
+        Args:
+            seq (int): not used.
+            timeout (float): maximum waiting time (seconds).
+
+        Returns:
+            bool: always True.
+        """
+        period = self._poll_period
+        if timeout is not None:
+            period = min(period, timeout)
+        time.sleep(period)
+        return True
+
+
+class EventClock(object):
+    """
+    A clock whose owner calls `notify` every time the robot
+    state is updated (e.g. after each simulation step or when
+    a new joint state message arrives). Waiting threads wake
+    up on the update instead of polling.
+
+    Args:
+        time_func (callable): function that returns the current
+            time of this clock (e.g. simulation time, ROS time).
+    """
+
+    def __init__(self, time_func):
+        self._time_func = time_func
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    def now(self):
+        """
+        Return the current time.
+
+        Returns:
+            float: current time (seconds).
+        """
+        return self._time_func()
+
+    def get_seq(self):
+        """
+        Return the update counter.
+
+        Returns:
+            int: number of updates so far.
+        """
+        return self._seq
+
+    def notify(self):
+        """
+        Signal that the state has been updated and wake up
+        the waiting threads.
+        """
+        with self._cond:
+            self._seq += 1
+            self._cond.notify_all()
+
+    def wait_for_update(self, seq=None, timeout=None):
+        """
+        Block until there is an update after `seq`.
+
+        Args:
+            seq (int): update counter returned by `get_seq`
+                before the state was checked. If it is None,
+                wait for the next update.
+            timeout (float): maximum waiting time in wall-clock
+                seconds, so that the caller does not hang if the
+                updates stop (e.g. the simulation is paused).
+
+        Returns:
+            bool: True if there is a new update, False on timeout.
+        """
+        with self._cond:
+            if seq is None:
+                seq = self._seq
+            if timeout is None:
+                while self._seq == seq:
+                    self._cond.wait()
+                return True
+            end_time = monotonic() + timeout
+            while self._seq == seq:
+                remaining = end_time - monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
@@ -4,6 +4,7 @@ from __future__ import print_function
 
 import ast
 import glob
+import math
 import os
 import shutil
 import sys
@@ -42,19 +43,216 @@ def clamp(n, minn, maxn):
     return max(min(maxn, n), minn)
 
 
+class _ScalarOps(object):
+    """
+    Math functions for the components of a single rotation
+    (python floats), which are much faster than numpy on scalars.
+    """
+    atan2 = staticmethod(math.atan2)
+    sqrt = staticmethod(math.sqrt)
+    sin = staticmethod(math.sin)
+    cos = staticmethod(math.cos)
+    hypot = staticmethod(math.hypot)
+    acos = staticmethod(math.acos)
+
+    @staticmethod
+    def where(cond, x, y):
+        return x if cond else y
+
+    @staticmethod
+    def clip(x, low, high):
+        return min(max(x, low), high)
+
+
+class _ArrayOps(object):
+    """
+    Math functions for the components of a batch of rotations.
+    """
+    atan2 = staticmethod(np.arctan2)
+    sqrt = staticmethod(np.sqrt)
+    sin = staticmethod(np.sin)
+    cos = staticmethod(np.cos)
+    hypot = staticmethod(np.hypot)
+    acos = staticmethod(np.arccos)
+    where = staticmethod(np.where)
+    clip = staticmethod(np.clip)
+
+
+def _split(arr, size, name):
+    """
+    Check that the last axis of `arr` has `size` elements, and return
+    its components: python floats for a single vector, or arrays for
+    a batch of vectors (shape: :math:`[N, size]`).
+
+    Returns:
+        3-element tuple containing
+
+        - list: the components.
+        - class: the math functions for the components.
+        - bool: True for a batch.
+    """
+    arr = np.asarray(arr, dtype=np.float64)
+    if arr.ndim == 1 and arr.shape[0] == size:
+        return arr.tolist(), _ScalarOps, False
+    if arr.ndim == 2 and arr.shape[1] == size:
+        # contiguous components are faster to compute with
+        return list(np.ascontiguousarray(arr.T)), _ArrayOps, True
+    raise ValueError('%s should have shape [%d,] or [N, %d].' % (name, size,
+                                                                 size))
+
+
+def _split_quat(quat):
+    """
+    Return the components of normalized quaternions (see `_split`).
+    """
+    (x, y, z, w), ops, batched = _split(quat, 4, 'Quaternions')
+    norm = ops.sqrt(x * x + y * y + z * z + w * w)
+    return [x / norm, y / norm, z / norm, w / norm], ops, batched
+
+
+def _check_rot(rot):
+    """
+    Return rotation matrices as an array, checking
+    that their shape is :math:`[3, 3]` or :math:`[N, 3, 3]`.
+    """
+    rot = np.asarray(rot, dtype=np.float64)
+    if rot.shape[-2:] != (3, 3) or rot.ndim > 3:
+        raise ValueError('Rotation matrices should have '
+                         'shape [3, 3] or [N, 3, 3].')
+    return rot
+
+
+def _split_rot(rot):
+    """
+    Return the elements of rotation matrices in row-major order
+    (see `_split`).
+    """
+    rot = _check_rot(rot)
+    return _split(rot.reshape(rot.shape[:-2] + (9,)), 9,
+                  'Rotation matrices')
+
+
+def _merge(comps, batched, shape):
+    """
+    Write the components computed by a kernel into an array
+    (shape: `shape`, or :math:`[N]` + `shape` for a batch).
+    The components of a batch may include python floats.
+    """
+    if not batched:
+        return np.array(comps).reshape(shape)
+    num = np.broadcast(*comps).shape[0]
+    out = np.empty((num,) + shape)
+    flat = out.reshape(num, len(comps))
+    for i, comp in enumerate(comps):
+        flat[:, i] = comp
+    return out
+
+
+def _quat2rot(x, y, z, w):
+    # the quaternion does not need to be normalized
+    scale = 2 / (x * x + y * y + z * z + w * w)
+    x2, y2, z2 = x * scale, y * scale, z * scale
+    xx, yy, zz = x * x2, y * y2, z * z2
+    xy, xz, yz = x * y2, x * z2, y * z2
+    xw, yw, zw = w * x2, w * y2, w * z2
+    return [1 - yy - zz, xy - zw, xz + yw,
+            xy + zw, 1 - xx - zz, yz - xw,
+            xz - yw, yz + xw, 1 - xx - yy]
+
+
+def _quat2euler_xyz(x, y, z, w, ops):
+    roll = ops.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    # more accurate than asin near +-pi/2
+    sin_pitch = 2 * (w * y - x * z)
+    pitch = 2 * ops.atan2(ops.sqrt(abs(1 + sin_pitch)),
+                          ops.sqrt(abs(1 - sin_pitch))) - math.pi / 2
+    yaw = ops.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return [roll, pitch, yaw]
+
+
+def _euler_xyz2quat(roll, pitch, yaw, ops):
+    cr, cp, cy = ops.cos(roll / 2), ops.cos(pitch / 2), ops.cos(yaw / 2)
+    sr, sp, sy = ops.sin(roll / 2), ops.sin(pitch / 2), ops.sin(yaw / 2)
+    return [sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy,
+            cr * cp * cy + sr * sp * sy]
+
+
+def _quat_multiply(q1, q2):
+    x1, y1, z1, w1 = q1
+    x2, y2, z2, w2 = q2
+    return [w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+            w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2]
+
+
+def _rotvec2quat(vx, vy, vz, ops):
+    angle = ops.sqrt(vx * vx + vy * vy + vz * vz)
+    small = angle < 1e-3
+    # sin(angle / 2) / angle, with its taylor series for small angles
+    angle2 = angle * angle
+    scale = ops.where(small,
+                      0.5 - angle2 / 48 + angle2 * angle2 / 3840,
+                      ops.sin(angle / 2) / ops.where(small, 1, angle))
+    return [scale * vx, scale * vy, scale * vz, ops.cos(angle / 2)]
+
+
+def _rot2quat(mats):
+    """
+    Convert rotation matrices (shape: :math:`[N, 3, 3]`) to
+    quaternions (shape: :math:`[N, 4]`). The largest quaternion
+    component is computed from the diagonal, the others from the
+    off-diagonal elements.
+    """
+    num = mats.shape[0]
+    diag = np.empty((num, 4))
+    diag[:, :3] = np.diagonal(mats, axis1=1, axis2=2)
+    diag[:, 3] = diag[:, :3].sum(axis=1)
+    choice = diag.argmax(axis=1)
+    quat = np.empty((num, 4))
+    ind = np.nonzero(choice != 3)[0]
+    if ind.size > 0:
+        i = choice[ind]
+        j = (i + 1) % 3
+        k = (j + 1) % 3
+        quat[ind, i] = 1 - diag[ind, 3] + 2 * mats[ind, i, i]
+        quat[ind, j] = mats[ind, j, i] + mats[ind, i, j]
+        quat[ind, k] = mats[ind, k, i] + mats[ind, i, k]
+        quat[ind, 3] = mats[ind, k, j] - mats[ind, j, k]
+    ind = np.nonzero(choice == 3)[0]
+    if ind.size > 0:
+        quat[ind, 0] = mats[ind, 2, 1] - mats[ind, 1, 2]
+        quat[ind, 1] = mats[ind, 0, 2] - mats[ind, 2, 0]
+        quat[ind, 2] = mats[ind, 1, 0] - mats[ind, 0, 1]
+        quat[ind, 3] = 1 + diag[ind, 3]
+    quat /= np.linalg.norm(quat, axis=1, keepdims=True)
+    return quat
+
+
+def _check_axes(axes):
+    if len(axes) != 3 or not (set(axes) <= set('xyz') or
+                              set(axes) <= set('XYZ')):
+        raise ValueError('axes should be 3 characters from {x, y, z} '
+                         '(extrinsic) or {X, Y, Z} (intrinsic).')
+
+
 def quat2rot(quat):
     """
     Convert quaternion to rotation matrix.
 
     Args:
-        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`).
+        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`
+            or :math:`[N, 4]`).
 
     Returns:
-        np.ndarray: rotation matrix (shape: :math:`[3, 3]`).
+        np.ndarray: rotation matrix (shape: :math:`[3, 3]`
+        or :math:`[N, 3, 3]`).
 
     """
-    r = R.from_quat(quat)
-    return r.as_dcm()
+    comps, _, batched = _split(quat, 4, 'Quaternions')
+    return _merge(_quat2rot(*comps), batched, (3, 3))
 
 
 def quat2euler(quat, axes='xyz'):
@@ -62,7 +260,8 @@ def quat2euler(quat, axes='xyz'):
     Convert quaternion to euler angles.
 
     Args:
-        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`).
+        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`
+            or :math:`[N, 4]`).
         axes (str): Specifies sequence of axes for rotations.
             3 characters belonging to the set {'X', 'Y', 'Z'}
             for intrinsic rotations (rotation about the axes of a
@@ -71,10 +270,14 @@ def quat2euler(quat, axes='xyz'):
             the axes of the fixed coordinate system).
 
     Returns:
-        np.ndarray: euler angles (shape: :math:`[3,]`).
+        np.ndarray: euler angles (shape: :math:`[3,]` or :math:`[N, 3]`).
     """
-    r = R.from_quat(quat)
-    return r.as_euler(axes)
+    if axes != 'xyz':
+        # other axes sequences are less common, scipy handles them
+        _check_axes(axes)
+        return R.from_quat(quat).as_euler(axes)
+    comps, ops, batched = _split_quat(quat)
+    return _merge(_quat2euler_xyz(*comps, ops=ops), batched, (3,))
 
 
 def quat2rotvec(quat):
@@ -82,13 +285,25 @@ def quat2rotvec(quat):
     Convert quaternion to rotation vector.
 
     Arguments:
-        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`).
+        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`
+            or :math:`[N, 4]`).
 
     Returns:
-        np.ndarray: rotation vector (shape: :math:`[3,]`).
-    """
-    r = R.from_quat(quat)
-    return r.as_rotvec()
+        np.ndarray: rotation vector (shape: :math:`[3,]` or :math:`[N, 3]`).
+    """
+    (x, y, z, w), ops, batched = _split_quat(quat)
+    # the rotation angle is in [0, pi]
+    sign = ops.where(w < 0, -1., 1.)
+    sin_half = ops.sqrt(x * x + y * y + z * z)
+    angle = 2 * ops.atan2(sin_half, sign * w)
+    small = angle < 1e-3
+    # angle / sin(angle / 2), with its taylor series for small angles
+    angle2 = angle * angle
+    scale = ops.where(small,
+                      2 + angle2 / 12 + 7 * angle2 * angle2 / 2880,
+                      angle / ops.where(small, 1, sin_half))
+    scale = scale * sign
+    return _merge([scale * x, scale * y, scale * z], batched, (3,))
 
 
 def quat_inverse(quat):
@@ -96,13 +311,15 @@ def quat_inverse(quat):
     Return the quaternion inverse.
 
     Args:
-        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`).
+        quat (list or np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`
+            or :math:`[N, 4]`).
 
     Returns:
-        np.ndarray: inverse quaternion (shape: :math:`[4,]`).
+        np.ndarray: inverse quaternion (shape: :math:`[4,]`
+        or :math:`[N, 4]`).
     """
-    r = R.from_quat(quat)
-    return r.inv().as_quat()
+    (x, y, z, w), _, batched = _split_quat(quat)
+    return _merge([-x, -y, -z, w], batched, (4,))
 
 
 def quat_multiply(quat1, quat2):
@@ -111,17 +328,17 @@ def quat_multiply(quat1, quat2):
 
     Args:
         quat1 (list or np.ndarray): first quaternion [x,y,z,w]
-            (shape: :math:`[4,]`).
+            (shape: :math:`[4,]` or :math:`[N, 4]`).
         quat2 (list or np.ndarray): second quaternion [x,y,z,w]
-            (shape: :math:`[4,]`).
+            (shape: :math:`[4,]` or :math:`[N, 4]`).
 
     Returns:
-        np.ndarray: quat1 * quat2 (shape: :math:`[4,]`).
+        np.ndarray: quat1 * quat2 (shape: :math:`[4,]` or :math:`[N, 4]`).
     """
-    r1 = R.from_quat(quat1)
-    r2 = R.from_quat(quat2)
-    r = r1 * r2
-    return r.as_quat()
+    comps1, _, batched1 = _split_quat(quat1)
+    comps2, _, batched2 = _split_quat(quat2)
+    return _merge(_quat_multiply(comps1, comps2),
+                  batched1 or batched2, (4,))
 
 
 def rotvec2rot(vec):
@@ -132,13 +349,16 @@ def rotvec2rot(vec):
 
     Args:
         vec (list or np.ndarray): a rotational vector. Its norm
-            represents the angle of rotation.
+            represents the angle of rotation (shape: :math:`[3,]`
+            or :math:`[N, 3]`).
 
     Returns:
-        np.ndarray: rotation matrix (shape: :math:`[3, 3]`).
+        np.ndarray: rotation matrix (shape: :math:`[3, 3]`
+        or :math:`[N, 3, 3]`).
     """
-    r = R.from_rotvec(vec)
-    return r.as_dcm()
+    comps, ops, batched = _split(vec, 3, 'Rotation vectors')
+    return _merge(_quat2rot(*_rotvec2quat(*comps, ops=ops)),
+                  batched, (3, 3))
 
 
 def rotvec2quat(vec):
@@ -149,13 +369,15 @@ def rotvec2quat(vec):
 
     Args:
         vec (list or np.ndarray): a rotational vector. Its norm
-            represents the angle of rotation.
+            represents the angle of rotation (shape: :math:`[3,]`
+            or :math:`[N, 3]`).
 
     Returns:
-        np.ndarray: quaternion [x,y,z,w] (shape: :math:`[4,]`).
+        np.ndarray: quaternion [x,y,z,w] (shape: :math:`[4,]`
+        or :math:`[N, 4]`).
     """
-    r = R.from_rotvec(vec)
-    return r.as_quat()
+    comps, ops, batched = _split(vec, 3, 'Rotation vectors')
+    return _merge(_rotvec2quat(*comps, ops=ops), batched, (4,))
 
 
 def rotvec2euler(vec, axes='xyz'):
@@ -166,7 +388,8 @@ def rotvec2euler(vec, axes='xyz'):
 
     Args:
         vec (list or np.ndarray): a rotational vector. Its norm
-            represents the angle of rotation.
+            represents the angle of rotation (shape: :math:`[3,]`
+            or :math:`[N, 3]`).
         axes (str): Specifies sequence of axes for rotations.
             3 characters belonging to the set {'X', 'Y', 'Z'}
             for intrinsic rotations (rotation about the axes of a
@@ -175,10 +398,9 @@ def rotvec2euler(vec, axes='xyz'):
             the axes of the fixed coordinate system).
 
     Returns:
-        np.ndarray: euler angles (shape: :math:`[3,]`).
+        np.ndarray: euler angles (shape: :math:`[3,]` or :math:`[N, 3]`).
     """
-    r = R.from_rotvec(vec)
-    return r.as_euler(axes)
+    return quat2euler(rotvec2quat(vec), axes)
 
 
 def euler2rot(euler, axes='xyz'):
@@ -186,7 +408,8 @@ def euler2rot(euler, axes='xyz'):
     Convert euler angles to rotation matrix.
 
     Args:
-        euler (list or np.ndarray): euler angles (shape: :math:`[3,]`).
+        euler (list or np.ndarray): euler angles (shape: :math:`[3,]`
+            or :math:`[N, 3]`).
         axes (str): Specifies sequence of axes for rotations.
             3 characters belonging to the set {'X', 'Y', 'Z'}
             for intrinsic rotations (rotation about the axes of a
@@ -195,10 +418,18 @@ def euler2rot(euler, axes='xyz'):
             the axes of the fixed coordinate system).
 
     Returns:
-        np.ndarray: rotation matrix (shape: :math:`[3, 3]`).
+        np.ndarray: rotation matrix (shape: :math:`[3, 3]`
+        or :math:`[N, 3, 3]`).
     """
-    r = R.from_euler(axes, euler)
-    return r.as_dcm()
+    if axes != 'xyz':
+        return quat2rot(euler2quat(euler, axes))
+    (roll, pitch, yaw), ops, batched = _split(euler, 3, 'Euler angles')
+    cr, cp, cy = ops.cos(roll), ops.cos(pitch), ops.cos(yaw)
+    sr, sp, sy = ops.sin(roll), ops.sin(pitch), ops.sin(yaw)
+    # Rz(yaw) * Ry(pitch) * Rx(roll)
+    return _merge([cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr,
+                   sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr,
+                   -sp, cp * sr, cp * cr], batched, (3, 3))
 
 
 def euler2quat(euler, axes='xyz'):
@@ -206,7 +437,8 @@ def euler2quat(euler, axes='xyz'):
     Convert euler angles to quaternion.
 
     Args:
-        euler (list or np.ndarray): euler angles (shape: :math:`[3,]`).
+        euler (list or np.ndarray): euler angles (shape: :math:`[3,]`
+            or :math:`[N, 3]`).
         axes (str): Specifies sequence of axes for rotations.
             3 characters belonging to the set {'X', 'Y', 'Z'}
             for intrinsic rotations (rotation about the axes of a
@@ -215,10 +447,24 @@ def euler2quat(euler, axes='xyz'):
             the axes of the fixed coordinate system).
 
     Returns:
-        np.ndarray: quaternion [x,y,z,w] (shape: :math:`[4,]`).
-    """
-    r = R.from_euler(axes, euler)
-    return r.as_quat()
+        np.ndarray: quaternion [x,y,z,w] (shape: :math:`[4,]`
+        or :math:`[N, 4]`).
+    """
+    angles, ops, batched = _split(euler, 3, 'Euler angles')
+    if axes == 'xyz':
+        return _merge(_euler_xyz2quat(*angles, ops=ops), batched, (4,))
+    _check_axes(axes)
+    # compose the rotations about each axis
+    quats = []
+    for axis, angle in zip(axes.lower(), angles):
+        quat = [0., 0., 0., ops.cos(angle / 2)]
+        quat['xyz'.index(axis)] = ops.sin(angle / 2)
+        quats.append(quat)
+    if axes.islower():
+        # extrinsic rotations are applied from the left
+        quats = quats[::-1]
+    quat = _quat_multiply(_quat_multiply(quats[0], quats[1]), quats[2])
+    return _merge(quat, batched, (4,))
 
 
 def rot2quat(rot):
@@ -226,13 +472,29 @@ def rot2quat(rot):
     Convert rotation matrix to quaternion.
 
     Args:
-        rot (np.ndarray): rotation matrix (shape: :math:`[3, 3]`).
+        rot (np.ndarray): rotation matrix (shape: :math:`[3, 3]`
+            or :math:`[N, 3, 3]`).
 
     Returns:
-        np.ndarray: quaternion [x,y,z,w] (shape: :math:`[4,]`).
-    """
-    r = R.from_dcm(rot)
-    return r.as_quat()
+        np.ndarray: quaternion [x,y,z,w] (shape: :math:`[4,]`
+        or :math:`[N, 4]`).
+    """
+    rot = _check_rot(rot)
+    if rot.ndim == 3:
+        return _rot2quat(rot)
+    mats, ops, _ = _split_rot(rot)
+    m00, m01, m02, m10, m11, m12, m20, m21, m22 = mats
+    trace = m00 + m11 + m22
+    if trace >= max(m00, m11, m22):
+        quat = [m21 - m12, m02 - m20, m10 - m01, 1 + trace]
+    elif m00 >= max(m11, m22):
+        quat = [1 - trace + 2 * m00, m10 + m01, m20 + m02, m21 - m12]
+    elif m11 >= m22:
+        quat = [m01 + m10, 1 - trace + 2 * m11, m21 + m12, m02 - m20]
+    else:
+        quat = [m02 + m20, m12 + m21, 1 - trace + 2 * m22, m10 - m01]
+    norm = ops.sqrt(sum(q * q for q in quat))
+    return np.array([q / norm for q in quat])
 
 
 def rot2euler(rot, axes='xyz'):
@@ -240,7 +502,8 @@ def rot2euler(rot, axes='xyz'):
     Convert rotation matrix to euler angles.
 
     Args:
-        rot (np.ndarray): rotation matrix (shape: :math:`[3, 3]`).
+        rot (np.ndarray): rotation matrix (shape: :math:`[3, 3]`
+            or :math:`[N, 3, 3]`).
         axes (str): Specifies sequence of axes for rotations.
             3 characters belonging to the set {'X', 'Y', 'Z'}
             for intrinsic rotations (rotation about the axes of a
@@ -249,10 +512,93 @@ def rot2euler(rot, axes='xyz'):
             the axes of the fixed coordinate system).
 
     Returns:
-        np.ndarray: euler angles (shape: :math:`[3,]`).
+        np.ndarray: euler angles (shape: :math:`[3,]` or :math:`[N, 3]`).
+    """
+    if axes != 'xyz':
+        return quat2euler(rot2quat(rot), axes)
+    (m00, _, _, m10, _, _, m20, m21, m22), ops, batched = _split_rot(rot)
+    return _merge([ops.atan2(m21, m22),
+                   ops.atan2(-m20, ops.hypot(m00, m10)),
+                   ops.atan2(m10, m00)], batched, (3,))
+
+
+class Pose(object):
+    """
+    A pose given by a position and a quaternion. The rotation matrix
+    and the euler angles are computed on first access and cached.
+
+    For backward compatibility, a pose can also be indexed and
+    unpacked like a 4-element tuple::
+
+        pos, quat, rot_mat, euler = pose
+        pos = pose[0]
+
+    Unpacking computes all the representations, use
+    `pose.pos` and `pose.quat` when only those are needed.
+
+    Args:
+        pos (list or np.ndarray): x, y, z position (shape: :math:`[3,]`).
+        quat (list or np.ndarray): quaternion [x,y,z,w]
+            (shape: :math:`[4,]`).
+
+    Attributes:
+        pos (np.ndarray): x, y, z position (shape: :math:`[3,]`).
+        quat (np.ndarray): quaternion [x,y,z,w] (shape: :math:`[4,]`).
     """
-    r = R.from_dcm(rot)
-    return r.as_euler(axes)
+    __slots__ = ('pos', 'quat', '_rot_mat', '_euler')
+
+    def __init__(self, pos, quat):
+        self.pos = np.array(pos, dtype=np.float64)
+        self.quat = np.array(quat, dtype=np.float64)
+        self._rot_mat = None
+        self._euler = None
+
+    @property
+    def rot_mat(self):
+        """
+        np.ndarray: rotation matrix (shape: :math:`[3, 3]`).
+        """
+        if self._rot_mat is None:
+            self._rot_mat = quat2rot(self.quat)
+        return self._rot_mat
+
+    @property
+    def euler(self):
+        """
+        np.ndarray: euler angles (roll, pitch, yaw with static
+        reference frame) (shape: :math:`[3,]`).
+        """
+        if self._euler is None:
+            self._euler = quat2euler(self.quat, axes='xyz')
+        return self._euler
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        if index < 0:
+            index += 4
+        if index == 0:
+            return self.pos
+        if index == 1:
+            return self.quat
+        if index == 2:
+            return self.rot_mat
+        if index == 3:
+            return self.euler
+        raise IndexError('Pose index out of range.')
+
+    def __iter__(self):
+        yield self.pos
+        yield self.quat
+        yield self.rot_mat
+        yield self.euler
+
+    def __repr__(self):
+        return 'Pose(pos=%s, quat=%s)' % (self.pos.tolist(),
+                                          self.quat.tolist())
 
 
 def print_red(skk):
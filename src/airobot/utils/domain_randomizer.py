@@ -0,0 +1,295 @@
+"""
+Domain randomization of a pybullet scene from a declarative spec.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from airobot.utils.pb_util import TextureModder
+
+# arguments of `RGBDCameraPybullet.setup_camera` and their defaults
+_CAMERA_PARAMS = [('focus_pt', [0, 0, 0]),
+                  ('dist', 3),
+                  ('yaw', 0),
+                  ('pitch', 0),
+                  ('roll', 0)]
+# light parameters and the `getCameraImage` arguments they set
+_LIGHT_PARAMS = [('direction', 'lightDirection'),
+                 ('color', 'lightColor'),
+                 ('distance', 'lightDistance')]
+
+
+class DomainRandomizer(object):
+    """
+    Randomize the colors, textures and dynamics of the links, the
+    camera pose and the light at each reset, from a declarative spec.
+
+    All the parameters are drawn from uniform distributions with one
+    numpy call per reset, and only the parameters whose values have
+    changed since the last reset are applied to the scene (e.g. the
+    fixed parameters are applied once). The sampled values can be
+    recorded and applied again with `reset(values)`.
+
+    The spec is a dict with any of the following keys. A range is a
+    (low, high) pair, where low and high are numbers or lists
+    (for the vector parameters). Use low == high for a fixed value.
+
+    - `rgba`: list of {`body`, `links`, `low`, `high`}, the rgba
+      color range of the links (any opaque color by default).
+      `links` is a list of link indices, all the links
+      of the body if it is missing or None.
+    - `texture`: list of {`body`, `links`, `files`}, a texture file
+      is chosen at random for each link.
+    - `dynamics`: list of {`body`, `links`, <name>: range, ...},
+      where <name> is an argument of `changeDynamics` that takes a
+      number (e.g. `mass`, `lateralFriction`).
+    - `camera`: {<name>: range, ...}, where <name> is an argument of
+      `RGBDCameraPybullet.setup_camera` (`focus_pt`, `dist`, `yaw`,
+      `pitch`, `roll`). The missing ones keep their default values.
+    - `light`: {`direction`: range, `color`: range, `distance`: range},
+      passed to `getCameraImage` (see `get_render_kwargs`).
+
+    Example::
+
+        spec = {'rgba': [{'body': box_id, 'low': [0, 0, 0, 1],
+                          'high': [1, 1, 1, 1]}],
+                'dynamics': [{'body': box_id,
+                              'lateralFriction': (0.5, 1.0),
+                              'mass': (0.1, 0.5)}],
+                'camera': {'focus_pt': ([0.65, -0.05, 0.95],
+                                        [0.75, 0.05, 1.05]),
+                           'dist': (1.4, 1.6),
+                           'yaw': (85, 95),
+                           'pitch': (-50, -40)}}
+        randomizer = DomainRandomizer(robot.pb_client, spec,
+                                      camera=robot.cam)
+
+    Args:
+        pb_client (BulletClient): pybullet client.
+        spec (dict): randomization spec.
+        camera (RGBDCameraPybullet): camera to randomize,
+            required if the spec has `camera`.
+        seed (int): seed of the random number generator.
+        record (bool): keep the values sampled at each reset
+            in `records`.
+
+    Attributes:
+        param_names (list): name of each parameter
+            (e.g. `dynamics/3/-1/mass`).
+        records (list): values (np.ndarray) sampled at each reset.
+    """
+
+    def __init__(self, pb_client, spec, camera=None, seed=None,
+                 record=True):
+        self._pb = pb_client
+        self._camera = camera
+        self._rng = np.random.RandomState(seed)
+        self._record = record
+        self.records = []
+        self.param_names = []
+        # (kind, key, start, end) of each parameter, where start and
+        # end are the indices of its values in the flat arrays
+        self._params = []
+        self._lows = []
+        self._highs = []
+        self._discrete = []
+        self._tex_files = {}
+        self._texture_modder = None
+        for item in spec.get('rgba', []):
+            for link in self._get_links(item):
+                self._add_param('rgba', (item['body'], link),
+                                item.get('low', [0, 0, 0, 1]),
+                                item.get('high', [1, 1, 1, 1]))
+        for item in spec.get('texture', []):
+            for link in self._get_links(item):
+                key = (item['body'], link)
+                self._tex_files[key] = list(item['files'])
+                self._add_param('texture', key, 0, len(item['files']),
+                                discrete=True)
+        for item in spec.get('dynamics', []):
+            names = sorted(name for name in item
+                           if name not in ('body', 'links'))
+            for link in self._get_links(item):
+                for name in names:
+                    self._add_param('dynamics', (item['body'], link, name),
+                                    *item[name])
+        if 'camera' in spec:
+            if camera is None:
+                raise ValueError('A camera is needed to '
+                                 'randomize the camera pose.')
+            for name, default in _CAMERA_PARAMS:
+                low, high = spec['camera'].get(name, (default, default))
+                self._add_param('camera', name, low, high)
+        for name, _ in _LIGHT_PARAMS:
+            if name in spec.get('light', {}):
+                self._add_param('light', name, *spec['light'][name])
+        if self._tex_files:
+            self._texture_modder = TextureModder(pb_client.get_client_id())
+        self._low = np.concatenate(self._lows or [np.zeros(0)])
+        self._high = np.concatenate(self._highs or [np.zeros(0)])
+        self._discrete = np.concatenate(self._discrete or
+                                        [np.zeros(0, dtype=bool)])
+        self._starts = np.array([param[2] for param in self._params],
+                                dtype=int)
+        # values applied to the scene
+        self._values = None
+        self._render_kwargs = {}
+
+    def sample(self):
+        """
+        Draw the values of all the parameters, without applying them.
+
+        Returns:
+            np.ndarray: values of the parameters, concatenated
+            (shape: :math:`[N,]`).
+        """
+        values = self._rng.uniform(size=self._low.size)
+        values *= self._high - self._low
+        values += self._low
+        # index of the texture file
+        values[self._discrete] = np.minimum(np.floor(values[self._discrete]),
+                                            self._high[self._discrete] - 1)
+        return values
+
+    def reset(self, values=None):
+        """
+        Sample new values of the parameters and apply the ones
+        that have changed to the scene.
+
+        Args:
+            values (np.ndarray): values to apply instead of sampling
+                (e.g. from `records`), shape: :math:`[N,]`.
+
+        Returns:
+            np.ndarray: values of the parameters (shape: :math:`[N,]`).
+        """
+        if values is None:
+            values = self.sample()
+        else:
+            values = np.array(values, dtype=np.float64)
+            if values.shape != self._low.shape:
+                raise ValueError('values should have %d '
+                                 'elements.' % self._low.size)
+        if self._values is None:
+            changed = np.ones(len(self._params), dtype=bool)
+        elif len(self._params) > 0:
+            changed = np.logical_or.reduceat(values != self._values,
+                                             self._starts)
+        else:
+            changed = []
+        dynamics = {}
+        camera_changed = False
+        for (kind, key, start, end), param_changed in zip(self._params,
+                                                          changed):
+            if not param_changed:
+                continue
+            value = values[start:end]
+            if kind == 'rgba':
+                self._pb.changeVisualShape(key[0], key[1],
+                                           rgbaColor=value.tolist())
+            elif kind == 'texture':
+                tex_file = self._tex_files[key][int(value[0])]
+                tex_id = self._texture_modder._get_texture(tex_file)[0]
+                self._pb.changeVisualShape(key[0], key[1],
+                                           textureUniqueId=tex_id)
+            elif kind == 'dynamics':
+                # one changeDynamics call per link
+                dynamics.setdefault(key[:2], {})[key[2]] = float(value[0])
+            elif kind == 'camera':
+                camera_changed = True
+            elif kind == 'light':
+                self._render_kwargs[dict(_LIGHT_PARAMS)[key]] = \
+                    value.tolist() if value.size > 1 else float(value[0])
+        for (body, link), kwargs in dynamics.items():
+            self._pb.changeDynamics(body, link, **kwargs)
+        if camera_changed:
+            self._setup_camera(values)
+        self._values = values
+        if self._record:
+            self.records.append(values.copy())
+        return values
+
+    def get_params(self, values=None):
+        """
+        Return the values of the parameters by name.
+
+        Args:
+            values (np.ndarray): values of the parameters. If None,
+                the values applied at the last reset.
+
+        Returns:
+            dict: {parameter name: value (float or list)}.
+        """
+        if values is None:
+            values = self._values
+        if values is None:
+            return {}
+        params = {}
+        for name, (_, _, start, end) in zip(self.param_names, self._params):
+            value = values[start:end]
+            params[name] = value.tolist() if value.size > 1 \
+                else float(value[0])
+        return params
+
+    def get_render_kwargs(self):
+        """
+        Return the randomized light parameters as `getCameraImage`
+        arguments, to be passed to the `get_images` of the cameras
+        (e.g. `cam.get_images(**randomizer.get_render_kwargs())`).
+
+        Note:
+            The light parameters are only used by
+            the TinyRenderer (`opengl_render=False`).
+
+        Returns:
+            dict: `getCameraImage` arguments.
+        """
+        return dict(self._render_kwargs)
+
+    def _add_param(self, kind, key, low, high, discrete=False):
+        """
+        Add a parameter drawn uniformly from [low, high].
+        """
+        low, high = np.broadcast_arrays(np.atleast_1d(low).astype(float),
+                                        np.atleast_1d(high).astype(float))
+        if np.any(low > high):
+            raise ValueError('Invalid range for %s %s: low should not be '
+                             'greater than high.' % (kind, str(key)))
+        start = self._params[-1][3] if self._params else 0
+        self._params.append((kind, key, start, start + low.size))
+        if isinstance(key, tuple):
+            name = '/'.join([kind] + [str(k) for k in key])
+        else:
+            name = '%s/%s' % (kind, key)
+        self.param_names.append(name)
+        self._lows.append(low)
+        self._highs.append(high)
+        self._discrete.append(np.full(low.size, discrete, dtype=bool))
+
+    def _get_links(self, item):
+        """
+        Return the link indices of a spec item.
+        """
+        links = item.get('links')
+        if links is not None:
+            return list(links)
+        num_jnts = self._pb.getNumJoints(item['body'])
+        # start from -1 for urdf that has no joint but one link
+        start = -1 if num_jnts == 0 else 0
+        return list(range(start, num_jnts))
+
+    def _setup_camera(self, values):
+        """
+        Set the camera pose from the camera parameters.
+        """
+        kwargs = {}
+        for kind, key, start, end in self._params:
+            if kind == 'camera':
+                value = values[start:end]
+                kwargs[key] = value.tolist() if value.size > 1 \
+                    else float(value[0])
+        self._camera.setup_camera(height=self._camera.img_height,
+                                  width=self._camera.img_width,
+                                  **kwargs)
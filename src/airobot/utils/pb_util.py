@@ -4,8 +4,10 @@ import os
 import pkgutil
 import platform
 import random
+import struct
 import threading
 import time
+import weakref
 from numbers import Number
 
 import cv2
@@ -13,14 +15,63 @@ import numpy as np
 import pybullet as p
 import pybullet_data
 
+import airobot as ar
+from airobot.utils.clock import EventClock
+from airobot.utils.clock import WallClock
+from airobot.utils.clock import monotonic
 from airobot.utils.common import clamp
 
 GRAVITY_CONST = -9.8
+# the realtime stepping thread restarts its schedule
+# if it is behind by more than this many seconds
+_RESYNC_THRESHOLD = 0.1
+
+_perf_counter = getattr(time, 'perf_counter', time.time)
+
+# pybullet functions (besides stepSimulation, resetSimulation and
+# removeBody) that change the state of the bodies, the state version
+# of the client is increased after each call
+_STATE_CHANGING_FUNCS = ['resetJointState',
+                         'resetJointStateMultiDof',
+                         'resetJointStatesMultiDof',
+                         'resetBasePositionAndOrientation',
+                         'resetBaseVelocity',
+                         'restoreState',
+                         'loadBullet']
+# pybullet functions that change what the cameras see without
+# changing the state of the existing bodies, they also increase
+# the state version
+_SCENE_CHANGING_FUNCS = ['loadURDF',
+                         'loadSDF',
+                         'loadMJCF',
+                         'loadSoftBody',
+                         'createMultiBody',
+                         'changeVisualShape',
+                         'resetVisualShapeData',
+                         'changeTexture']
+# pybullet functions whose calls are recorded in the scene log,
+# replaying the log in a new client builds a copy of the scene
+_SCENE_LOG_FUNCS = ['setAdditionalSearchPath',
+                    'loadURDF',
+                    'loadSDF',
+                    'loadMJCF',
+                    'createCollisionShape',
+                    'createCollisionShapeArray',
+                    'createVisualShape',
+                    'createVisualShapeArray',
+                    'createMultiBody',
+                    'loadTexture',
+                    'changeVisualShape',
+                    'changeTexture']
+# {pybullet client id: BulletClient} of the connected clients
+_BULLET_CLIENTS = weakref.WeakValueDictionary()
 
 
 def create_pybullet_client(gui=True,
                            realtime=True,
-                           opengl_render=True):
+                           opengl_render=True,
+                           time_dilation=1.0,
+                           scene_log=False):
     """
     Create a pybullet simulation client.
 
@@ -29,6 +80,13 @@ def create_pybullet_client(gui=True,
         realtime: use realtime simulation or step simuation.
         opengl_render (bool): use OpenGL (hardware renderer) to render
             RGB images.
+        time_dilation (float): how many times faster than the wall clock
+            the simulation runs in realtime mode (DIRECT mode only).
+            `None` or `float('inf')` steps the simulation as fast
+            as possible.
+        scene_log (bool): record the scene log from the start, so that
+            render workers can be attached after the scene is loaded
+            (see `BulletClient.get_scene_log`).
     """
     if gui:
         mode = p.GUI
@@ -36,7 +94,9 @@ def create_pybullet_client(gui=True,
         mode = p.DIRECT
     pb_client = BulletClient(connection_mode=mode,
                              realtime=realtime,
-                             opengl_render=opengl_render)
+                             opengl_render=opengl_render,
+                             time_dilation=time_dilation,
+                             scene_log=scene_log)
     pb_client.setAdditionalSearchPath(pybullet_data.getDataPath())
     return pb_client
 
@@ -55,23 +115,79 @@ class BulletClient:
         realtime (bool): whether to use realtime mode or not.
         opengl_render (bool): use OpenGL (hardware renderer) to render
             RGB images.
+        time_dilation (float): how many times faster than the wall clock
+            the simulation runs in realtime mode (DIRECT mode only).
+            `None` or `float('inf')` steps the simulation as fast
+            as possible.
+        scene_log (bool): record the scene log from the start, so that
+            render workers can be attached after the scene is loaded.
+            Otherwise, the scene log is only recorded while render
+            workers are attached (see `get_scene_log`).
 
     """
 
     def __init__(self,
                  connection_mode=None,
                  realtime=False,
-                 opengl_render=True):
+                 opengl_render=True,
+                 time_dilation=1.0,
+                 scene_log=False):
         self._in_realtime_mode = realtime
         self.opengl_render = opengl_render
         self._realtime_lock = threading.RLock()
+        # set when the realtime stepping thread should run
+        self._realtime_event = threading.Event()
+        self._time_dilation = self._check_time_dilation(time_dilation)
+        self._reset_step_stats()
+        # simulated time, advanced by every stepSimulation call
+        self._sim_time = 0.
+        self._step_count = 0
+        self._sim_clock = EventClock(self.get_sim_time)
+        self._wall_clock = WallClock()
+        self._gui_mode = False
+        # step hooks sorted by priority, the lists are replaced
+        # (not modified) when hooks are added or removed
+        self._pre_step_hooks = []
+        self._post_step_hooks = []
+        self._hook_count = 0
+        # increased whenever the state of the bodies may change
+        self._state_version = 0
+        # whether all the state changes go through this client
+        self._state_tracked = True
+        # {state_id: [body ids that exist when the state is saved]}
+        self._state_bodies = {}
+        # [(function name, args, kwargs, return value)] since the
+        # last resetSimulation, while the scene log is recorded
+        self._scene_log = []
+        # number of calls recorded before the first one in the log
+        self._scene_log_start = 0
+        # record the scene log even if it has no users
+        self._scene_log_keep = scene_log
+        # {user id: index of the first call the user still needs}
+        # of the users (render worker pools) of the scene log
+        self._scene_log_users = {}
+        self._scene_log_user_count = 0
+        # whether the log contains all the scene calls since
+        # the last resetSimulation
+        self._scene_log_complete = True
+        # the last setAdditionalSearchPath call, which
+        # is needed to replay the loading calls
+        self._search_path_call = None
         if connection_mode is None:
             self._client = p.connect(p.SHARED_MEMORY)
             if self._client >= 0:
+                _BULLET_CLIENTS[self._client] = self
+                # other clients can step the simulation
+                self._state_tracked = False
+                self._build_dispatch_table()
+                self._time_step = self._get_time_step()
                 return
             else:
                 connection_mode = p.DIRECT
         self._client = p.connect(connection_mode)
+        _BULLET_CLIENTS[self._client] = self
+        self._build_dispatch_table()
+        self._time_step = self._get_time_step()
         is_linux = platform.system() == 'Linux'
         if connection_mode == p.DIRECT and is_linux and opengl_render:
             # # using the eglRendererPlugin (hardware OpenGL acceleration)
@@ -97,15 +213,435 @@ class BulletClient:
                 pass
 
     def __getattr__(self, name):
-        """Inject the client id into Bullet functions."""
+        """
+        Inject the client id into Bullet functions. Only called
+        for the names that are not in the dispatch table
+        (e.g. pybullet constants).
+        """
         attribute = getattr(p, name)
         if inspect.isbuiltin(attribute):
             attribute = functools.partial(attribute,
                                           physicsClientId=self._client)
-        if name == "disconnect":
-            self._client = -1
         return attribute
 
+    def _build_dispatch_table(self):
+        """
+        Bind the client id to all the pybullet functions once
+        and store them as instance attributes, so that the calls
+        (e.g. `self.getJointStates`) are plain attribute lookups
+        and do not go through `__getattr__`.
+        """
+        self._dispatch_names = []
+        for name in dir(p):
+            if name.startswith('_') or hasattr(self.__class__, name):
+                continue
+            attribute = getattr(p, name)
+            if not inspect.isbuiltin(attribute):
+                continue
+            func = functools.partial(attribute,
+                                     physicsClientId=self._client)
+            if name in _SCENE_LOG_FUNCS:
+                func = self._log_scene_call(name, func)
+            if name in _STATE_CHANGING_FUNCS or \
+                    name in _SCENE_CHANGING_FUNCS:
+                func = self._bump_state_version_after(func)
+            self.__dict__[name] = func
+            self._dispatch_names.append(name)
+
+    def _bump_state_version_after(self, func):
+        @functools.wraps(getattr(func, 'func', func))
+        def wrapper(*args, **kwargs):
+            ret = func(*args, **kwargs)
+            self._state_version += 1
+            return ret
+        return wrapper
+
+    def _log_scene_call(self, name, func):
+        @functools.wraps(func.func)
+        def wrapper(*args, **kwargs):
+            ret = func(*args, **kwargs)
+            self._record_scene_call(name, args, kwargs, ret)
+            return ret
+        return wrapper
+
+    def _record_scene_call(self, name, args, kwargs, ret):
+        call = (name, args, kwargs, ret)
+        if name == 'setAdditionalSearchPath':
+            self._search_path_call = call
+        if self._scene_log_keep or self._scene_log_users:
+            self._scene_log.append(call)
+        elif name != 'setAdditionalSearchPath':
+            self._scene_log_complete = False
+
+    def _clear_dispatch_table(self):
+        for name in self.__dict__.pop('_dispatch_names', []):
+            self.__dict__.pop(name, None)
+
+    def disconnect(self):
+        """
+        Disconnect from the physics server.
+        """
+        client = self._client
+        self._client = -1
+        _BULLET_CLIENTS.pop(client, None)
+        self._clear_dispatch_table()
+        # wake up the realtime stepping thread so that it can exit
+        self._realtime_event.set()
+        p.disconnect(physicsClientId=client)
+
+    def stepSimulation(self):
+        """
+        Step the simulation once, advance the simulated
+        time and notify the threads waiting on the simulation clock.
+        """
+        p.stepSimulation(physicsClientId=self._client)
+        self._state_version += 1
+        self._step_count += 1
+        self._sim_time += self._time_step
+        self._sim_clock.notify()
+
+    def step(self, n=1, hooks=True):
+        """
+        Step the simulation `n` times. The pre-step hooks run
+        before each step and the post-step hooks run after each
+        step (see `add_step_hook`).
+
+        Args:
+            n (int): number of simulation steps.
+            hooks (bool): run the step hooks or not.
+        """
+        if hooks and (self._pre_step_hooks or self._post_step_hooks):
+            step_func = self._step_with_hooks
+        else:
+            step_func = self.stepSimulation
+        for _ in range(n):
+            step_func()
+
+    def add_step_hook(self, func, priority=0, when='pre', name=None):
+        """
+        Register a function to be called on every simulation step
+        taken by `step` or by the realtime stepping thread
+        (DIRECT mode). Calling `stepSimulation` directly
+        does not run the hooks.
+
+        Args:
+            func (callable): function without arguments.
+            priority (int): hooks with smaller priority values
+                run first. Hooks with the same priority run in
+                the order they were added.
+            when (str): 'pre' to run the hook before each step,
+                'post' to run it after each step.
+            name (str): name of the hook in the timing statistics.
+                Defaults to the function name.
+
+        Returns:
+            int: hook id, used by `remove_step_hook`.
+
+        """
+        if when not in ['pre', 'post']:
+            raise ValueError('when should be \'pre\' or \'post\'.')
+        if name is None:
+            name = getattr(func, '__name__', repr(func))
+        with self._realtime_lock:
+            self._hook_count += 1
+            hook = _StepHook(self._hook_count, func, priority, when, name)
+            attr = '_%s_step_hooks' % when
+            hooks = getattr(self, attr) + [hook]
+            hooks.sort(key=lambda x: (x.priority, x.hook_id))
+            setattr(self, attr, hooks)
+        return hook.hook_id
+
+    def remove_step_hook(self, hook_id):
+        """
+        Remove a hook registered by `add_step_hook`.
+
+        Args:
+            hook_id (int): hook id returned by `add_step_hook`.
+
+        Returns:
+            bool: whether the hook is found and removed.
+
+        """
+        with self._realtime_lock:
+            for attr in ['_pre_step_hooks', '_post_step_hooks']:
+                hooks = getattr(self, attr)
+                new_hooks = [h for h in hooks if h.hook_id != hook_id]
+                if len(new_hooks) != len(hooks):
+                    setattr(self, attr, new_hooks)
+                    return True
+        return False
+
+    def get_step_hook_stats(self):
+        """
+        Return the timing statistics of the step hooks,
+        in the order they run.
+
+        Returns:
+            list: a list of dictionaries, each containing
+
+            - hook_id (int): hook id.
+            - name (str): hook name.
+            - when (str): 'pre' or 'post'.
+            - priority (int): priority.
+            - calls (int): number of calls.
+            - total_time (float): total time spent in the hook (seconds).
+            - mean_time (float): mean time per call (seconds).
+            - max_time (float): maximum time of one call (seconds).
+
+        """
+        stats = []
+        for hook in self._pre_step_hooks + self._post_step_hooks:
+            mean_time = hook.total_time / hook.calls if hook.calls else 0.
+            stats.append({'hook_id': hook.hook_id,
+                          'name': hook.name,
+                          'when': hook.when,
+                          'priority': hook.priority,
+                          'calls': hook.calls,
+                          'total_time': hook.total_time,
+                          'mean_time': mean_time,
+                          'max_time': hook.max_time})
+        return stats
+
+    def reset_step_hook_stats(self):
+        """
+        Reset the timing statistics of the step hooks.
+        """
+        for hook in self._pre_step_hooks + self._post_step_hooks:
+            hook.reset_stats()
+
+    def setTimeStep(self, timeStep, *args, **kwargs):
+        """
+        Set the simulation time step (see pybullet.setTimeStep).
+        """
+        p.setTimeStep(timeStep, *args, physicsClientId=self._client, **kwargs)
+        self._time_step = self._get_time_step()
+
+    def setPhysicsEngineParameter(self, *args, **kwargs):
+        """
+        Set the physics engine parameters
+        (see pybullet.setPhysicsEngineParameter).
+        """
+        p.setPhysicsEngineParameter(*args, physicsClientId=self._client,
+                                    **kwargs)
+        self._time_step = self._get_time_step()
+
+    def resetSimulation(self, *args, **kwargs):
+        """
+        Remove all the objects and reset the simulation
+        (see pybullet.resetSimulation).
+        """
+        p.resetSimulation(*args, physicsClientId=self._client, **kwargs)
+        self._state_version += 1
+        self._time_step = self._get_time_step()
+        # the calls before the reset are not needed to copy the scene
+        self._scene_log_start += len(self._scene_log)
+        self._scene_log = []
+        self._scene_log_complete = True
+        if self._scene_log_keep or self._scene_log_users:
+            # the copies made before the reset are reset too
+            self._scene_log.append(('resetSimulation', args, kwargs, None))
+            if self._search_path_call is not None:
+                self._scene_log.append(self._search_path_call)
+        # the snapshots refer to the bodies that have been removed
+        self._state_bodies = {}
+
+    def removeBody(self, bodyUniqueId, *args, **kwargs):
+        """
+        Remove a body from the simulation (see pybullet.removeBody).
+        The snapshots taken by `save_state` that contain the body
+        cannot be restored anymore and are released.
+        """
+        ret = p.removeBody(bodyUniqueId, *args,
+                           physicsClientId=self._client, **kwargs)
+        self._state_version += 1
+        self._record_scene_call('removeBody', (bodyUniqueId,) + args,
+                                kwargs, ret)
+        stale_ids = [state_id for state_id, bodies
+                     in self._state_bodies.items() if bodyUniqueId in bodies]
+        for state_id in stale_ids:
+            self.remove_state(state_id)
+        return ret
+
+    def get_scene_log(self, start=0):
+        """
+        Return the recorded calls that load or remove bodies and
+        change their visual shapes (`loadURDF`, `createMultiBody`,
+        `changeVisualShape`, `resetSimulation`, etc.), in the order
+        they were made. Calling them in the same order in a new
+        client builds a copy of the scene with the same body ids
+        (see `airobot.utils.render_util`).
+
+        The calls are only recorded while the scene log has users
+        (see `attach_scene_log`). The calls made before the last
+        `resetSimulation`, and the calls that all the users have
+        released (see `release_scene_log`), are dropped.
+
+        Args:
+            start (int): index of the first call to return (the
+                value of `get_scene_log_end` at a previous query),
+                so that only the calls made after that query are
+                returned. If the calls after `start` have been
+                dropped, the log starts with `resetSimulation`.
+
+        Returns:
+            list: (function name, args, kwargs, return value) of
+            each call.
+        """
+        return self._scene_log[max(start - self._scene_log_start, 0):]
+
+    def get_scene_log_end(self):
+        """
+        Return the index of the next call that will be
+        recorded in the scene log.
+
+        Returns:
+            int: number of calls recorded so far.
+        """
+        return self._scene_log_start + len(self._scene_log)
+
+    def attach_scene_log(self):
+        """
+        Start recording the scene log for a new user (e.g. a
+        render worker pool). The log can only be used if it has
+        been recorded since the last `resetSimulation` and none
+        of its calls have been released, or the client is created
+        with `scene_log=True` and no other user has released calls.
+
+        Returns:
+            int: user id, used by `release_scene_log` and
+            `detach_scene_log`.
+
+        Raises:
+            RuntimeError: if bodies have been loaded or changed
+                while the scene log was not recorded, or the
+                calls that load them have been released.
+        """
+        if not self._scene_log_complete:
+            raise RuntimeError('The scene has been loaded without the '
+                               'scene log, so it cannot be copied. Create '
+                               'the pybullet client with scene_log=True, '
+                               'or attach the scene log before loading '
+                               'the scene.')
+        if not self._scene_log_keep and not self._scene_log_users and \
+                self._search_path_call is not None:
+            self._scene_log.append(self._search_path_call)
+        self._scene_log_user_count += 1
+        user_id = self._scene_log_user_count
+        self._scene_log_users[user_id] = self._scene_log_start
+        return user_id
+
+    def release_scene_log(self, user_id, end):
+        """
+        Tell that a user does not need the calls before `end`
+        anymore (e.g. they have been replayed by all the render
+        workers). The calls released by all the users are dropped.
+
+        Args:
+            user_id (int): user id returned by `attach_scene_log`.
+            end (int): index of the first call the user still needs.
+        """
+        start = self._scene_log_users[user_id]
+        self._scene_log_users[user_id] = max(start, end)
+        self._trim_scene_log()
+
+    def detach_scene_log(self, user_id):
+        """
+        Remove a user added by `attach_scene_log`. The scene log
+        stops being recorded and is dropped when it has no users
+        (unless the client is created with `scene_log=True`).
+
+        Args:
+            user_id (int): user id returned by `attach_scene_log`.
+        """
+        if self._scene_log_users.pop(user_id, None) is None:
+            return
+        if self._scene_log_users or self._scene_log_keep:
+            self._trim_scene_log()
+            return
+        scene_calls = [call for call in self._scene_log
+                       if call[0] not in ['resetSimulation',
+                                          'setAdditionalSearchPath']]
+        if scene_calls:
+            self._scene_log_complete = False
+        self._scene_log_start += len(self._scene_log)
+        self._scene_log = []
+
+    def _trim_scene_log(self):
+        """
+        Drop the calls that all the users of the scene log have
+        released. A new user cannot copy the scene afterwards.
+        """
+        if not self._scene_log_users:
+            return
+        num_calls = min(self._scene_log_users.values()) - \
+            self._scene_log_start
+        if num_calls > 0:
+            del self._scene_log[:num_calls]
+            self._scene_log_start += num_calls
+            self._scene_log_complete = False
+
+    def get_state_version(self):
+        """
+        Return a counter that changes whenever the state of the
+        bodies may have changed (simulation steps, resets, state
+        restores, etc.) or the scene may look different (bodies
+        loaded, visual shapes changed, etc.). It can be used to
+        cache the states and the images queried from pybullet.
+
+        Returns:
+            int: state version. None if the simulation can be stepped
+            without this client knowing it (GUI realtime mode or a
+            shared-memory connection), which means the states
+            should not be cached.
+
+        """
+        if not self._state_tracked:
+            return None
+        if self._gui_mode and self.in_realtime_mode():
+            return None
+        return self._state_version
+
+    def get_sim_time(self):
+        """
+        Return the simulated time, i.e., the number of steps taken
+        by `stepSimulation` times the time step. It is not reset
+        by `resetSimulation`.
+
+        Returns:
+            float: simulated time (seconds).
+
+        """
+        return self._sim_time
+
+    def get_step_count(self):
+        """
+        Return the number of simulation steps taken by
+        `stepSimulation` since the client was created.
+
+        Returns:
+            int: number of simulation steps.
+        """
+        return self._step_count
+
+    def get_clock(self):
+        """
+        Return the clock that the blocking calls (e.g.
+        `set_jpos(wait=True)`) should use for timeouts
+        and for waiting on new states.
+
+        In GUI realtime mode, pybullet steps the simulation
+        internally at the wall-clock rate, so the wall clock
+        is returned. Otherwise, the simulation clock is returned,
+        which is notified after every `stepSimulation` call.
+
+        Returns:
+            WallClock or EventClock: the clock.
+
+        """
+        if self._gui_mode and self.in_realtime_mode():
+            return self._wall_clock
+        return self._sim_clock
+
     def get_client_id(self):
         """
         Return the pybullet client id.
@@ -138,6 +674,65 @@ class BulletClient:
                 self._direct_real_th.daemon = True
                 self._direct_real_th.start()
 
+    def set_time_dilation(self, time_dilation):
+        """
+        Set how many times faster than the wall clock the simulation
+        runs in realtime mode. This only affects the DIRECT mode.
+        In GUI mode, the realtime simulation is driven by pybullet.
+
+        Args:
+            time_dilation (float): time dilation factor (1.0 means
+                realtime). `None` or `float('inf')` steps the
+                simulation as fast as possible.
+        """
+        time_dilation = self._check_time_dilation(time_dilation)
+        with self._realtime_lock:
+            self._time_dilation = time_dilation
+            self._reset_step_stats()
+
+    def get_time_dilation(self):
+        """
+        Return the time dilation factor of the realtime mode.
+
+        Returns:
+            float: time dilation factor (`float('inf')` means
+            as fast as possible).
+
+        """
+        return self._time_dilation
+
+    def get_step_stats(self):
+        """
+        Return the statistics of the realtime stepping thread
+        (DIRECT mode) since realtime mode was turned on
+        or the time dilation factor was changed.
+
+        Returns:
+            dict: a dictionary containing
+
+            - steps (int): number of simulation steps taken.
+            - target_rate (float): target number of steps per second.
+            - achieved_rate (float): achieved number of steps per second.
+            - real_time_factor (float): simulated time / wall-clock time.
+            - missed_deadlines (int): number of steps that finished
+              after their scheduled time.
+
+        """
+        with self._realtime_lock:
+            steps = self._stats_steps
+            missed = self._stats_missed
+            sim_time = self._stats_sim_time
+            start = self._stats_start
+        elapsed = monotonic() - start if start is not None else 0.
+        rate = steps / elapsed if elapsed > 0 else 0.
+        rtf = sim_time / elapsed if elapsed > 0 else 0.
+        target_rate = self._time_dilation / self._time_step
+        return {'steps': steps,
+                'target_rate': target_rate,
+                'achieved_rate': rate,
+                'real_time_factor': rtf,
+                'missed_deadlines': missed}
+
     def in_realtime_mode(self):
         """
         Check if the pybullet simulation is in step simulation
@@ -220,6 +815,85 @@ class BulletClient:
             success = True
         return success
 
+    def get_body_ids(self):
+        """
+        Return the unique ids of all the bodies in the simulation.
+
+        Returns:
+            list: body unique ids.
+
+        """
+        return [self.getBodyUniqueId(i) for i in range(self.getNumBodies())]
+
+    def save_state(self):
+        """
+        Take an in-memory snapshot of the simulation state (positions,
+        velocities and contact points of all the bodies). Restoring a
+        snapshot is much cheaper than resetting the simulation and
+        reloading all the URDFs.
+
+        Returns:
+            int: state id of the snapshot.
+
+        """
+        state_id = self.saveState()
+        self._state_bodies[state_id] = self.get_body_ids()
+        return state_id
+
+    def restore_state(self, state_id, remove_new_bodies=True):
+        """
+        Restore the simulation to a snapshot taken by `save_state`.
+
+        Note:
+            Pybullet can only restore a snapshot when the scene contains
+            the same bodies as when the snapshot was taken. Motor commands,
+            constraints and visual shapes are not part of the snapshot.
+            A snapshot is released when one of its bodies is removed
+            or the simulation is reset.
+
+        Args:
+            state_id (int): state id returned by `save_state`.
+            remove_new_bodies (bool): remove the bodies that are loaded
+                after the snapshot was taken before restoring it.
+
+        """
+        if state_id not in self._state_bodies:
+            raise ValueError('Unknown state id: %s. The snapshot has been '
+                             'removed, or one of its bodies has been removed '
+                             'or the simulation has been reset since it was '
+                             'taken.' % str(state_id))
+        if remove_new_bodies:
+            saved_bodies = set(self._state_bodies[state_id])
+            for body_id in self.get_body_ids():
+                if body_id not in saved_bodies:
+                    self.removeBody(body_id)
+        self.restoreState(stateId=state_id)
+
+    def has_state(self, state_id):
+        """
+        Check if a snapshot taken by `save_state` can be restored.
+
+        Args:
+            state_id (int): state id returned by `save_state`.
+
+        Returns:
+            bool: False if the snapshot has been removed or invalidated
+            by removing one of its bodies or resetting the simulation.
+
+        """
+        return state_id in self._state_bodies
+
+    def remove_state(self, state_id):
+        """
+        Release the memory of a snapshot taken by `save_state`.
+
+        Args:
+            state_id (int): state id returned by `save_state`.
+
+        """
+        if self._state_bodies.pop(state_id, None) is not None:
+            self.removeState(state_id)
+
     def load_urdf(self, filename, base_pos=None,
                   base_ori=None, scaling=1.0, **kwargs):
         """
@@ -306,15 +980,6 @@ class BulletClient:
         Load a regular geometry (`sphere`, `box`,
         `capsule`, `cylinder`, `mesh`).
 
-        Note:
-            Please do not call **load_geom('capsule')** when you are using
-            **robotiq gripper**. The capsule generated will be in wrong size
-            if the mimicing thread (_th_mimic_gripper) in the robotiq
-            gripper class starts running.
-            This might be a PyBullet Bug (current version is 2.5.6).
-            Note that other geometries(box, sphere, cylinder, etc.)
-            are not affected by the threading in the robotiq gripper.
-
         Args:
             shape_type (str): one of [`sphere`, `box`, `capsule`, `cylinder`,
                 `mesh`].
@@ -471,32 +1136,252 @@ class BulletClient:
 
     def _set_realtime_var(self, realtime_mode):
         with self._realtime_lock:
+            if realtime_mode and not self._in_realtime_mode:
+                self._reset_step_stats()
             self._in_realtime_mode = realtime_mode
+            if realtime_mode:
+                self._realtime_event.set()
+            else:
+                self._realtime_event.clear()
 
     def _get_realtime_var(self):
         with self._realtime_lock:
             realtime_mode = self._in_realtime_mode
         return realtime_mode
 
+    def _check_time_dilation(self, time_dilation):
+        if time_dilation is None:
+            return float('inf')
+        if time_dilation <= 0:
+            raise ValueError('Time dilation should be a positive number.')
+        return float(time_dilation)
+
+    def _reset_step_stats(self):
+        with self._realtime_lock:
+            self._stats_steps = 0
+            self._stats_missed = 0
+            self._stats_sim_time = 0.
+            self._stats_start = None
+
+    def _get_time_step(self):
+        params = self.getPhysicsEngineParameters()
+        return params['fixedTimeStep']
+
+    def _step_with_hooks(self, raise_errors=True):
+        hooks = self._pre_step_hooks
+        if hooks:
+            self._run_step_hooks(hooks, raise_errors)
+        self.stepSimulation()
+        hooks = self._post_step_hooks
+        if hooks:
+            self._run_step_hooks(hooks, raise_errors)
+
+    def _run_step_hooks(self, hooks, raise_errors=True):
+        """
+        Run the hooks. If `raise_errors` is False (realtime
+        stepping thread), a hook that raises an exception is
+        removed so that the thread keeps running.
+        """
+        for hook in hooks:
+            start = _perf_counter()
+            try:
+                hook.func()
+            except Exception as e:
+                if raise_errors:
+                    raise
+                ar.log_error('Step hook [%s] raised an exception '
+                             'and is removed: %s' % (hook.name, str(e)))
+                self.remove_step_hook(hook.hook_id)
+                continue
+            duration = _perf_counter() - start
+            hook.calls += 1
+            hook.total_time += duration
+            if duration > hook.max_time:
+                hook.max_time = duration
+
     def _step_rt_simulation(self):
         """
         Run step simulation all the time in backend.
         This is only needed to run realtime simulation
         in DIRECT mode, ie, when `render=False`.
+
+        Each step has a deadline on a monotonic clock
+        (`time_step / time_dilation` after the previous one).
+        The thread sleeps until the deadline, so the cost of
+        the steps and the sleep jitter do not accumulate.
+        If it falls too far behind, the schedule is restarted
+        from the current time instead of bursting to catch up.
         """
+        deadline = None
         while True:
-            realtime_mode = self._get_realtime_var()
-            if realtime_mode:
-                self.stepSimulation()
-            time.sleep(0.001)
+            if not self._realtime_event.is_set():
+                self._realtime_event.wait()
+                deadline = None
+            if self._client < 0:
+                break
+            if not self._get_realtime_var():
+                continue
+            try:
+                time_step = self._time_step
+                self._step_with_hooks(raise_errors=False)
+            except p.error:
+                # disconnected
+                break
+            now = monotonic()
+            with self._realtime_lock:
+                if self._stats_start is None:
+                    self._stats_start = now
+                    deadline = None
+                self._stats_steps += 1
+                self._stats_sim_time += time_step
+                dilation = self._time_dilation
+            if dilation == float('inf'):
+                # give the other threads a chance to run
+                time.sleep(0)
+                continue
+            period = time_step / dilation
+            if deadline is None:
+                deadline = now
+            deadline += period
+            if deadline > now:
+                time.sleep(deadline - now)
+            else:
+                with self._realtime_lock:
+                    self._stats_missed += 1
+                if now - deadline > _RESYNC_THRESHOLD:
+                    deadline = now
+
+
+class _StepHook(object):
+    """
+    A function registered by `BulletClient.add_step_hook`
+    and its timing statistics.
+    """
+
+    def __init__(self, hook_id, func, priority, when, name):
+        self.hook_id = hook_id
+        self.func = func
+        self.priority = priority
+        self.when = when
+        self.name = name
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.calls = 0
+        self.total_time = 0.
+        self.max_time = 0.
+
+
+def _read_image_size(path):
+    """
+    Read the width and height of an image from its file header,
+    without decoding the image. Other formats than PNG, JPEG,
+    GIF and TGA are decoded with OpenCV.
+
+    Args:
+        path (str): path to the image file.
+
+    Returns:
+        2-element tuple containing the height and the width (int).
+    """
+    with open(path, 'rb') as f:
+        head = f.read(26)
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            width, height = struct.unpack('>II', head[16:24])
+            return height, width
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            width, height = struct.unpack('<HH', head[6:10])
+            return height, width
+        if head[:2] == b'\xff\xd8':
+            # walk through the JPEG segments up to the frame header
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[:1] != b'\xff':
+                    break
+                code = ord(marker[1:2])
+                if code == 0xff:
+                    # padding byte
+                    f.seek(-1, os.SEEK_CUR)
+                    continue
+                size = struct.unpack('>H', f.read(2))[0]
+                if 0xc0 <= code <= 0xcf and code not in (0xc4, 0xc8, 0xcc):
+                    height, width = struct.unpack('>xHH', f.read(5))
+                    return height, width
+                f.seek(size - 2, os.SEEK_CUR)
+        elif path.lower().endswith('.tga') and len(head) >= 18:
+            width, height = struct.unpack('<HH', head[12:16])
+            return height, width
+    img = cv2.imread(path)
+    if img is None:
+        raise ValueError('Cannot read the image: %s' % path)
+    return img.shape[0], img.shape[1]
+
+
+class _RawBulletClient(object):
+    """
+    Inject the client id into the pybullet functions of a client
+    that is not connected through a `BulletClient`.
+
+    Args:
+        client_id (int): pybullet client id.
+    """
+
+    def __init__(self, client_id):
+        self._client = client_id
+
+    def __getattr__(self, name):
+        attribute = getattr(p, name)
+        if inspect.isbuiltin(attribute):
+            attribute = functools.partial(attribute,
+                                          physicsClientId=self._client)
+        return attribute
+
+
+def _get_bullet_client(client_id):
+    """
+    Return the `BulletClient` connected with the given client id,
+    or a plain wrapper of the pybullet functions if the client
+    was not connected through a `BulletClient`.
+
+    Args:
+        client_id (int): pybullet client id.
+
+    Returns:
+        BulletClient or _RawBulletClient: the client.
+    """
+    pb_client = _BULLET_CLIENTS.get(client_id)
+    if pb_client is None:
+        pb_client = _RawBulletClient(client_id)
+    return pb_client
 
 
 class TextureModder:
     """
     Modify textures in model.
 
+    The textures loaded from files are kept in a pool, so applying the
+    same texture file again reuses its texture id instead of loading
+    the file again.
+
+    Note:
+        Pybullet cannot unload a texture, so every texture loaded by
+        the modder stays in the pybullet client until it is reset (call
+        `clear_texture_pool` after `resetSimulation`). The memory limit
+        bounds the total size of these textures (estimated as
+        height * width * 3 bytes each). Once it is reached, no new
+        file is loaded: `rand_texture` chooses from the textures in
+        the pool, and `set_texture` raises an error for a new file.
+
+    The visual shapes and textures are changed through the
+    `BulletClient` of the pybullet client, so the state version of
+    the client is increased (the camera frame caches are invalidated)
+    and the changes are copied to the render workers.
+
     Args:
         pb_client_id (int): pybullet client id.
+        texture_mem_limit (int): maximum total size (bytes) of the
+            textures loaded by the modder. If None, it is not limited.
 
     Attributes:
         texture_dict (dict): a dictionary that tells the texture
@@ -504,11 +1389,24 @@ class TextureModder:
         texture_files (list): a list of texture files (usuallly images).
     """
 
-    def __init__(self, pb_client_id):
+    def __init__(self, pb_client_id, texture_mem_limit=None):
         # {body_id: {link_id: [texture_id, height, width]}}
         self.texture_dict = {}
         self.texture_files = []
         self._pb_id = pb_client_id
+        self._pb = _get_bullet_client(pb_client_id)
+        self._tex_mem_limit = texture_mem_limit
+        # {texture_file: [texture_id, height, width]}
+        self._tex_pool = {}
+        # {texture_id: texture_file} of the textures in the pool
+        self._tex_pool_files = {}
+        # estimated size of all the textures loaded by the modder,
+        # including the ones removed from the pool
+        self._tex_mem = 0
+        # texture files that `rand_texture` chooses from, if
+        # a subset of the files is preloaded
+        self._rand_tex_files = None
+        self._tex_pool_stats = {'hits': 0, 'loads': 0}
 
     def set_texture(self, body_id, link_id, texture_file):
         """
@@ -521,17 +1419,13 @@ class TextureModder:
             texture_file (str): path to the texture files (image, supported
                 format: `jpg`, `png`, `jpeg`, `tga`, or `gif` etc.).
 
+        Raises:
+            RuntimeError: if the file is not in the pool and loading
+                it would exceed the texture memory limit.
+
         """
-        img = cv2.imread(texture_file)
-        width = img.shape[1]
-        height = img.shape[0]
-        tex_id = p.loadTexture(texture_file)
-        p.changeVisualShape(body_id, link_id,
-                            textureUniqueId=tex_id,
-                            physicsClientId=self._pb_id)
-        if body_id not in self.texture_dict:
-            self.texture_dict[body_id] = {}
-        self.texture_dict[body_id][link_id] = [tex_id, height, width]
+        self._apply_texture(body_id, link_id,
+                            self._get_texture(texture_file))
 
     def set_texture_path(self, path):
         """
@@ -549,12 +1443,73 @@ class TextureModder:
                 if name.lower().endswith(('.png', '.jpg',
                                           '.jpeg', '.tga', '.gif')):
                     self.texture_files.append(os.path.join(root, name))
+        self._rand_tex_files = None
         print('Number of texture files found: %d' % len(self.texture_files))
 
+    def preload_textures(self, num_textures=None):
+        """
+        Load a random subset of `texture_files` into the texture pool,
+        so that `rand_texture` only chooses from these textures and
+        never loads a file. Call `set_texture_path` first. The files
+        that do not fit in the texture memory limit are skipped.
+
+        Args:
+            num_textures (int): number of textures to preload. If None,
+                all the texture files are preloaded.
+
+        Returns:
+            list: the preloaded texture files.
+        """
+        if len(self.texture_files) < 1:
+            raise RuntimeError('Please call `set_texture_path` '
+                               'first to set the '
+                               'root path to the texture files')
+        if num_textures is None or num_textures >= len(self.texture_files):
+            tex_files = list(self.texture_files)
+        else:
+            tex_files = random.sample(self.texture_files, num_textures)
+        loaded_files = [tex_file for tex_file in tex_files
+                        if self._get_texture(tex_file, required=False)]
+        if len(loaded_files) < len(tex_files):
+            ar.log_warn('The preloaded textures exceed the texture '
+                        'memory limit, only %d of the %d textures are '
+                        'loaded.' % (len(loaded_files), len(tex_files)))
+        self._rand_tex_files = loaded_files
+        return loaded_files
+
+    def clear_texture_pool(self):
+        """
+        Remove all the textures from the texture pool (e.g. after
+        the pybullet client is reset, as the texture ids are not
+        valid anymore).
+        """
+        self._tex_pool.clear()
+        self._tex_pool_files.clear()
+        self._tex_mem = 0
+        self._rand_tex_files = None
+
+    def get_texture_pool_stats(self):
+        """
+        Return the statistics of the texture pool.
+
+        Returns:
+            dict: number of textures in the pool (`textures`),
+            estimated size of all the textures loaded by the modder
+            (`mem`, bytes), number of `set_texture` calls that reused
+            a texture (`hits`), and number of texture files loaded
+            (`loads`).
+        """
+        stats = dict(self._tex_pool_stats)
+        stats['textures'] = len(self._tex_pool)
+        stats['mem'] = self._tex_mem
+        return stats
+
     def rand_texture(self, body_id, link_id):
         """
         Randomly apply a texture to the link. Call `set_texture_path` first
-        to set the root path to the texture files.
+        to set the root path to the texture files. Once the texture
+        memory limit is reached, the texture is chosen from the
+        textures in the pool.
 
         Args:
             body_id (int): body index.
@@ -565,8 +1520,17 @@ class TextureModder:
             raise RuntimeError('Please call `set_texture_path` '
                                'first to set the '
                                'root path to the texture files')
-        tex_file = random.choice(self.texture_files)
-        self.set_texture(body_id, link_id, tex_file)
+        tex_files = self._rand_tex_files or self.texture_files
+        texture = self._get_texture(random.choice(tex_files),
+                                    required=False)
+        if texture is None:
+            if not self._tex_pool:
+                raise RuntimeError('The texture memory limit is reached '
+                                   'and the pool is empty (the textures '
+                                   'changed by set_gradient or set_noise '
+                                   'are not reused).')
+            texture = self._get_texture(random.choice(list(self._tex_pool)))
+        self._apply_texture(body_id, link_id, texture)
 
     def rand_rgb(self, body_id, link_id):
         """
@@ -637,8 +1601,7 @@ class TextureModder:
                 is an empty list, then all links on the body will be excluded.
 
         """
-        p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, 0,
-                                   physicsClientId=self._pb_id)
+        self._pb.configureDebugVisualizer(self._pb.COV_ENABLE_RENDERING, 0)
         mode_to_func = {
             'all': self.rand_all,
             'rgb': self.rand_rgb,
@@ -646,7 +1609,7 @@ class TextureModder:
             'gradient': self.rand_gradient,
             'texture': self.rand_texture,
         }
-        body_num = p.getNumBodies(physicsClientId=self._pb_id)
+        body_num = self._pb.getNumBodies()
         if exclude is None:
             sep_bodies = set()
         else:
@@ -656,16 +1619,14 @@ class TextureModder:
                 continue
             if body_idx in sep_bodies and not exclude[body_idx]:
                 continue
-            num_jnts = p.getNumJoints(body_idx,
-                                      physicsClientId=self._pb_id)
+            num_jnts = self._pb.getNumJoints(body_idx)
             # start from -1 for urdf that has no joint but one link
             start = -1 if num_jnts == 0 else 0
             for link_idx in range(start, num_jnts):
                 if body_idx in sep_bodies and link_idx in exclude[body_idx]:
                     continue
                 mode_to_func[mode](body_idx, link_idx)
-        p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, 1,
-                                   physicsClientId=self._pb_id)
+        self._pb.configureDebugVisualizer(self._pb.COV_ENABLE_RENDERING, 1)
 
     def set_rgba(self, body_id, link_id, rgba):
         """
@@ -678,8 +1639,7 @@ class TextureModder:
                 (opacity of the color), (shape: :math:`[4,]`).
 
         """
-        p.changeVisualShape(body_id, link_id, rgbaColor=rgba,
-                            physicsClientId=self._pb_id)
+        self._pb.changeVisualShape(body_id, link_id, rgbaColor=rgba)
 
     def set_gradient(self, body_id, link_id, rgb1, rgb2, vertical=True):
         """
@@ -692,12 +1652,21 @@ class TextureModder:
             rgb2 (list or np.ndarray): second rgb color (shape: :math:`[3,]`).
             vertical (bool): if True, the gradient in the vertical direction,
                 if False it's in the horizontal direction.
+
+        Note:
+            If the texture of the link is shared with other links,
+            the link is given its own copy of the texture first.
+            The link is not changed if the copy would exceed the
+            texture memory limit.
         """
         rgb1 = np.array(rgb1).reshape(1, 3)
         rgb2 = np.array(rgb2).reshape(1, 3)
         if not self._check_link_has_tex(body_id, link_id):
             return
-        tex_id, height, width = self.texture_dict[body_id][link_id]
+        texture = self._get_link_texture(body_id, link_id)
+        if texture is None:
+            return
+        tex_id, height, width = texture
         if vertical:
             intp = np.linspace(0, 1, height)
             comp_intp = 1.0 - intp
@@ -713,11 +1682,10 @@ class TextureModder:
                                   axis=0).flatten()
 
         new_color = new_color.astype(np.uint8)
-        p.changeTexture(tex_id,
-                        new_color,
-                        width,
-                        height,
-                        physicsClientId=self._pb_id)
+        self._pb.changeTexture(tex_id,
+                               new_color,
+                               width,
+                               height)
 
     def set_noise(self, body_id, link_id, rgb1, rgb2, fraction=0.9):
         """
@@ -733,22 +1701,29 @@ class TextureModder:
             fraction (float): fraction of pixels with
                 foreground color.
 
+        Note:
+            If the texture of the link is shared with other links,
+            the link is given its own copy of the texture first
+            (see `set_gradient`).
+
         """
         if not self._check_link_has_tex(body_id, link_id):
             return
         rgb1 = np.array(rgb1).flatten()
         rgb2 = np.array(rgb2).flatten()
-        tex_id, height, width = self.texture_dict[body_id][link_id]
+        texture = self._get_link_texture(body_id, link_id)
+        if texture is None:
+            return
+        tex_id, height, width = texture
         fraction = clamp(fraction, 0.0, 1.0)
 
         mask = np.random.uniform(size=(height, width)) < fraction
         new_color = np.tile(rgb1, (height, width, 1))
         new_color[mask, :] = rgb2
-        p.changeTexture(tex_id,
-                        new_color.flatten(),
-                        width,
-                        height,
-                        physicsClientId=self._pb_id)
+        self._pb.changeTexture(tex_id,
+                               new_color.flatten(),
+                               width,
+                               height)
 
     def whiten_materials(self, body_id=None, link_id=None):
         """
@@ -763,20 +1738,18 @@ class TextureModder:
 
         """
         if body_id is None:
-            body_num = p.getNumBodies(physicsClientId=self._pb_id)
+            body_num = self._pb.getNumBodies()
             for body_idx in range(body_num):
                 if not self._check_body_exist(body_idx):
                     continue
-                num_jnts = p.getNumJoints(body_idx,
-                                          physicsClientId=self._pb_id)
+                num_jnts = self._pb.getNumJoints(body_idx)
                 # start from -1 for urdf that has no joint but one link
                 start = -1 if num_jnts == 0 else 0
                 for i in range(start, num_jnts):
                     self.set_rgba(body_idx, i, rgba=[1, 1, 1, 1])
         else:
             if link_id is None:
-                num_jnts = p.getNumJoints(body_id,
-                                          physicsClientId=self._pb_id)
+                num_jnts = self._pb.getNumJoints(body_id)
                 # start from -1 for urdf that has no joint but one link
                 start = -1 if num_jnts == 0 else 0
                 for i in range(start, num_jnts):
@@ -808,6 +1781,121 @@ class TextureModder:
         else:
             return tuple(_rand_rgb() for _ in range(n))
 
+    def _get_texture(self, texture_file, required=True):
+        """
+        Return the texture of a file from the texture pool,
+        loading the file if it is not in the pool.
+
+        Args:
+            texture_file (str): path to the texture file.
+            required (bool): if True, raise an error when the file
+                cannot be loaded within the texture memory limit.
+                Otherwise, return None.
+
+        Returns:
+            list: texture id, height and width of the texture.
+        """
+        texture = self._tex_pool.get(texture_file)
+        if texture is not None:
+            self._tex_pool_stats['hits'] += 1
+            return texture
+        height, width = _read_image_size(texture_file)
+        mem = height * width * 3
+        if not self._fits_tex_mem(mem):
+            if required:
+                raise RuntimeError('Cannot load the texture %s, the '
+                                   'texture memory limit is '
+                                   'reached.' % texture_file)
+            return None
+        tex_id = self._pb.loadTexture(texture_file)
+        self._tex_pool_stats['loads'] += 1
+        texture = [tex_id, height, width]
+        self._tex_pool[texture_file] = texture
+        self._tex_pool_files[tex_id] = texture_file
+        self._tex_mem += mem
+        return texture
+
+    def _apply_texture(self, body_id, link_id, texture):
+        """
+        Apply a texture from `_get_texture` to a link.
+
+        Args:
+            body_id (int): body index.
+            link_id (int): link index in the body.
+            texture (list): texture id, height and width of the texture.
+        """
+        tex_id, height, width = texture
+        self._pb.changeVisualShape(body_id, link_id,
+                                   textureUniqueId=tex_id)
+        if body_id not in self.texture_dict:
+            self.texture_dict[body_id] = {}
+        self.texture_dict[body_id][link_id] = [tex_id, height, width]
+
+    def _get_link_texture(self, body_id, link_id):
+        """
+        Return a texture of a link whose pixels can be modified
+        without changing other links. If the texture is in the
+        pool, it is removed from the pool, or, if other links use
+        it, a copy is loaded from its file and applied to the link.
+
+        Args:
+            body_id (int): body index.
+            link_id (int): link index in the body.
+
+        Returns:
+            list: texture id, height and width of the texture, or
+            None if the copy would exceed the texture memory limit.
+        """
+        texture = self.texture_dict[body_id][link_id]
+        tex_id, height, width = texture
+        tex_file = self._tex_pool_files.get(tex_id)
+        if tex_file is None:
+            return texture
+        shared = any(tex[0] == tex_id
+                     for body, links in self.texture_dict.items()
+                     for link, tex in links.items()
+                     if (body, link) != (body_id, link_id))
+        if not shared:
+            self._unpool_texture(tex_id)
+            return texture
+        mem = height * width * 3
+        if not self._fits_tex_mem(mem):
+            ar.log_warn('Cannot copy the texture %s for link %d of body '
+                        '%d, the texture memory limit is '
+                        'reached.' % (tex_file, link_id, body_id))
+            return None
+        texture = [self._pb.loadTexture(tex_file), height, width]
+        self._tex_pool_stats['loads'] += 1
+        self._tex_mem += mem
+        self._apply_texture(body_id, link_id, texture)
+        return texture
+
+    def _fits_tex_mem(self, mem):
+        """
+        Check if a texture fits in the texture memory limit.
+
+        Args:
+            mem (int): estimated size of the texture (bytes).
+
+        Returns:
+            bool: True if the texture can be loaded, False otherwise.
+        """
+        return self._tex_mem_limit is None or \
+            self._tex_mem + mem <= self._tex_mem_limit
+
+    def _unpool_texture(self, tex_id):
+        """
+        Remove a texture from the texture pool (e.g. before its pixels
+        are modified, so that it is not reused for its file). The
+        texture still counts towards the texture memory limit.
+
+        Args:
+            tex_id (int): texture id.
+        """
+        tex_file = self._tex_pool_files.pop(tex_id, None)
+        if tex_file is not None:
+            del self._tex_pool[tex_file]
+
     def _check_link_has_tex(self, body_id, link_id):
         """
         Check if the link has texture.
@@ -838,7 +1926,7 @@ class TextureModder:
         """
         exist = True
         try:
-            p.getBodyInfo(body_id, physicsClientId=self._pb_id)
+            self._pb.getBodyInfo(body_id)
         except Exception:
             exist = False
         return exist
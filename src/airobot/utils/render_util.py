@@ -0,0 +1,484 @@
+"""
+Render pybullet camera views in worker processes.
+
+Each worker holds a kinematic copy of the scene of the main client.
+The bodies are loaded by replaying the scene log of the main client
+(see `BulletClient.get_scene_log`), and their base poses and joint
+positions are copied from the main client before rendering.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import multiprocessing as mp
+import multiprocessing.connection as mp_connection
+import traceback
+
+import numpy as np
+import pybullet as p
+
+from airobot.utils.clock import monotonic
+from airobot.utils.pb_util import BulletClient
+from airobot.utils.shm_util import create_shared_array
+from airobot.utils.shm_util import open_shared_array
+from airobot.utils.shm_util import remove_shared_files
+
+# per body in the scene state: body id, number of joints,
+# base position, base orientation
+_BODY_HEADER_SIZE = 9
+
+
+def get_scene_state(pb_client):
+    """
+    Return the base poses and joint positions of all the bodies,
+    which is what determines how the scene looks.
+
+    Args:
+        pb_client (BulletClient): pybullet client.
+
+    Returns:
+        np.ndarray: a flat array that contains, for each body, the body
+        id, the number of joints, the base position [x, y, z], the base
+        orientation [x, y, z, w] and the joint positions.
+    """
+    state = []
+    for i in range(pb_client.getNumBodies()):
+        body_id = pb_client.getBodyUniqueId(i)
+        pos, ori = pb_client.getBasePositionAndOrientation(body_id)
+        num_jnts = pb_client.getNumJoints(body_id)
+        state.append(body_id)
+        state.append(num_jnts)
+        state.extend(pos)
+        state.extend(ori)
+        if num_jnts > 0:
+            jnt_states = pb_client.getJointStates(body_id, range(num_jnts))
+            state.extend(jnt_state[0] for jnt_state in jnt_states)
+    return np.array(state, dtype=np.float64)
+
+
+def set_scene_state(pb_client, state, prev_state=None):
+    """
+    Set the base poses and joint positions of all the bodies.
+
+    Args:
+        pb_client (BulletClient): pybullet client.
+        state (np.ndarray): scene state returned by `get_scene_state`.
+        prev_state (np.ndarray): the scene state that was set last
+            time. If provided, the bodies whose part of the
+            state has not changed are skipped.
+    """
+    if prev_state is not None and prev_state.shape != state.shape:
+        prev_state = None
+    idx = 0
+    while idx < state.shape[0]:
+        body_id = int(state[idx])
+        num_jnts = int(state[idx + 1])
+        end = idx + _BODY_HEADER_SIZE + num_jnts
+        if prev_state is None or \
+                not np.array_equal(state[idx:end], prev_state[idx:end]):
+            pb_client.resetBasePositionAndOrientation(body_id,
+                                                      state[idx + 2:idx + 5],
+                                                      state[idx + 5:idx + 9])
+            jpos = state[idx + _BODY_HEADER_SIZE:end]
+            for jnt in range(num_jnts):
+                pb_client.resetJointState(body_id, jnt, jpos[jnt])
+        idx = end
+
+
+def replay_scene_log(pb_client, entries):
+    """
+    Make the calls recorded by `BulletClient.get_scene_log`
+    in another client.
+
+    Args:
+        pb_client (BulletClient): pybullet client.
+        entries (list): calls returned by `get_scene_log`.
+    """
+    for name, args, kwargs, ret in entries:
+        new_ret = getattr(pb_client, name)(*args, **kwargs)
+        if name != 'setAdditionalSearchPath' and new_ret != ret:
+            raise RuntimeError('Failed to copy the scene: %s returned %s '
+                               'instead of %s' % (name, str(new_ret),
+                                                  str(ret)))
+
+
+def _render_worker(remote, parent_remote, opengl_render):
+    """
+    Worker process that renders the views of a copy of the scene.
+    """
+    parent_remote.close()
+    # {buffer set name: {image type: shared array}}
+    buf_sets = {}
+    # backing files of the shared arrays, removed on exit
+    # in case the parent could not remove them
+    paths = []
+    prev_state = None
+    try:
+        pb_client = BulletClient(connection_mode=p.DIRECT,
+                                 realtime=False,
+                                 opengl_render=opengl_render)
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'render':
+                try:
+                    entries, state, buf_name, jobs = data
+                    if entries:
+                        replay_scene_log(pb_client, entries)
+                        prev_state = None
+                    set_scene_state(pb_client, state, prev_state)
+                    prev_state = state
+                    for slot, cam_img_kwargs in jobs:
+                        _render_view(pb_client, cam_img_kwargs,
+                                     buf_sets[buf_name], slot)
+                    remote.send(None)
+                except Exception:
+                    prev_state = None
+                    remote.send(traceback.format_exc())
+            elif cmd == 'buffers':
+                buf_name, buf_info = data
+                paths.extend(info[0] for info in buf_info.values())
+                buf_sets[buf_name] = dict((key, open_shared_array(*info))
+                                          for key, info in buf_info.items())
+                remote.send(None)
+            elif cmd == 'close':
+                remote.close()
+                break
+            else:
+                raise ValueError('Unknown command: %s' % cmd)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        remove_shared_files(paths)
+
+
+def _render_view(pb_client, cam_img_kwargs, bufs, slot):
+    """
+    Render one view and write the images into the shared buffers.
+    """
+    images = pb_client.getCameraImage(**cam_img_kwargs)
+    rgba = bufs['rgba'][slot]
+    rgba[:] = np.reshape(images[2], rgba.shape)
+    depth = bufs['depth'][slot]
+    depth[:] = np.reshape(images[3], depth.shape)
+    seg_flag = p.ER_SEGMENTATION_MASK_OBJECT_AND_LINKINDEX
+    if cam_img_kwargs.get('flags', 0) & seg_flag:
+        seg = bufs['seg'][slot]
+        seg[:] = np.reshape(images[4], seg.shape)
+
+
+def _create_image_buffers(shape):
+    """
+    Create the shared rgba, depth buffer and segmentation
+    arrays for the views of shape (N, H, W).
+
+    Returns:
+        2-element tuple containing
+
+        - dict: shared arrays.
+        - dict: (path, shape, dtype) of each array
+          to open it in the workers.
+    """
+    specs = {'rgba': (shape + (4,), np.uint8),
+             'depth': (shape, np.float32),
+             'seg': (shape, np.int32)}
+    bufs = {}
+    buf_info = {}
+    for key, (buf_shape, dtype) in specs.items():
+        arr, path = create_shared_array(buf_shape, dtype)
+        bufs[key] = arr
+        buf_info[key] = (path, buf_shape, dtype)
+    return bufs, buf_info
+
+
+def _wait_for_replies(remotes, timeout):
+    """
+    Return the connections that have data to receive, waiting
+    up to `timeout` seconds (forever if None) if none has.
+    """
+    ready = [remote for remote in remotes if remote.poll()]
+    if ready or timeout == 0:
+        return ready
+    wait = getattr(mp_connection, 'wait', None)
+    if wait is not None:
+        return wait(remotes, timeout=timeout)
+    # python 2 has no multiprocessing.connection.wait
+    end_time = None if timeout is None else monotonic() + timeout
+    while end_time is None or monotonic() < end_time:
+        ready = [remote for remote in remotes if remote.poll(0.001)]
+        if ready:
+            break
+    return ready
+
+
+def _check_views(cam_img_kwargs_list):
+    """
+    Return the shape (N, H, W) of the images of the views.
+    """
+    if len(cam_img_kwargs_list) == 0:
+        raise ValueError('There should be at least one view.')
+    sizes = set((kw['height'], kw['width'])
+                for kw in cam_img_kwargs_list)
+    if len(sizes) > 1:
+        raise ValueError('All the views should have the same size.')
+    return (len(cam_img_kwargs_list),) + sizes.pop()
+
+
+class RenderWorkerPool(object):
+    """
+    A pool of worker processes that render camera views of the scene
+    of a pybullet client. Each worker has its own pybullet client with
+    a copy of the scene, which is brought up to date (bodies loaded or
+    removed, visual shapes, base poses and joint positions) with each
+    render request.
+
+    The pool can be used in two ways:
+
+    - `render` splits the views among the workers, renders them in
+      parallel and waits for the images.
+    - `submit` sends all the views of the current scene to one idle
+      worker and returns immediately, so the physics can keep
+      stepping while the frame is rendered. The finished frames
+      are returned by `collect`, with the frame id given in
+      `submit` (e.g. the simulation step).
+
+    Note:
+        Only the changes made through the `BulletClient` (including
+        the ones made by `TextureModder`) are copied (see
+        `BulletClient.get_scene_log`). Debug items are not copied.
+
+        The pool records the scene log of the client while it is
+        open, so it should be created before the scene is loaded,
+        unless the client is created with `scene_log=True`. The
+        calls replayed by all the workers are dropped from the log.
+
+    Args:
+        pb_client (BulletClient): pybullet client of the scene.
+        num_workers (int): number of worker processes.
+        start_method (str): multiprocessing start method. If None,
+            `spawn` is used when available, so the workers do not
+            inherit the pybullet state of the parent process.
+
+    Attributes:
+        num_workers (int): number of worker processes.
+    """
+
+    def __init__(self, pb_client, num_workers, start_method=None):
+        if num_workers < 1:
+            raise ValueError('num_workers should be a positive integer.')
+        self._log_user = pb_client.attach_scene_log()
+        self._pb = pb_client
+        self.num_workers = num_workers
+        if hasattr(mp, 'get_context'):
+            if start_method is None:
+                start_method = 'spawn'
+            ctx = mp.get_context(start_method)
+        else:
+            ctx = mp
+        pipes = [ctx.Pipe() for _ in range(num_workers)]
+        self._remotes = [pipe[0] for pipe in pipes]
+        self._procs = []
+        for remote, work_remote in pipes:
+            args = (work_remote, remote, pb_client.opengl_render)
+            proc = ctx.Process(target=_render_worker, args=args)
+            proc.daemon = True
+            proc.start()
+            work_remote.close()
+            self._procs.append(proc)
+        # scene log position of each worker
+        self._log_pos = [0] * num_workers
+        # shared buffers of the views rendered by `render`
+        self._bufs = None
+        # shared buffers of each worker for the frames from `submit`
+        self._async_bufs = [None] * num_workers
+        # {worker index: frame id} of the frames being rendered
+        self._pending = {}
+        # frames finished while waiting in `render`
+        self._done = []
+        self._closed = False
+
+    def render(self, cam_img_kwargs_list):
+        """
+        Render the views in the worker processes and wait for
+        the images. The views are distributed among the workers
+        in a round-robin way.
+
+        Args:
+            cam_img_kwargs_list (list): arguments of `getCameraImage`
+                for each view. All the views should have the
+                same `width` and `height`.
+
+        Returns:
+            3-element tuple containing
+
+            - np.ndarray: rgba images (shape: :math:`[N, H, W, 4]`).
+            - np.ndarray: depth buffers (shape: :math:`[N, H, W]`).
+            - np.ndarray: segmentation masks (shape: :math:`[N, H, W]`),
+              only filled for the views rendered with the
+              segmentation mask flag.
+
+            The arrays are shared with the workers and overwritten
+            by the next call to `render`.
+        """
+        shape = _check_views(cam_img_kwargs_list)
+        # the workers should not be rendering the submitted frames,
+        # the finished frames are copied as the workers may get
+        # new frames before they are collected
+        for frame in self._collect_frames(timeout=None):
+            self._done.append(tuple([frame[0]] + [np.array(img)
+                                                  for img in frame[1:]]))
+        if self._bufs is None or self._bufs['depth'].shape != shape:
+            self._bufs = self._send_buffers('sync', shape,
+                                            range(self.num_workers))
+        state = get_scene_state(self._pb)
+        jobs = [[] for _ in range(self.num_workers)]
+        for slot, cam_img_kwargs in enumerate(cam_img_kwargs_list):
+            jobs[slot % self.num_workers].append((slot, cam_img_kwargs))
+        busy = []
+        for worker, worker_jobs in enumerate(jobs):
+            # the scene log also goes to the idle workers
+            # so that their copies do not fall behind
+            entries = self._new_scene_log(worker)
+            if worker_jobs or entries:
+                self._remotes[worker].send(('render', (entries, state,
+                                                       'sync',
+                                                       worker_jobs)))
+                busy.append(worker)
+        for worker in busy:
+            self._check_reply(self._remotes[worker].recv())
+        return self._bufs['rgba'], self._bufs['depth'], self._bufs['seg']
+
+    def submit(self, cam_img_kwargs_list, frame_id):
+        """
+        Send the current scene to an idle worker to render the views,
+        without waiting for the images. If all the workers are busy,
+        the frame is dropped, so the caller is never blocked.
+
+        Args:
+            cam_img_kwargs_list (list): arguments of `getCameraImage`
+                for each view. All the views should have the
+                same `width` and `height`.
+            frame_id (int): id returned with the images
+                by `collect` (e.g. the simulation step).
+
+        Returns:
+            bool: True if the frame is sent to a worker, False if
+            all the workers are busy.
+        """
+        shape = _check_views(cam_img_kwargs_list)
+        idle = [w for w in range(self.num_workers) if w not in self._pending]
+        if not idle:
+            return False
+        # the worker that is the most behind the scene log, so all
+        # the workers catch up and the log can be dropped
+        worker = min(idle, key=lambda w: self._log_pos[w])
+        bufs = self._async_bufs[worker]
+        if bufs is None or bufs['depth'].shape != shape:
+            self._async_bufs[worker] = self._send_buffers('async', shape,
+                                                          [worker])
+        jobs = list(enumerate(cam_img_kwargs_list))
+        entries = self._new_scene_log(worker)
+        state = get_scene_state(self._pb)
+        self._remotes[worker].send(('render', (entries, state,
+                                               'async', jobs)))
+        self._pending[worker] = frame_id
+        return True
+
+    def collect(self, timeout=0):
+        """
+        Return the frames from `submit` that have been rendered.
+
+        Args:
+            timeout (float): maximum time to wait for a frame if none
+                is ready (seconds). 0 returns immediately, None waits
+                until a frame is ready (if any frame is pending).
+
+        Returns:
+            list: (frame id, rgba images, depth buffers, segmentation
+            masks) of each frame, sorted by frame id. The arrays (see
+            `render`) are shared with the workers and overwritten
+            once the worker is given another frame by `submit`.
+        """
+        frames = self._done + self._collect_frames(timeout, wait_all=False)
+        self._done = []
+        return sorted(frames, key=lambda frame: frame[0])
+
+    def num_pending(self):
+        """
+        Return the number of submitted frames that are being rendered.
+
+        Returns:
+            int: number of pending frames.
+        """
+        return len(self._pending)
+
+    def close(self):
+        """
+        Shut down all the worker processes.
+        """
+        if self._closed:
+            return
+        for worker in list(self._pending):
+            self._remotes[worker].recv()
+        for remote in self._remotes:
+            remote.send(('close', None))
+        for proc in self._procs:
+            proc.join()
+        self._pb.detach_scene_log(self._log_user)
+        self._closed = True
+
+    def _collect_frames(self, timeout, wait_all=True):
+        """
+        Receive the finished frames of the pending workers. If
+        `wait_all` is True, wait for all of them, otherwise, wait
+        (up to `timeout`) only if no frame is finished.
+        """
+        frames = []
+        if not self._pending:
+            return frames
+        remotes = dict((self._remotes[w], w) for w in self._pending)
+        if wait_all:
+            ready = list(remotes)
+        else:
+            ready = _wait_for_replies(list(remotes), timeout)
+        for remote in ready:
+            worker = remotes[remote]
+            frame_id = self._pending.pop(worker)
+            self._check_reply(remote.recv())
+            bufs = self._async_bufs[worker]
+            frames.append((frame_id, bufs['rgba'], bufs['depth'],
+                           bufs['seg']))
+        return frames
+
+    def _new_scene_log(self, worker):
+        """
+        Return the scene log entries not sent to the worker yet.
+        """
+        entries = self._pb.get_scene_log(self._log_pos[worker])
+        self._log_pos[worker] = self._pb.get_scene_log_end()
+        # the calls sent to all the workers are not needed anymore
+        self._pb.release_scene_log(self._log_user, min(self._log_pos))
+        return entries
+
+    def _send_buffers(self, buf_name, shape, workers):
+        """
+        Create the shared image buffers and open them in the workers.
+        """
+        bufs, buf_info = _create_image_buffers(shape)
+        try:
+            for worker in workers:
+                self._remotes[worker].send(('buffers', (buf_name, buf_info)))
+            for worker in workers:
+                self._remotes[worker].recv()
+        finally:
+            # every process has mapped the buffers (or a worker
+            # has failed), the backing files are not needed anymore
+            remove_shared_files([info[0] for info in buf_info.values()])
+        return bufs
+
+    def _check_reply(self, error):
+        if error is not None:
+            raise RuntimeError('Render worker failed:\n%s' % error)
+
+    def __del__(self):
+        if hasattr(self, '_closed'):
+            self.close()
@@ -7,6 +7,18 @@ import rospkg
 import rospy
 import tf
 
+# (dtype, number of channels) of the sensor_msgs/Image encodings
+_IMG_ENCODINGS = {'rgb8': (np.uint8, 3),
+                  'bgr8': (np.uint8, 3),
+                  'rgba8': (np.uint8, 4),
+                  'bgra8': (np.uint8, 4),
+                  'mono8': (np.uint8, 1),
+                  'mono16': (np.uint16, 1),
+                  '8UC1': (np.uint8, 1),
+                  '8UC3': (np.uint8, 3),
+                  '16UC1': (np.uint16, 1),
+                  '32FC1': (np.float32, 1)}
+
 
 def kdl_array_to_numpy(kdl_data):
     """
@@ -60,6 +72,36 @@ def joints_to_kdl(joint_values):
     return kdl_array
 
 
+def imgmsg_to_numpy(msg):
+    """
+    Convert a sensor_msgs/Image message into a numpy array
+    without copying the image data.
+
+    Args:
+        msg (sensor_msgs.msg.Image): image message.
+
+    Returns:
+        np.ndarray: read-only view of the message data, in the
+        channel order and byte order of the message
+        (shape: :math:`[H, W]` for single-channel images,
+        :math:`[H, W, C]` otherwise).
+    """
+    try:
+        dtype, channels = _IMG_ENCODINGS[msg.encoding]
+    except KeyError:
+        raise ValueError('Unsupported image encoding: %s' % msg.encoding)
+    dtype = np.dtype(dtype).newbyteorder('>' if msg.is_bigendian else '<')
+    shape = (msg.height, msg.width)
+    # the rows may be padded, so msg.step is used as the row stride
+    strides = (msg.step, channels * dtype.itemsize)
+    if channels > 1:
+        shape += (channels,)
+        strides += (dtype.itemsize,)
+    data = np.frombuffer(msg.data, dtype=np.uint8)
+    return np.ndarray(shape=shape, dtype=dtype,
+                      buffer=data, strides=strides)
+
+
 def get_tf_transform(tf_listener, tgt_frame, src_frame):
     """
     Uses ROS TF to lookup the current transform from tgt_frame to src_frame,
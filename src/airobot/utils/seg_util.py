@@ -0,0 +1,227 @@
+"""
+Decode and index the segmentation masks rendered by pybullet.
+
+With the `ER_SEGMENTATION_MASK_OBJECT_AND_LINKINDEX` flag (used by
+`RGBDCameraPybullet.get_images(get_seg=True)`), each pixel value is
+`objectUniqueId + ((linkIndex + 1) << 24)`, and -1 for the pixels
+without any object.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+_BODY_ID_MASK = (1 << 24) - 1
+
+
+def decode_seg(seg):
+    """
+    Split a segmentation mask into body ids and link indices.
+
+    Args:
+        seg (np.ndarray): segmentation mask from pybullet.
+
+    Returns:
+        2-element tuple containing
+
+        - np.ndarray: body unique ids (-1 for the background),
+          same shape as `seg`.
+        - np.ndarray: link indices (-1 for the base link, and
+          for the background), same shape as `seg`.
+    """
+    seg = np.asarray(seg)
+    background = seg < 0
+    body_ids = np.bitwise_and(seg, _BODY_ID_MASK)
+    link_ids = np.right_shift(seg, 24) - 1
+    body_ids[background] = -1
+    link_ids[background] = -1
+    return body_ids, link_ids
+
+
+def encode_seg(body_ids, link_ids=-1):
+    """
+    Pack body ids and link indices into the pybullet
+    segmentation mask values (the inverse of `decode_seg`).
+
+    Args:
+        body_ids (int or np.ndarray): body unique ids.
+        link_ids (int or np.ndarray): link indices (-1 for the base).
+
+    Returns:
+        int or np.ndarray: segmentation mask values.
+    """
+    body_ids = np.asarray(body_ids)
+    link_ids = np.asarray(link_ids)
+    return body_ids + np.left_shift(link_ids + 1, 24)
+
+
+class SegIndex(object):
+    """
+    Index of the pixels of each object in a segmentation mask.
+    It is built with one stable sort of the pixels by label, so the
+    pixels, pixel counts and bounding boxes of all the objects
+    come out of one pass over the image, instead of comparing
+    the whole image with each object id.
+
+    Args:
+        seg (np.ndarray): segmentation mask from pybullet
+            (shape: :math:`[H, W]`).
+        per_link (bool): if True, each link of a body is a separate
+            object, labeled by its raw segmentation value (see
+            `encode_seg`). Otherwise, the objects are the bodies,
+            labeled by their body unique ids.
+
+    Attributes:
+        ids (np.ndarray): labels of the objects in the
+            mask, sorted, without the background (shape: :math:`[K,]`).
+        counts (np.ndarray): number of pixels of each
+            object (shape: :math:`[K,]`).
+        bboxes (np.ndarray): bounding box [row_min, col_min,
+            row_max, col_max] (inclusive) of each object
+            (shape: :math:`[K, 4]`).
+    """
+
+    def __init__(self, seg, per_link=False):
+        seg = np.asarray(seg)
+        if seg.ndim != 2:
+            raise ValueError('seg should be a 2D array.')
+        self._shape = seg.shape
+        labels = seg.reshape(-1)
+        if not per_link:
+            labels = decode_seg(labels)[0]
+        order = np.argsort(labels, kind='mergesort')
+        sorted_labels = labels[order]
+        # the labels are sorted, so the objects are the runs of
+        # equal labels (np.unique would sort them again)
+        starts = np.flatnonzero(sorted_labels[1:] != sorted_labels[:-1]) + 1
+        starts = np.concatenate(([0], starts)) if labels.size else starts
+        ids = sorted_labels[starts]
+        counts = np.diff(np.append(starts, labels.size))
+        if ids.size > 0 and ids[0] < 0:
+            # background
+            order = order[counts[0]:]
+            starts = starts[1:] - counts[0]
+            ids = ids[1:]
+            counts = counts[1:]
+        self._order = order
+        self._starts = starts
+        self._pos = dict((obj_id, i) for i, obj_id in enumerate(ids.tolist()))
+        self.ids = ids
+        self.counts = counts
+        self.bboxes = np.zeros((ids.size, 4), dtype=int)
+        if ids.size > 0:
+            rows, cols = np.divmod(order, self._shape[1])
+            self.bboxes[:, 0] = np.minimum.reduceat(rows, starts)
+            self.bboxes[:, 1] = np.minimum.reduceat(cols, starts)
+            self.bboxes[:, 2] = np.maximum.reduceat(rows, starts)
+            self.bboxes[:, 3] = np.maximum.reduceat(cols, starts)
+
+    def __contains__(self, obj_id):
+        return obj_id in self._pos
+
+    def __len__(self):
+        return self.ids.size
+
+    def pixels(self, obj_id):
+        """
+        Return the flat (row-major) indices of the pixels of an object.
+
+        Args:
+            obj_id (int): object label.
+
+        Returns:
+            np.ndarray: pixel indices, sorted (shape: :math:`[N,]`).
+        """
+        i = self._get_pos(obj_id)
+        start = self._starts[i]
+        return self._order[start:start + self.counts[i]]
+
+    def pixel_coords(self, obj_id):
+        """
+        Return the rows and columns of the pixels of an object.
+
+        Args:
+            obj_id (int): object label.
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: rows (shape: :math:`[N,]`).
+            - np.ndarray: columns (shape: :math:`[N,]`).
+        """
+        return np.divmod(self.pixels(obj_id), self._shape[1])
+
+    def bbox(self, obj_id):
+        """
+        Return the bounding box of an object.
+
+        Args:
+            obj_id (int): object label.
+
+        Returns:
+            np.ndarray: [row_min, col_min, row_max, col_max] (inclusive).
+        """
+        return self.bboxes[self._get_pos(obj_id)]
+
+    def mask(self, obj_id):
+        """
+        Return the binary mask of an object.
+
+        Args:
+            obj_id (int): object label.
+
+        Returns:
+            np.ndarray: mask (shape: :math:`[H, W]`, dtype: bool).
+        """
+        mask = np.zeros(self._shape[0] * self._shape[1], dtype=bool)
+        mask[self.pixels(obj_id)] = True
+        return mask.reshape(self._shape)
+
+    def crop(self, img, obj_id, pad=0):
+        """
+        Crop an image to the bounding box of an object.
+
+        Args:
+            img (np.ndarray): image with the same height and width
+                as the segmentation mask (shape: :math:`[H, W, ...]`).
+            obj_id (int): object label.
+            pad (int): number of pixels added around the bounding box
+                (clipped at the image borders).
+
+        Returns:
+            np.ndarray: view of the cropped image.
+        """
+        rmin, cmin, rmax, cmax = self.bbox(obj_id)
+        rmin = max(rmin - pad, 0)
+        cmin = max(cmin - pad, 0)
+        return img[rmin:rmax + pad + 1, cmin:cmax + pad + 1]
+
+    def select(self, values, obj_id):
+        """
+        Select the per-pixel values of an object, e.g. its points
+        in an organized point cloud from `get_pcd(organized=True)`.
+
+        Args:
+            values (np.ndarray): per-pixel values
+                (shape: :math:`[H, W, ...]` or :math:`[H * W, ...]`).
+            obj_id (int): object label.
+
+        Returns:
+            np.ndarray: values of the pixels of the object
+            (shape: :math:`[N, ...]`).
+        """
+        npix = self._shape[0] * self._shape[1]
+        values = np.asarray(values)
+        if values.shape[:2] == self._shape:
+            values = values.reshape((npix,) + values.shape[2:])
+        elif values.shape[0] != npix:
+            raise ValueError('values should have one entry per pixel.')
+        return values[self.pixels(obj_id)]
+
+    def _get_pos(self, obj_id):
+        try:
+            return self._pos[obj_id]
+        except KeyError:
+            raise ValueError('Object %s is not in the '
+                             'segmentation mask' % str(obj_id))
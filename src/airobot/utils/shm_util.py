@@ -0,0 +1,79 @@
+"""
+Numpy arrays in memory shared between processes.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import tempfile
+
+import numpy as np
+
+
+def shm_dir():
+    """
+    Return the folder for the memory-mapped buffers. /dev/shm
+    is backed by RAM on Linux.
+
+    Returns:
+        str: folder path.
+    """
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def create_shared_array(shape, dtype):
+    """
+    Create a numpy array backed by a memory-mapped file that
+    can be opened by other processes with `open_shared_array`.
+    The file can be removed once all the processes have opened
+    the array.
+
+    Args:
+        shape (tuple): shape of the array.
+        dtype (np.dtype): data type of the array.
+
+    Returns:
+        2-element tuple containing
+
+        - np.ndarray: the shared array.
+        - str: path of the backing file.
+    """
+    fd, path = tempfile.mkstemp(prefix='airobot_', dir=shm_dir())
+    os.close(fd)
+    arr = np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+    return arr, path
+
+
+def open_shared_array(path, shape, dtype):
+    """
+    Open an array created by `create_shared_array`.
+
+    Args:
+        path (str): path of the backing file.
+        shape (tuple): shape of the array.
+        dtype (np.dtype): data type of the array.
+
+    Returns:
+        np.ndarray: the shared array.
+    """
+    return np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+
+
+def remove_shared_files(paths):
+    """
+    Remove the backing files of shared arrays. The arrays that are
+    already open stay valid. The files that have already been
+    removed are skipped, so every process that knows the paths
+    can call it when it exits.
+
+    Args:
+        paths (list): paths of the backing files.
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
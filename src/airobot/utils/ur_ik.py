@@ -0,0 +1,432 @@
+"""
+Closed-form inverse kinematics of the UR arms (e.g. UR5e).
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import airobot.utils.common as arutil
+
+# number of branches of the UR inverse kinematics:
+# shoulder (2) x wrist (2) x elbow (2)
+NUM_BRANCHES = 8
+# DH alpha of the UR arms
+_DH_ALPHA = np.array([np.pi / 2, 0, 0, np.pi / 2, -np.pi / 2, 0])
+
+
+def _tf(rot=None, pos=None):
+    """
+    Return a homogeneous transformation (shape: :math:`[4, 4]`).
+    """
+    tf = np.eye(4)
+    if rot is not None:
+        tf[:3, :3] = rot
+    if pos is not None:
+        tf[:3, 3] = pos
+    return tf
+
+
+def _inv_tf(tf):
+    """
+    Invert homogeneous transformations (shape: :math:`[..., 4, 4]`).
+    """
+    inv = np.zeros_like(tf)
+    rot_t = np.swapaxes(tf[..., :3, :3], -1, -2)
+    inv[..., :3, :3] = rot_t
+    inv[..., :3, 3] = -np.einsum('...ij,...j->...i', rot_t, tf[..., :3, 3])
+    inv[..., 3, 3] = 1
+    return inv
+
+
+def _dh_tf(theta, d, a, alpha):
+    """
+    Return the DH transformations
+    Rot_z(theta) * Trans_z(d) * Trans_x(a) * Rot_x(alpha).
+
+    Args:
+        theta (np.ndarray): joint angles (shape: :math:`[...]`).
+        d (float): DH parameter d.
+        a (float): DH parameter a.
+        alpha (float): DH parameter alpha.
+
+    Returns:
+        np.ndarray: transformations (shape: :math:`[..., 4, 4]`).
+    """
+    ct, st = np.cos(theta), np.sin(theta)
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    tf = np.zeros(np.shape(theta) + (4, 4))
+    tf[..., 0, 0] = ct
+    tf[..., 0, 1] = -st * ca
+    tf[..., 0, 2] = st * sa
+    tf[..., 0, 3] = a * ct
+    tf[..., 1, 0] = st
+    tf[..., 1, 1] = ct * ca
+    tf[..., 1, 2] = -ct * sa
+    tf[..., 1, 3] = a * st
+    tf[..., 2, 1] = sa
+    tf[..., 2, 2] = ca
+    tf[..., 2, 3] = d
+    tf[..., 3, 3] = 1
+    return tf
+
+
+def _axis_rot(axis, angle):
+    """
+    Return the rotation matrix of `angle` about the unit vector `axis`.
+    """
+    axis = np.asarray(axis, dtype=np.float64)
+    return arutil.rotvec2rot(axis / np.linalg.norm(axis) * angle)
+
+
+def parse_urdf_joints(urdf):
+    """
+    Read the joints of a URDF.
+
+    Args:
+        urdf (str): path of the URDF file, or the URDF itself
+            (e.g. the `robot_description` ROS parameter).
+
+    Returns:
+        dict: {child link name: joint}, where a joint is a dict with
+        `name`, `type`, `parent`, `origin` (homogeneous transformation
+        from the parent link frame, shape: :math:`[4, 4]`), `axis`
+        (shape: :math:`[3,]`) and `limit` ([lower, upper], None if
+        the joint has no position limits).
+    """
+    if urdf.lstrip().startswith('<'):
+        root = ET.fromstring(urdf)
+    else:
+        root = ET.parse(urdf).getroot()
+    joints = {}
+    for joint in root.findall('joint'):
+        origin = joint.find('origin')
+        xyz, rpy = [0, 0, 0], [0, 0, 0]
+        if origin is not None:
+            xyz = [float(v) for v in origin.get('xyz', '0 0 0').split()]
+            rpy = [float(v) for v in origin.get('rpy', '0 0 0').split()]
+        axis = joint.find('axis')
+        axis = [1, 0, 0] if axis is None else \
+            [float(v) for v in axis.get('xyz').split()]
+        limit = joint.find('limit')
+        if joint.get('type') == 'continuous' or limit is None or \
+                limit.get('lower') is None or limit.get('upper') is None:
+            limit = None
+        else:
+            limit = [float(limit.get('lower')), float(limit.get('upper'))]
+        child = joint.find('child').get('link')
+        joints[child] = {'name': joint.get('name'),
+                         'type': joint.get('type'),
+                         'parent': joint.find('parent').get('link'),
+                         'origin': _tf(arutil.euler2rot(rpy), xyz),
+                         'axis': np.array(axis, dtype=np.float64),
+                         'limit': limit}
+    return joints
+
+
+def urdf_link_tf(joints, base_frame, link, jpos=None):
+    """
+    Forward kinematics of a URDF chain.
+
+    Args:
+        joints (dict): joints of the URDF (see `parse_urdf_joints`).
+        base_frame (str): name of the base link.
+        link (str): name of the link, a descendant of the base link.
+        jpos (dict): {joint name: joint angle}, the missing
+            joints are at 0.
+
+    Returns:
+        np.ndarray: pose of the link frame in the base link frame
+        (shape: :math:`[4, 4]`).
+    """
+    jpos = {} if jpos is None else jpos
+    tf = np.eye(4)
+    while link != base_frame:
+        if link not in joints:
+            raise ValueError('Link [%s] is not a descendant of '
+                             '[%s].' % (link, base_frame))
+        joint = joints[link]
+        angle = jpos.get(joint['name'], 0)
+        if joint['type'] in ('revolute', 'continuous') and angle != 0:
+            tf = _tf(_axis_rot(joint['axis'], angle)).dot(tf)
+        elif joint['type'] != 'fixed' and angle != 0:
+            raise ValueError('Joint [%s] of type %s is not '
+                             'supported.' % (joint['name'], joint['type']))
+        tf = joint['origin'].dot(tf)
+        link = joint['parent']
+    return tf
+
+
+class URAnalyticalIK(object):
+    """
+    Closed-form inverse kinematics of a UR arm, which returns
+    all the 8 solution branches (shoulder left/right, wrist up/down,
+    elbow up/down) of a batch of end-effector poses.
+
+    The end-effector frame is rigidly attached to the last link, its
+    pose is given in the frame of the arm base (`base` in the UR URDFs,
+    which coincides with the base frame of the DH convention).
+
+    Args:
+        d (list or np.ndarray): DH parameters d (shape: :math:`[6,]`).
+        a (list or np.ndarray): DH parameters a (shape: :math:`[6,]`).
+        ee_tf (np.ndarray): pose of the end-effector frame in the
+            DH frame of the last joint (shape: :math:`[4, 4]`).
+            Defaults to the identity.
+        jnt_limits (list or np.ndarray): [lower, upper] position
+            limits of each joint (shape: :math:`[6, 2]`). Defaults to
+            [-2pi, 2pi], the joint range of the UR arms.
+
+    Attributes:
+        d (np.ndarray): DH parameters d (shape: :math:`[6,]`).
+        a (np.ndarray): DH parameters a (shape: :math:`[6,]`).
+        jnt_limits (np.ndarray): [lower, upper] position limits
+            of each joint (shape: :math:`[6, 2]`).
+    """
+
+    def __init__(self, d, a, ee_tf=None, jnt_limits=None):
+        self.d = np.array(d, dtype=np.float64)
+        self.a = np.array(a, dtype=np.float64)
+        if self.d.shape != (6,) or self.a.shape != (6,):
+            raise ValueError('d and a should have 6 elements.')
+        if jnt_limits is None:
+            jnt_limits = [[-2 * np.pi, 2 * np.pi]] * 6
+        self.jnt_limits = np.array(jnt_limits, dtype=np.float64)
+        if self.jnt_limits.shape != (6, 2):
+            raise ValueError('jnt_limits should have shape [6, 2].')
+        if abs(self.d[5]) < 1e-6:
+            raise ValueError('d[5] should not be zero, move the DH frame '
+                             'of the last joint along its axis.')
+        self._ee_tf = np.eye(4) if ee_tf is None else np.array(ee_tf)
+        self._inv_ee_tf = _inv_tf(self._ee_tf)
+
+    @staticmethod
+    def from_urdf(urdf, base_frame, ee_frame, joint_names):
+        """
+        Build the inverse kinematics of a UR arm from its URDF.
+
+        The DH parameters are read from the joint frames at the zero
+        joint angles, and checked against the forward kinematics of
+        the URDF. The joints without position limits in the URDF
+        (e.g. continuous joints) are not limited.
+
+        Args:
+            urdf (str): path of the URDF file, or the URDF itself.
+            base_frame (str): name of the arm base link (the DH base
+                frame, `base` in the UR URDFs).
+            ee_frame (str): name of the end-effector link.
+            joint_names (list): names of the 6 arm joints.
+
+        Returns:
+            URAnalyticalIK: the inverse kinematics.
+        """
+        joints = parse_urdf_joints(urdf)
+        child_links = dict((joint['name'], link)
+                           for link, joint in joints.items())
+        # origins of the joint frames and of the end-effector frame
+        # in the base frame, at the zero joint angles
+        pts = np.array([urdf_link_tf(joints, base_frame,
+                                     child_links[name])[:3, 3]
+                        for name in joint_names])
+        ee_tf = urdf_link_tf(joints, base_frame, ee_frame)
+        d4 = -pts[4, 1]
+        # place the DH frame of the last joint on its axis,
+        # closest to the end-effector origin
+        d = [pts[1, 2], 0, 0, d4, pts[1, 2] - pts[5, 2], -ee_tf[1, 3] - d4]
+        a = [0, pts[2, 0] - pts[1, 0], pts[3, 0] - pts[2, 0], 0, 0, 0]
+        jnt_limits = [joints[child_links[name]]['limit'] or
+                      [-np.inf, np.inf] for name in joint_names]
+        ik = URAnalyticalIK(d, a, jnt_limits=jnt_limits)
+        ik._ee_tf = _inv_tf(ik.fk(np.zeros(6))).dot(ee_tf)
+        ik._inv_ee_tf = _inv_tf(ik._ee_tf)
+        rng = np.random.RandomState(0)
+        for jpos in rng.uniform(-np.pi, np.pi, (3, 6)):
+            urdf_tf = urdf_link_tf(joints, base_frame, ee_frame,
+                                   dict(zip(joint_names, jpos)))
+            if not np.allclose(ik.fk(jpos), urdf_tf, atol=1e-6):
+                raise ValueError('The URDF does not have the '
+                                 'kinematic structure of a UR arm.')
+        return ik
+
+    def fk(self, jpos):
+        """
+        Forward kinematics.
+
+        Args:
+            jpos (list or np.ndarray): joint angles (shape: :math:`[6,]`
+                or :math:`[N, 6]`).
+
+        Returns:
+            np.ndarray: end-effector poses in the base frame
+            (shape: :math:`[4, 4]` or :math:`[N, 4, 4]`).
+        """
+        jpos = np.asarray(jpos, dtype=np.float64)
+        tf = _dh_tf(jpos[..., 0], self.d[0], self.a[0], _DH_ALPHA[0])
+        for i in range(1, 6):
+            tf = np.matmul(tf, _dh_tf(jpos[..., i], self.d[i],
+                                      self.a[i], _DH_ALPHA[i]))
+        return np.matmul(tf, self._ee_tf)
+
+    def ik_all(self, poses, q6=0.):
+        """
+        Compute the 8 inverse kinematics branches of each pose.
+
+        Args:
+            poses (list or np.ndarray): end-effector poses in the base
+                frame, [x, y, z, qx, qy, qz, qw] (shape: :math:`[7,]`
+                or :math:`[N, 7]`).
+            q6 (float or np.ndarray): angle of the last joint when the
+                wrist is singular (the last joint axis is parallel to the
+                shoulder and elbow axes), shape: :math:`[N,]` or scalar.
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: joint angles in [-pi, pi) of each branch, NaN
+              if the pose is out of reach for the branch
+              (shape: :math:`[8, 6]` or :math:`[N, 8, 6]`).
+            - np.ndarray: whether each branch is valid
+              (shape: :math:`[8,]` or :math:`[N, 8]`).
+        """
+        poses = np.asarray(poses, dtype=np.float64)
+        if poses.shape[-1:] != (7,) or poses.ndim > 2:
+            raise ValueError('poses should have shape [7,] or [N, 7].')
+        tgt = np.zeros(poses.shape[:-1] + (4, 4))
+        tgt[..., :3, :3] = arutil.quat2rot(poses[..., 3:])
+        tgt[..., :3, 3] = poses[..., :3]
+        tgt[..., 3, 3] = 1
+        # pose of the DH frame of the last joint
+        tf = np.matmul(tgt, self._inv_ee_tf)[..., :3, :]
+        if poses.ndim == 1:
+            # python floats are much faster than numpy on scalars
+            branches = _ik_branches(tf.ravel().tolist(), float(q6),
+                                    self.d, self.a, arutil._ScalarOps)
+            jpos = np.array([branch[0] for branch in branches])
+            valid = np.array([branch[1] for branch in branches])
+        else:
+            branches = _ik_branches(list(tf.reshape(-1, 12).T),
+                                    np.asarray(q6, dtype=np.float64),
+                                    self.d, self.a, arutil._ArrayOps)
+            jpos = np.stack([np.stack(np.broadcast_arrays(*branch[0]),
+                                      axis=-1)
+                             for branch in branches], axis=1)
+            valid = np.stack([np.broadcast_to(branch[1], poses.shape[:1])
+                              for branch in branches], axis=1)
+        jpos = arutil.ang_in_mpi_ppi(jpos)
+        jpos[~valid] = np.nan
+        return jpos, valid
+
+    def ik(self, poses, seed):
+        """
+        Compute the inverse kinematics solution of each pose that is
+        closest to the seed joint angles.
+
+        Args:
+            poses (list or np.ndarray): end-effector poses in the base
+                frame, [x, y, z, qx, qy, qz, qw] (shape: :math:`[7,]`
+                or :math:`[N, 7]`).
+            seed (list or np.ndarray): seed joint angles
+                (shape: :math:`[6,]` or :math:`[N, 6]`).
+
+        Returns:
+            2-element tuple containing
+
+            - np.ndarray: joint angles within the joint limits, each
+              within pi of the seed joint angle, or moved by a full
+              turn if that angle is out of the limits. NaN if the
+              pose is out of reach (shape: :math:`[6,]`
+              or :math:`[N, 6]`).
+            - np.ndarray: whether a solution is found
+              (shape: scalar or :math:`[N,]`).
+        """
+        seed = np.asarray(seed, dtype=np.float64)
+        jpos, valid = self.ik_all(poses, q6=seed[..., 5])
+        # the joints turn more than a full circle, so the
+        # distance to the seed is measured on the wrapped angles
+        diff = arutil.ang_in_mpi_ppi(jpos - seed[..., None, :])
+        jpos = seed[..., None, :] + diff
+        # move the joints out of the limits by a full turn, the
+        # branches that still do not fit in the limits are not valid
+        lower, upper = self.jnt_limits[:, 0], self.jnt_limits[:, 1]
+        jpos = np.where(jpos > upper, jpos - 2 * np.pi, jpos)
+        jpos = np.where(jpos < lower, jpos + 2 * np.pi, jpos)
+        valid = valid & np.all((jpos >= lower) & (jpos <= upper), axis=-1)
+        jpos[~valid] = np.nan
+        dist = np.sum(diff ** 2, axis=-1)
+        dist[~valid] = np.inf
+        best = np.argmin(dist, axis=-1)
+        if jpos.ndim == 2:
+            return jpos[best], valid[best]
+        idx = np.arange(jpos.shape[0])
+        return jpos[idx, best], valid[idx, best]
+
+
+def _ik_branches(tf, q6, d, a, ops):
+    """
+    Compute the 8 inverse kinematics branches of a UR arm.
+
+    Args:
+        tf (list): the first 3 rows of the pose of the DH frame of the
+            last joint, in row-major order (12 elements). The elements
+            are python floats for a single pose, or arrays for a batch.
+        q6 (float or np.ndarray): angle of the last joint
+            when the wrist is singular.
+        d (np.ndarray): DH parameters d (shape: :math:`[6,]`).
+        a (np.ndarray): DH parameters a (shape: :math:`[6,]`).
+        ops (class): math functions for the elements of `tf`.
+
+    Returns:
+        list: [joint angles (6 elements), valid] of each branch.
+    """
+    r00, r01, r02, px, r10, r11, r12, py, r20, r21, r22, pz = tf
+    d = d.tolist()
+    a = a.tolist()
+    # the wrist center (origin of the DH frame 5)
+    wx, wy, wz = px - d[5] * r02, py - d[5] * r12, pz - d[5] * r22
+    radius = ops.hypot(wx, wy)
+    cos_phi = d[3] / ops.where(radius > 1e-12, radius, 1e-12)
+    phi = ops.acos(ops.clip(cos_phi, -1, 1))
+    psi = ops.atan2(wy, wx)
+    valid1 = abs(cos_phi) <= 1
+    branches = []
+    # shoulder left/right
+    for sign1 in (1, -1):
+        q1 = psi + sign1 * phi + np.pi / 2
+        s1, c1 = ops.sin(q1), ops.cos(q1)
+        cos_q5 = (px * s1 - py * c1 - d[3]) / d[5]
+        valid5 = valid1 & (abs(cos_q5) <= 1 + 1e-9)
+        acos_q5 = ops.acos(ops.clip(cos_q5, -1, 1))
+        # wrist up/down
+        for sign5 in (1, -1):
+            q5 = sign5 * acos_q5
+            s5, c5 = ops.sin(q5), ops.cos(q5)
+            sign = ops.where(s5 < 0, -1., 1.)
+            q6 = ops.where(abs(s5) < 1e-9, q6,
+                           ops.atan2(sign * (r11 * c1 - r01 * s1),
+                                     sign * (r00 * s1 - r10 * c1)))
+            s6, c6 = ops.sin(q6), ops.cos(q6)
+            # the x axis of the DH frame 4 is (c5 * c6, -c5 * s6, -s5) in
+            # the DH frame 6, its angle in the DH frame 1 is q2 + q3 + q4
+            x4x = c5 * (c6 * r00 - s6 * r01) - s5 * r02
+            x4y = c5 * (c6 * r10 - s6 * r11) - s5 * r12
+            x4z = c5 * (c6 * r20 - s6 * r21) - s5 * r22
+            q234 = ops.atan2(x4z, c1 * x4x + s1 * x4y)
+            # origin of the DH frame 4 in the DH frame 1
+            x14 = c1 * wx + s1 * wy - d[4] * ops.sin(q234)
+            y14 = wz - d[0] + d[4] * ops.cos(q234)
+            cos_q3 = (x14 * x14 + y14 * y14 - a[1] * a[1] -
+                      a[2] * a[2]) / (2 * a[1] * a[2])
+            valid3 = valid5 & (abs(cos_q3) <= 1 + 1e-9)
+            acos_q3 = ops.acos(ops.clip(cos_q3, -1, 1))
+            angle14 = ops.atan2(y14, x14)
+            # elbow up/down
+            for sign3 in (1, -1):
+                q3 = sign3 * acos_q3
+                q2 = angle14 - ops.atan2(a[2] * ops.sin(q3),
+                                         a[1] + a[2] * ops.cos(q3))
+                q4 = q234 - q2 - q3
+                branches.append([[q1, q2, q3, q4, q5, q6], valid3])
+    return branches
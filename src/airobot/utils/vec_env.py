@@ -0,0 +1,318 @@
+"""
+Run several headless pybullet robots in worker processes
+and step them in lockstep with batched actions.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import multiprocessing as mp
+
+import numpy as np
+from gym import spaces
+
+from airobot import Robot
+from airobot.utils.shm_util import create_shared_array
+from airobot.utils.shm_util import open_shared_array
+from airobot.utils.shm_util import remove_shared_files
+
+
+class RobotEnv(object):
+    """
+    A minimal environment around a simulated robot in
+    pybullet DIRECT mode (no GUI, step simulation).
+
+    The action is the target joint positions of the arm,
+    and the observation is the joint positions
+    concatenated with the joint velocities of the arm.
+
+    Args:
+        robot_name (str): robot name.
+        action_repeat (int): number of simulation steps
+            taken for each action.
+        robot_cfg (dict): extra arguments to pass in the constructor
+            of the Robot class. `pb_cfg` is always overridden
+            to create a headless client in step simulation mode.
+
+    Attributes:
+        robot (Robot): the simulated robot.
+        action_space (gym.spaces.Box): action space.
+        observation_space (gym.spaces.Box): observation space.
+    """
+
+    def __init__(self, robot_name='ur5e_2f140', action_repeat=10,
+                 robot_cfg=None):
+        robot_kwargs = {'use_cam': False}
+        if robot_cfg is not None:
+            robot_kwargs.update(robot_cfg)
+        pb_cfg = dict(robot_kwargs.get('pb_cfg', {}))
+        pb_cfg.update({'gui': False, 'realtime': False})
+        robot_kwargs['pb_cfg'] = pb_cfg
+        self.robot = Robot(robot_name, **robot_kwargs)
+        self._action_repeat = action_repeat
+
+        dof = len(self.robot.arm.arm_jnt_names)
+        jnt_high = np.full(dof, np.pi)
+        self.action_space = spaces.Box(low=-jnt_high,
+                                       high=jnt_high,
+                                       dtype=np.float64)
+        obs_high = np.full(2 * dof, np.inf)
+        self.observation_space = spaces.Box(low=-obs_high,
+                                            high=obs_high,
+                                            dtype=np.float64)
+
+    def reset(self):
+        """
+        Reset the robot to its home position.
+
+        Returns:
+            np.ndarray: observation.
+        """
+        self.robot.arm.reset(fast=True)
+        self.robot.arm.go_home(ignore_physics=True)
+        return self._get_obs()
+
+    def step(self, action):
+        """
+        Send the joint position targets and step the simulation.
+
+        Args:
+            action (np.ndarray): target joint positions.
+
+        Returns:
+            4-element tuple containing
+
+            - np.ndarray: observation.
+            - float: reward.
+            - bool: whether the episode is done.
+            - dict: extra information.
+        """
+        self.robot.arm.set_jpos(action, wait=False)
+        for _ in range(self._action_repeat):
+            self.robot.pb_client.stepSimulation()
+        return self._get_obs(), 0.0, False, {}
+
+    def _get_obs(self):
+        jpos = self.robot.arm.get_jpos()
+        jvel = self.robot.arm.get_jvel()
+        return np.array(jpos + jvel)
+
+
+def _worker(remote, parent_remote, index, env_cls, env_kwargs):
+    """
+    Worker process that owns one environment.
+    """
+    parent_remote.close()
+    # backing files of the shared arrays, removed on exit
+    # in case the parent could not remove them
+    paths = []
+    try:
+        env = env_cls(**env_kwargs)
+        obs = np.asarray(env.reset())
+        act_shape = env.action_space.shape
+        remote.send((obs.shape, obs.dtype.str, act_shape))
+        buf_info = remote.recv()
+        paths = [info[0] for info in buf_info.values()]
+        obs_buf = open_shared_array(*buf_info['obs'])
+        act_buf = open_shared_array(*buf_info['act'])
+        rew_buf = open_shared_array(*buf_info['rew'])
+        done_buf = open_shared_array(*buf_info['done'])
+        obs_buf[index] = obs
+        remote.send(True)
+        while True:
+            cmd = remote.recv()
+            if cmd == 'step':
+                obs, reward, done, info = env.step(np.array(act_buf[index]))
+                if done:
+                    info['terminal_observation'] = np.asarray(obs)
+                    obs = env.reset()
+                obs_buf[index] = obs
+                rew_buf[index] = reward
+                done_buf[index] = done
+                remote.send(info)
+            elif cmd == 'reset':
+                obs_buf[index] = env.reset()
+                remote.send(None)
+            elif cmd == 'close':
+                remote.close()
+                break
+            else:
+                raise ValueError('Unknown command: %s' % cmd)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        remove_shared_files(paths)
+
+
+class VecRobotEnv(object):
+    """
+    Run N environments in worker processes, one pybullet client
+    (DIRECT mode) per process. Actions are passed in as one batch,
+    and the observations of all the environments are written by the
+    workers into one shared-memory array, so no observation is pickled.
+
+    Note:
+        The arrays returned by `reset` and `step` are views of the
+        shared memory. They are overwritten by the next call to
+        `reset` or `step`; copy them if you need to keep them.
+
+        With the `spawn` start method (default on Python 3),
+        `env_cls` and `env_kwargs` need to be picklable.
+
+    Args:
+        num_envs (int): number of environments (worker processes).
+        env_cls (class): environment class. Its constructor is called
+            with `env_kwargs` in each worker, and it should provide
+            `reset()`, `step(action)` (gym style) and `action_space`.
+            Defaults to `RobotEnv`.
+        env_kwargs (dict): arguments to pass in the constructor of
+            the environment class.
+        start_method (str): multiprocessing start method. If None,
+            `spawn` is used when available, so the workers do not
+            inherit the pybullet state of the parent process.
+
+    Attributes:
+        num_envs (int): number of environments.
+        obs_shape (tuple): shape of the observation of one environment.
+        action_shape (tuple): shape of the action of one environment.
+    """
+
+    def __init__(self, num_envs, env_cls=None, env_kwargs=None,
+                 start_method=None):
+        if num_envs < 1:
+            raise ValueError('num_envs should be a positive integer.')
+        if env_cls is None:
+            env_cls = RobotEnv
+        if env_kwargs is None:
+            env_kwargs = {}
+        self.num_envs = num_envs
+        if hasattr(mp, 'get_context'):
+            if start_method is None:
+                start_method = 'spawn'
+            ctx = mp.get_context(start_method)
+        else:
+            ctx = mp
+        pipes = [ctx.Pipe() for _ in range(num_envs)]
+        self._remotes = [pipe[0] for pipe in pipes]
+        self._procs = []
+        for i, (remote, work_remote) in enumerate(pipes):
+            args = (work_remote, remote, i, env_cls, env_kwargs)
+            proc = ctx.Process(target=_worker, args=args)
+            proc.daemon = True
+            proc.start()
+            work_remote.close()
+            self._procs.append(proc)
+
+        specs = [remote.recv() for remote in self._remotes]
+        obs_shape, obs_dtype, act_shape = specs[0]
+        for spec in specs[1:]:
+            if spec != specs[0]:
+                raise ValueError('All the environments should have the '
+                                 'same observation and action spaces.')
+        self.obs_shape = tuple(obs_shape)
+        self.action_shape = tuple(act_shape)
+        n = (num_envs,)
+        bufs = {'obs': (n + self.obs_shape, np.dtype(obs_dtype)),
+                'act': (n + self.action_shape, np.float64),
+                'rew': (n, np.float64),
+                'done': (n, np.bool_)}
+        buf_info = {}
+        paths = []
+        for key, (shape, dtype) in bufs.items():
+            arr, path = create_shared_array(shape, dtype)
+            setattr(self, '_%s_buf' % key, arr)
+            buf_info[key] = (path, shape, dtype)
+            paths.append(path)
+        try:
+            for remote in self._remotes:
+                remote.send(buf_info)
+            for remote in self._remotes:
+                remote.recv()
+        finally:
+            # every process has mapped the buffers (or a worker
+            # has failed), the backing files are not needed anymore
+            remove_shared_files(paths)
+        self._waiting = False
+        self._closed = False
+
+    def reset(self):
+        """
+        Reset all the environments.
+
+        Returns:
+            np.ndarray: observations (shape: :math:`[N, ...]`).
+        """
+        for remote in self._remotes:
+            remote.send('reset')
+        for remote in self._remotes:
+            remote.recv()
+        return self._obs_buf
+
+    def step_async(self, actions):
+        """
+        Send the actions to the workers without waiting for the results.
+
+        Args:
+            actions (np.ndarray): actions for all
+                the environments (shape: :math:`[N, ...]`).
+        """
+        actions = np.asarray(actions)
+        if actions.shape != self._act_buf.shape:
+            raise ValueError('Actions should be in shape %s, '
+                             'got %s' % (str(self._act_buf.shape),
+                                         str(actions.shape)))
+        self._act_buf[:] = actions
+        for remote in self._remotes:
+            remote.send('step')
+        self._waiting = True
+
+    def step_wait(self):
+        """
+        Wait for the results of `step_async`.
+
+        Returns:
+            4-element tuple containing
+
+            - np.ndarray: observations (shape: :math:`[N, ...]`).
+            - np.ndarray: rewards (shape: :math:`[N,]`).
+            - np.ndarray: done flags (shape: :math:`[N,]`).
+            - list: info dicts. If an episode ends, the environment is
+              reset and the last observation of the episode is stored
+              in `info['terminal_observation']`.
+        """
+        infos = [remote.recv() for remote in self._remotes]
+        self._waiting = False
+        return self._obs_buf, self._rew_buf, self._done_buf, infos
+
+    def step(self, actions):
+        """
+        Step all the environments with a batch of actions.
+
+        Args:
+            actions (np.ndarray): actions for all
+                the environments (shape: :math:`[N, ...]`).
+
+        Returns:
+            4-element tuple (see `step_wait`).
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        """
+        Shut down all the worker processes.
+        """
+        if self._closed:
+            return
+        if self._waiting:
+            for remote in self._remotes:
+                remote.recv()
+        for remote in self._remotes:
+            remote.send('close')
+        for proc in self._procs:
+            proc.join()
+        self._closed = True
+
+    def __del__(self):
+        if hasattr(self, '_closed'):
+            self.close()
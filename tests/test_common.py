@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+from scipy.spatial.transform import Rotation as R
+
+import airobot.utils.common as arutil
+
+np.random.seed(0)
+QUATS = R.random(50, random_state=0).as_quat()
+# identity, rotations by pi and tiny rotations
+QUATS = np.concatenate([QUATS,
+                        [[0, 0, 0, 1],
+                         [1, 0, 0, 0],
+                         [0, 0.6, 0.8, 0],
+                         [1e-9, -2e-9, 0, 1],
+                         [0.5, -0.5, 0.5, -0.5]]])
+EULERS = np.random.uniform(-np.pi, np.pi, (50, 3))
+EULERS[:, 1] /= 2
+
+
+def _as_matrix(rot):
+    if hasattr(rot, 'as_matrix'):
+        return rot.as_matrix()
+    return rot.as_dcm()
+
+
+def _from_matrix(mat):
+    if hasattr(R, 'from_matrix'):
+        return R.from_matrix(mat)
+    return R.from_dcm(mat)
+
+
+def _same_rotation(quat1, quat2):
+    # q and -q are the same rotation
+    dot = np.abs(np.sum(np.asarray(quat1) * np.asarray(quat2), axis=-1))
+    return np.allclose(dot, 1, atol=1e-9)
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_quat2rot(batched):
+    quats = QUATS if batched else QUATS[0]
+    expected = _as_matrix(R.from_quat(quats))
+    np.testing.assert_allclose(arutil.quat2rot(quats), expected, atol=1e-12)
+
+
+def test_quat2rot_unnormalized():
+    quat = QUATS[0] * 3
+    np.testing.assert_allclose(arutil.quat2rot(quat),
+                               arutil.quat2rot(QUATS[0]), atol=1e-12)
+
+
+@pytest.mark.parametrize("axes", ['xyz', 'XYZ', 'zyx', 'ZYZ'])
+def test_euler_round_trip(axes):
+    quats = arutil.euler2quat(EULERS, axes)
+    assert _same_rotation(quats, R.from_euler(axes, EULERS).as_quat())
+    assert _same_rotation(arutil.euler2quat(arutil.quat2euler(quats, axes),
+                                            axes), quats)
+    np.testing.assert_allclose(arutil.euler2rot(EULERS, axes),
+                               _as_matrix(R.from_euler(axes, EULERS)),
+                               atol=1e-12)
+
+
+def test_quat2euler():
+    np.testing.assert_allclose(arutil.quat2euler(QUATS[:50]),
+                               R.from_quat(QUATS[:50]).as_euler('xyz'),
+                               atol=1e-9)
+    np.testing.assert_allclose(arutil.quat2euler(QUATS[0]),
+                               R.from_quat(QUATS[0]).as_euler('xyz'),
+                               atol=1e-9)
+
+
+def test_euler2quat_matches_scipy():
+    np.testing.assert_allclose(arutil.euler2quat(EULERS),
+                               R.from_euler('xyz', EULERS).as_quat(),
+                               atol=1e-12)
+
+
+def test_rot2quat():
+    mats = _as_matrix(R.from_quat(QUATS))
+    np.testing.assert_allclose(arutil.rot2quat(mats),
+                               _from_matrix(mats).as_quat(), atol=1e-12)
+    assert _same_rotation(arutil.rot2quat(mats[0]), QUATS[0])
+
+
+def test_rot2euler():
+    mats = arutil.euler2rot(EULERS)
+    np.testing.assert_allclose(arutil.rot2euler(mats), EULERS, atol=1e-9)
+    np.testing.assert_allclose(arutil.rot2euler(mats[3]), EULERS[3],
+                               atol=1e-9)
+
+
+def test_rotvec():
+    rotvecs = arutil.quat2rotvec(QUATS)
+    np.testing.assert_allclose(rotvecs, R.from_quat(QUATS).as_rotvec(),
+                               atol=1e-9)
+    assert _same_rotation(arutil.rotvec2quat(rotvecs), QUATS)
+    np.testing.assert_allclose(arutil.rotvec2rot(rotvecs),
+                               arutil.quat2rot(QUATS), atol=1e-9)
+    np.testing.assert_allclose(arutil.rotvec2euler(rotvecs[:50]),
+                               arutil.quat2euler(QUATS[:50]), atol=1e-9)
+    np.testing.assert_allclose(arutil.rotvec2quat([0, 0, 0]), [0, 0, 0, 1])
+
+
+def test_quat_multiply_and_inverse():
+    quats1 = QUATS
+    quats2 = QUATS[::-1]
+    expected = (R.from_quat(quats1) * R.from_quat(quats2)).as_quat()
+    np.testing.assert_allclose(arutil.quat_multiply(quats1, quats2),
+                               expected, atol=1e-12)
+    # broadcasting a single quaternion over a batch
+    np.testing.assert_allclose(arutil.quat_multiply(quats1[0], quats2),
+                               (R.from_quat(quats1[0]) *
+                                R.from_quat(quats2)).as_quat(), atol=1e-12)
+    identity = arutil.quat_multiply(quats1, arutil.quat_inverse(quats1))
+    assert _same_rotation(identity, [0, 0, 0, 1])
+
+
+def test_to_quat():
+    np.testing.assert_allclose(arutil.to_quat(EULERS[0]),
+                               arutil.euler2quat(EULERS[0]))
+    assert _same_rotation(arutil.to_quat(arutil.quat2rot(QUATS[0])),
+                          QUATS[0])
+
+
+@pytest.mark.parametrize("func, arg", [(arutil.quat2rot, np.zeros(3)),
+                                       (arutil.rot2quat, np.eye(4)),
+                                       (arutil.euler2quat, np.zeros(4))])
+def test_invalid_shapes(func, arg):
+    with pytest.raises(ValueError):
+        func(arg)
+
+
+def test_pose():
+    pose = arutil.Pose([1, 2, 3], QUATS[0])
+    assert pose._rot_mat is None and pose._euler is None
+    np.testing.assert_allclose(pose.rot_mat, arutil.quat2rot(QUATS[0]))
+    assert pose.rot_mat is pose.rot_mat
+    pos, quat, rot_mat, euler = pose
+    np.testing.assert_allclose(pos, [1, 2, 3])
+    np.testing.assert_allclose(quat, QUATS[0])
+    np.testing.assert_allclose(euler, arutil.quat2euler(QUATS[0]))
+    assert len(pose) == 4
+    assert pose[-1] is euler
+    assert pose[:2] == (pose.pos, pose.quat)
+    with pytest.raises(IndexError):
+        pose[4]
+    with pytest.raises(AttributeError):
+        pose.other = 1
@@ -0,0 +1,65 @@
+import os
+
+import pybullet as p
+import pytest
+
+from airobot.utils.pb_util import BulletClient
+from airobot.utils.pb_util import TextureModder
+
+TEXTURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'examples', 'ur5e', 'sim',
+                            'textures', '1.jpg')
+
+
+def _scene_calls(pb_client, name, start):
+    return [call for call in pb_client.get_scene_log(start)
+            if call[0] == name]
+
+
+@pytest.fixture()
+def create_boxes():
+    pb_client = BulletClient(connection_mode=p.DIRECT,
+                             opengl_render=False, scene_log=True)
+    box_ids = [pb_client.load_geom('box', size=0.2, mass=0,
+                                   base_pos=[x, 0, 0])
+               for x in [-0.5, 0.5]]
+    yield pb_client, box_ids
+    pb_client.disconnect()
+
+
+@pytest.mark.parametrize("func", ['set_gradient', 'set_noise'])
+def test_modify_shared_texture(create_boxes, func):
+    pb_client, box_ids = create_boxes
+    modder = TextureModder(pb_client.get_client_id())
+    for box_id in box_ids:
+        modder.set_texture(box_id, -1, TEXTURE_FILE)
+    shared_id = modder.texture_dict[box_ids[0]][-1][0]
+    assert modder.texture_dict[box_ids[1]][-1][0] == shared_id
+    log_start = pb_client.get_scene_log_end()
+    getattr(modder, func)(box_ids[0], -1, [255, 0, 0], [0, 0, 255])
+    new_id = modder.texture_dict[box_ids[0]][-1][0]
+    assert new_id != shared_id
+    assert modder.texture_dict[box_ids[1]][-1][0] == shared_id
+    shape_calls = _scene_calls(pb_client, 'changeVisualShape', log_start)
+    assert [call[1][0] for call in shape_calls] == [box_ids[0]]
+    assert shape_calls[0][2]['textureUniqueId'] == new_id
+    tex_calls = _scene_calls(pb_client, 'changeTexture', log_start)
+    assert [call[1][0] for call in tex_calls] == [new_id]
+    # the shared texture stays in the pool
+    modder.set_texture(box_ids[0], -1, TEXTURE_FILE)
+    stats = modder.get_texture_pool_stats()
+    assert stats['loads'] == 2
+    assert stats['textures'] == 1
+    assert modder.texture_dict[box_ids[0]][-1][0] == shared_id
+
+
+def test_modify_shared_texture_mem_limit(create_boxes):
+    pb_client, box_ids = create_boxes
+    modder = TextureModder(pb_client.get_client_id())
+    for box_id in box_ids:
+        modder.set_texture(box_id, -1, TEXTURE_FILE)
+    modder._tex_mem_limit = modder.get_texture_pool_stats()['mem']
+    shared_id = modder.texture_dict[box_ids[0]][-1][0]
+    modder.set_noise(box_ids[0], -1, [255, 0, 0], [0, 0, 255])
+    assert modder.texture_dict[box_ids[0]][-1][0] == shared_id
+    assert modder.get_texture_pool_stats()['textures'] == 1
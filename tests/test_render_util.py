@@ -0,0 +1,64 @@
+import numpy as np
+import pybullet as p
+import pytest
+
+from airobot.utils.pb_util import BulletClient
+from airobot.utils.pb_util import TextureModder
+from airobot.utils.render_util import RenderWorkerPool
+
+
+def _views(pb_client, num_views=1):
+    view_matrix = pb_client.computeViewMatrixFromYawPitchRoll(
+        [0, 0, 0], 1, 0, -90, 0, 2)
+    proj_matrix = pb_client.computeProjectionMatrixFOV(
+        60, 64 / 48., 0.01, 10)
+    return [dict(width=64, height=48, viewMatrix=view_matrix,
+                 projectionMatrix=proj_matrix,
+                 renderer=p.ER_TINY_RENDERER)] * num_views
+
+
+@pytest.fixture(scope="module")
+def create_pool():
+    pb_client = BulletClient(connection_mode=p.DIRECT,
+                             opengl_render=False)
+    pool = RenderWorkerPool(pb_client, 2)
+    yield pb_client, pool
+    pool.close()
+    pb_client.disconnect()
+
+
+def test_texture_modder_change_reaches_workers(create_pool):
+    pb_client, pool = create_pool
+    box_id = pb_client.load_geom('box', size=0.2, mass=0,
+                                 base_pos=[0, 0, 0],
+                                 rgba=[1, 0, 0, 1])
+    modder = TextureModder(pb_client.get_client_id())
+    modder.set_rgba(box_id, -1, [0, 0, 1, 1])
+    rgba, _, _ = pool.render(_views(pb_client, 2))
+    for img in rgba:
+        assert img[24, 32, 2] > img[24, 32, 0]
+    modder.set_rgba(box_id, -1, [0, 1, 0, 1])
+    assert pool.submit(_views(pb_client), frame_id=0)
+    frames = pool.collect(timeout=None)
+    img = frames[0][1][0]
+    assert img[24, 32, 1] > img[24, 32, 2]
+    expected = pb_client.getCameraImage(**_views(pb_client)[0])[2]
+    expected = np.reshape(expected, (48, 64, 4))
+    assert np.array_equal(img, expected)
+    pb_client.removeBody(box_id)
+
+
+def test_scene_log_bounded(create_pool):
+    pb_client, pool = create_pool
+    log_lens = []
+    for step in range(10):
+        box_id = pb_client.load_geom('box', size=0.2, mass=0,
+                                     rgba=[1, 0, 0, 1])
+        pb_client.changeVisualShape(box_id, -1, rgbaColor=[0, 0, 1, 1])
+        assert pool.submit(_views(pb_client), frame_id=step)
+        pool.collect(timeout=None)
+        pb_client.removeBody(box_id)
+        log_lens.append(len(pb_client.get_scene_log()))
+    # the workers take turns, so only the calls since the
+    # last frame of the other worker are kept
+    assert max(log_lens[2:]) == log_lens[1]
@@ -0,0 +1,56 @@
+import numpy as np
+import pybullet as p
+import pytest
+from yacs.config import CfgNode as CN
+
+from airobot.cfgs.assets.pybullet_camera import get_sim_cam_cfg
+from airobot.sensor.camera.rgbdcam_pybullet import RGBDCameraPybullet
+from airobot.utils.pb_util import BulletClient
+from airobot.utils.pb_util import TextureModder
+
+
+@pytest.fixture(scope="module")
+def create_scene():
+    pb_client = BulletClient(connection_mode=p.DIRECT,
+                             opengl_render=False)
+    box_id = pb_client.load_geom('box', size=0.2, mass=0,
+                                 base_pos=[0, 0, 0],
+                                 rgba=[1, 0, 0, 1])
+    cfgs = CN()
+    cfgs.CAM = CN()
+    cfgs.CAM.SIM = get_sim_cam_cfg()
+    cam = RGBDCameraPybullet(cfgs=cfgs, pb_client=pb_client)
+    cam.setup_camera(focus_pt=[0, 0, 0], dist=1, pitch=-90,
+                     height=48, width=64)
+    yield pb_client, cam, box_id
+    pb_client.disconnect()
+
+
+def test_cache_hit(create_scene):
+    pb_client, cam, box_id = create_scene
+    rgb1, depth1 = cam.get_images()
+    cam.clear_cache()
+    rgb2, depth2 = cam.get_images()
+    rgb3, depth3 = cam.get_images()
+    assert cam.get_cache_stats() == {'hits': 1, 'misses': 1}
+    assert np.array_equal(rgb2, rgb3)
+    assert np.array_equal(depth2, depth3)
+    assert depth3.dtype == np.float64
+
+
+@pytest.mark.parametrize("through_modder", [False, True])
+def test_color_change_invalidates_cache(create_scene, through_modder):
+    pb_client, cam, box_id = create_scene
+    cam.clear_cache()
+    modder = TextureModder(pb_client.get_client_id())
+    modder.set_rgba(box_id, -1, [1, 0, 0, 1])
+    rgb_red, _ = cam.get_images()
+    if through_modder:
+        modder.set_rgba(box_id, -1, [0, 0, 1, 1])
+    else:
+        pb_client.changeVisualShape(box_id, -1, rgbaColor=[0, 0, 1, 1])
+    rgb_blue, _ = cam.get_images()
+    assert cam.get_cache_stats()['misses'] == 2
+    center = (cam.img_height // 2, cam.img_width // 2)
+    assert rgb_red[center][0] > rgb_red[center][2]
+    assert rgb_blue[center][2] > rgb_blue[center][0]
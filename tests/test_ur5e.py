@@ -35,3 +35,16 @@ def test_set_jpos(create_robot, position, joint_name):
     position = np.array(position)
     ag_error = np.fabs(jnt_pos.flatten() - np.array(position).flatten())
     assert np.max(ag_error) < 0.02
+
+
+@pytest.mark.parametrize("delta_xyz", [[0.05, 0, 0],
+                                       [0, -0.05, 0],
+                                       [0, 0, 0.05]])
+def test_move_ee_xyz(create_robot, delta_xyz):
+    bot = create_robot
+    bot.arm.go_home()
+    start_pose = bot.arm.get_ee_pose()
+    bot.arm.move_ee_xyz(delta_xyz)
+    end_pose = bot.arm.get_ee_pose()
+    pos_error = np.fabs(end_pose.pos - start_pose.pos - np.array(delta_xyz))
+    assert np.max(pos_error) < 0.01
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pytest
+
+import airobot
+import airobot.utils.common as arutil
+from airobot.utils.ur_ik import URAnalyticalIK
+from airobot.utils.ur_ik import parse_urdf_joints
+from airobot.utils.ur_ik import urdf_link_tf
+
+URDF_PATH = os.path.join(os.path.dirname(airobot.__file__), 'urdfs')
+JOINT_NAMES = ['shoulder_pan_joint', 'shoulder_lift_joint', 'elbow_joint',
+               'wrist_1_joint', 'wrist_2_joint', 'wrist_3_joint']
+
+
+def _create_ik(urdf):
+    return URAnalyticalIK.from_urdf(os.path.join(URDF_PATH, urdf),
+                                    'base', 'ee_tip', JOINT_NAMES)
+
+
+def _to_poses(tfs):
+    return np.concatenate([tfs[..., :3, 3],
+                           arutil.rot2quat(tfs[..., :3, :3])], axis=-1)
+
+
+@pytest.mark.parametrize("urdf", ['ur5e_pybullet.urdf',
+                                  'ur5e_2f140_pybullet.urdf',
+                                  'ur5e_stick_pybullet.urdf'])
+def test_fk_matches_urdf(urdf):
+    ik = _create_ik(urdf)
+    np.testing.assert_allclose(ik.d[:5], [0.163, 0, 0, 0.134, 0.1])
+    np.testing.assert_allclose(ik.a, [0, -0.425, -0.392, 0, 0, 0])
+    joints = parse_urdf_joints(os.path.join(URDF_PATH, urdf))
+    jpos = np.random.RandomState(0).uniform(-np.pi, np.pi, (10, 6))
+    expected = [urdf_link_tf(joints, 'base', 'ee_tip',
+                             dict(zip(JOINT_NAMES, q))) for q in jpos]
+    np.testing.assert_allclose(ik.fk(jpos), expected, atol=1e-9)
+
+
+def test_ik_all():
+    ik = _create_ik('ur5e_2f140_pybullet.urdf')
+    jpos = np.random.RandomState(1).uniform(-np.pi, np.pi, (200, 6))
+    tfs = ik.fk(jpos)
+    sols, valid = ik.ik_all(_to_poses(tfs))
+    assert sols.shape == (200, 8, 6) and valid.shape == (200, 8)
+    assert np.all(valid.sum(axis=1) >= 1)
+    assert np.all(np.isnan(sols[~valid]))
+    assert np.all(np.abs(sols[valid]) <= np.pi)
+    sol_tfs = ik.fk(np.where(valid[..., None], sols, 0))
+    np.testing.assert_allclose(sol_tfs[valid],
+                               np.repeat(tfs[:, None], 8, axis=1)[valid],
+                               atol=1e-9)
+    # a single pose gives the same branches as in a batch
+    single_sols, single_valid = ik.ik_all(_to_poses(tfs[0]))
+    np.testing.assert_array_equal(single_valid, valid[0])
+    np.testing.assert_allclose(single_sols[single_valid],
+                               sols[0][valid[0]], atol=1e-12)
+
+
+def test_ik_closest_to_seed():
+    ik = _create_ik('ur5e_pybullet.urdf')
+    jpos = np.random.RandomState(2).uniform(-np.pi, np.pi, (50, 6))
+    poses = _to_poses(ik.fk(jpos))
+    sols, found = ik.ik(poses, jpos)
+    assert np.all(found)
+    np.testing.assert_allclose(sols, jpos, atol=1e-9)
+    sol, found = ik.ik(poses[0], jpos[0])
+    assert found
+    np.testing.assert_allclose(sol, sols[0], atol=1e-12)
+
+
+def test_ik_wraps_seed_angles():
+    ik = _create_ik('ur5e_pybullet.urdf')
+    rng = np.random.RandomState(3)
+    jpos = rng.uniform(-np.pi, np.pi, (50, 6))
+    # joint angles close to +-pi, whose branches are
+    # returned on the other side of the [-pi, pi) range
+    jpos[:25, [0, 3, 5]] = np.pi - 1e-4
+    poses = _to_poses(ik.fk(jpos))
+    # seeds outside [-pi, pi)
+    seeds = jpos + 2 * np.pi * rng.randint(-1, 2, jpos.shape)
+    sols, found = ik.ik(poses, seeds)
+    assert np.all(found)
+    # the joint limits of the URDF are [-pi, pi]
+    np.testing.assert_allclose(ik.jnt_limits,
+                               [[-np.pi, np.pi]] * 6, atol=1e-9)
+    np.testing.assert_allclose(sols, jpos, atol=1e-9)
+
+
+def test_ik_within_joint_limits():
+    ik = _create_ik('ur5e_pybullet.urdf')
+    ik.jnt_limits = np.array([[-2 * np.pi, 2 * np.pi]] * 6)
+    jpos = np.random.RandomState(4).uniform(-np.pi, np.pi, (50, 6))
+    # joint angles just past +2pi from a seed near +2pi
+    jpos[:, 0] = 0.01
+    seeds = jpos.copy()
+    seeds[:, 0] = 2 * np.pi - 0.01
+    sols, found = ik.ik(_to_poses(ik.fk(jpos)), seeds)
+    assert np.all(found)
+    assert np.all(sols >= ik.jnt_limits[:, 0])
+    assert np.all(sols <= ik.jnt_limits[:, 1])
+    np.testing.assert_allclose(sols, jpos, atol=1e-9)
+    # no branch fits in the limits
+    ik.jnt_limits[0] = [0.5, 1.0]
+    sol, found = ik.ik(_to_poses(ik.fk(jpos[0])), seeds[0])
+    assert not found and np.all(np.isnan(sol))
+
+
+def test_ik_singular_wrist():
+    ik = _create_ik('ur5e_pybullet.urdf')
+    # wrist_2 at 0: wrist_3 is parallel to the shoulder and elbow axes
+    jpos = np.array([0.3, -1.2, 1.0, -0.5, 0.0, 0.7])
+    sol, found = ik.ik(_to_poses(ik.fk(jpos)), jpos)
+    assert found
+    # acos loses precision near the singularity
+    np.testing.assert_allclose(ik.fk(sol), ik.fk(jpos), atol=1e-6)
+
+
+def test_ik_out_of_reach():
+    ik = _create_ik('ur5e_pybullet.urdf')
+    sols, valid = ik.ik_all([2, 0, 0, 0, 0, 0, 1])
+    assert not np.any(valid) and np.all(np.isnan(sols))
+    sol, found = ik.ik([2, 0, 0, 0, 0, 0, 1], np.zeros(6))
+    assert not found
+    with pytest.raises(ValueError):
+        ik.ik_all(np.zeros(6))
+
+
+def test_from_urdf_rejects_other_arms():
+    with pytest.raises((ValueError, KeyError)):
+        URAnalyticalIK.from_urdf(os.path.join(URDF_PATH, 'yumi.urdf'),
+                                 'yumi_body', 'yumi_link_7_r',
+                                 ['yumi_joint_%d_r' % i
+                                  for i in [1, 2, 7, 3, 4, 5]])